@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
-import logging
 import argparse
-import serial
+import logging
+
 import paho.mqtt.client as mq
-import time
+import serial
 
 # --- Configuration ---
 # The serial port connected to the robot's motor controller on the Pi.
@@ -15,64 +15,129 @@ BAUD_RATE = 1000000
 MQTT_BROKER_HOST = "192.168.0.209"  # IMPORTANT: CHANGE THIS TO YOUR LAPTOP'S IP
 TX_TOPIC = "robot/tx"  # Topic for messages FROM laptop TO Pi (and then to robot)
 RX_TOPIC = "robot/rx"  # Topic for messages FROM Pi (and robot) TO laptop
+# Serial reads block until bytes arrive, for at most this long (seconds). An incomplete packet still
+# buffered when a read times out is forwarded as is.
+SERIAL_TIMEOUT = 0.01
 
-parser = argparse.ArgumentParser(description="MQTT:left_right_arrow:Serial bridge for Feetech bus")
-parser.add_argument("--loglevel", default="info", choices=["debug", "info", "warning", "error", "critical"], help="Set logging level")
-parser.add_argument("--serial_port", default=SERIAL_PORT, help="Serial device path e.g. /dev/ttyUSB0")
-parser.add_argument("--baud", type=int, default=BAUD_RATE, help="Serial baud rate")
-parser.add_argument("--broker", default=MQTT_BROKER_HOST, help="MQTT broker host")
-args = parser.parse_args()
-SERIAL_PORT = args.serial_port
-BAUD_RATE = args.baud
-MQTT_BROKER_HOST = args.broker
-log_level = getattr(logging, args.loglevel.upper())
-logging.basicConfig(level=log_level, format='%(asctime)s - %(levelname)s - %(message)s')
-
-def on_connect(client, userdata, flags, rc):
-    if rc == 0:
-        logging.info(f"Connected to MQTT Broker at {MQTT_BROKER_HOST}")
-        client.subscribe(TX_TOPIC)
-        logging.info(f"Subscribed to topic: {TX_TOPIC}")
-    else:
-        logging.error(f"Failed to connect to MQTT broker, return code {rc}\n")
-
-def on_message(client, userdata, msg):
-    """Callback for when a message is received from the MQTT broker."""
-    try:
-        ser.write(msg.payload)
-        logging.debug(f"Wrote to serial: {msg.payload.hex()}")
-    except Exception as e:
-        logging.error(f"Error writing to serial port: {e}")
+# Feetech status packets are laid out as: 0xFF 0xFF | ID | LENGTH | ERROR | PARAMS... | CHECKSUM,
+# where LENGTH counts the bytes following it
+PACKET_HEADER = b"\xff\xff"
+LENGTH_INDEX = 3
+MIN_PACKET_LENGTH = 6
+
+
+def pop_packets(buffer: bytearray) -> list[bytes]:
+    """Remove the complete Feetech packets at the start of `buffer` and return them.
+
+    Bytes preceding a packet header are dropped, and an incomplete packet is kept in the buffer until the
+    rest of its bytes are read.
+    """
+    packets = []
+    start = 0
+    while True:
+        header = buffer.find(PACKET_HEADER, start)
+        if header < 0:
+            # Keep a trailing 0xFF, which may be the first byte of the next header
+            end = len(buffer) - 1 if buffer.endswith(PACKET_HEADER[:1]) else len(buffer)
+            start = max(start, end)
+            break
+        if header > start:
+            logging.debug(f"Dropping {header - start} bytes preceding a packet header")
+        start = header
+        if len(buffer) - header <= LENGTH_INDEX:
+            break
+        length = LENGTH_INDEX + 1 + buffer[header + LENGTH_INDEX]
+        if length < MIN_PACKET_LENGTH:
+            # Not a valid packet: resynchronize on the next header
+            start = header + 1
+            continue
+        if len(buffer) - header < length:
+            break
+        packets.append(bytes(buffer[header : header + length]))
+        start = header + length
+
+    del buffer[:start]
+    return packets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MQTT:left_right_arrow:Serial bridge for Feetech bus")
+    parser.add_argument(
+        "--loglevel",
+        default="info",
+        choices=["debug", "info", "warning", "error", "critical"],
+        help="Set logging level",
+    )
+    parser.add_argument("--serial_port", default=SERIAL_PORT, help="Serial device path e.g. /dev/ttyUSB0")
+    parser.add_argument("--baud", type=int, default=BAUD_RATE, help="Serial baud rate")
+    parser.add_argument("--broker", default=MQTT_BROKER_HOST, help="MQTT broker host")
+    parser.add_argument(
+        "--qos",
+        type=int,
+        default=0,
+        choices=[0, 1, 2],
+        help="QoS of the status packets published to the laptop. 0 suits the sync-read loop, where a lost "
+        "reply is retried at the next step",
+    )
+    args = parser.parse_args()
+    log_level = getattr(logging, args.loglevel.upper())
+    logging.basicConfig(level=log_level, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# --- Main script ---
-if __name__ == "__main__":
     try:
-        ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=0.01)
-        logging.info(f"Opened serial port {SERIAL_PORT} at {BAUD_RATE} baud.")
+        ser = serial.Serial(args.serial_port, args.baud, timeout=SERIAL_TIMEOUT)
+        logging.info(f"Opened serial port {args.serial_port} at {args.baud} baud.")
     except serial.SerialException as e:
-        logging.error(f"Could not open serial port {SERIAL_PORT}: {e}")
+        logging.error(f"Could not open serial port {args.serial_port}: {e}")
         exit(1)
 
+    def on_connect(client, userdata, flags, rc):
+        if rc == 0:
+            logging.info(f"Connected to MQTT Broker at {args.broker}")
+            # Instructions published with QoS 1 by the laptop must not be downgraded by the subscription
+            client.subscribe(TX_TOPIC, qos=1)
+            logging.info(f"Subscribed to topic: {TX_TOPIC}")
+        else:
+            logging.error(f"Failed to connect to MQTT broker, return code {rc}\n")
+
+    def on_message(client, userdata, msg):
+        """Callback for when a message is received from the MQTT broker. Each message holds whole packets."""
+        try:
+            ser.write(msg.payload)
+            logging.debug(f"Wrote to serial: {msg.payload.hex()}")
+        except Exception as e:
+            logging.error(f"Error writing to serial port: {e}")
+
     client = mq.Client()
     client.on_connect = on_connect
     client.on_message = on_message
 
     try:
-        client.connect(MQTT_BROKER_HOST, 1883, 60)
+        client.connect(args.broker, 1883, 60)
     except Exception as e:
-        logging.error(f"Could not connect to MQTT broker at {MQTT_BROKER_HOST}: {e}")
+        logging.error(f"Could not connect to MQTT broker at {args.broker}: {e}")
         exit(1)
 
     client.loop_start()
 
     logging.info("Bridge started. Forwarding messages between MQTT and serial.")
+    rx_buffer = bytearray()
     try:
         while True:
-            if ser.in_waiting > 0:
-                data = ser.read(ser.in_waiting)
-                client.publish(RX_TOPIC, data, qos=1)
-                logging.debug(f"Read from serial and published to MQTT: {data.hex()}")
-            time.sleep(0.001)  # Prevent high CPU usage
+            # Blocks until at least one byte is received, instead of polling the port
+            data = ser.read(max(1, ser.in_waiting))
+            if data:
+                rx_buffer.extend(data)
+                packets = pop_packets(rx_buffer)
+            else:
+                # Nothing more is coming: forward the leftovers and let the SDK deal with them
+                packets = [bytes(rx_buffer)] if rx_buffer else []
+                rx_buffer.clear()
+
+            if packets:
+                # Status packets read together (e.g. the replies of a sync read) are sent as one message
+                payload = b"".join(packets)
+                client.publish(RX_TOPIC, payload, qos=args.qos)
+                logging.debug(f"Read from serial and published to MQTT: {payload.hex()}")
     except KeyboardInterrupt:
         logging.info("Shutting down bridge.")
     finally:
@@ -80,3 +145,7 @@ if __name__ == "__main__":
         client.disconnect()
         ser.close()
         logging.info("Bridge stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -37,6 +37,9 @@ class DatasetConfig:
     revision: str | None = None
     use_imagenet_stats: bool = True
     video_backend: str = field(default_factory=get_safe_default_codec)
+    # Read state, action, timestamps and indices from numpy memmaps built next to the dataset on first load,
+    # instead of converting rows from the parquet files at every step.
+    use_memmap_store: bool = False
 
 
 @dataclass
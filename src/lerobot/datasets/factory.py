@@ -95,6 +95,7 @@ def make_dataset(cfg: TrainPipelineConfig) -> LeRobotDataset | MultiLeRobotDatas
             image_transforms=image_transforms,
             revision=cfg.dataset.revision,
             video_backend=cfg.dataset.video_backend,
+            use_memmap_store=cfg.dataset.use_memmap_store,
         )
     else:
         raise NotImplementedError("The MultiLeRobotDataset isn't supported for now.")
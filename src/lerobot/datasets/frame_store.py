@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""A memory-mapped columnar store of the fixed-shape numeric features of a LeRobotDataset.
+
+Reading a row from `datasets.Dataset` converts Arrow values to Python objects and then to torch tensors. Like
+`OnlineBuffer`, this store keeps the data in numpy memmaps instead, so that rows and slices can be read as
+torch tensors without any intermediate conversion.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import datasets
+import numpy as np
+import torch
+from filelock import FileLock
+
+from lerobot.datasets.utils import arrow_column_to_numpy, is_fixed_shape_numeric_feature
+
+MEMMAP_DIR = "memmap"
+MANIFEST_FILENAME = "manifest.json"
+LOCK_FILENAME = ".lock"
+MEMMAP_STORE_VERSION = 1
+
+
+def get_data_files_manifest(data_files: list[Path]) -> dict[str, dict[str, int]]:
+    """Size and modification time of each data file, used to detect when the memmaps are outdated."""
+    manifest = {}
+    for fpath in sorted(data_files):
+        stat = Path(fpath).stat()
+        manifest[str(fpath)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return manifest
+
+
+class MemmapFrameStore:
+    """Stores the fixed-shape numeric columns of a `datasets.Dataset` (e.g. "observation.state", "action",
+    "timestamp", "index") in one `.npy` memmap per column.
+
+    The memmaps are written next to the dataset on first use, in a directory named after the hash of a
+    manifest of the parquet files they were built from (and of the selection of episodes loaded). They are only
+    built again when these files change. Images, videos and strings are not handled by this store and should
+    still be read from the `datasets.Dataset`.
+
+    Builds are serialized by a file lock, so that concurrent processes (e.g. one per GPU) build the memmaps once.
+    Each build is written to a temporary directory which is then renamed, so that a store directory is never
+    seen partially written.
+
+    The memmaps are opened in copy-on-write mode: `torch.from_numpy` can wrap them without copying nor
+    writing back to disk.
+    """
+
+    def __init__(self, store_dir: Path, keys: list[str]):
+        self.store_dir = Path(store_dir)
+        self.keys = keys
+        self._memmaps = None
+
+    @classmethod
+    def load_or_build(
+        cls,
+        root_dir: str | Path,
+        hf_dataset: datasets.Dataset,
+        features: dict[str, dict],
+        data_files: list[Path],
+    ) -> "MemmapFrameStore":
+        """Opens the memmaps built from `data_files` in a subdirectory of `root_dir`, building them from
+        `hf_dataset` if they are missing.
+        """
+        root_dir = Path(root_dir)
+        keys = [
+            key
+            for key, ft in features.items()
+            if key in hf_dataset.column_names and is_fixed_shape_numeric_feature(ft)
+        ]
+        manifest = {
+            "version": MEMMAP_STORE_VERSION,
+            "keys": keys,
+            "num_frames": len(hf_dataset),
+            "data_files": get_data_files_manifest(data_files),
+        }
+        manifest_json = json.dumps(manifest, indent=4, sort_keys=True)
+        store_dir = root_dir / hashlib.sha256(manifest_json.encode("utf-8")).hexdigest()[:16]
+
+        if not (store_dir / MANIFEST_FILENAME).is_file():
+            root_dir.mkdir(parents=True, exist_ok=True)
+            with FileLock(root_dir / LOCK_FILENAME):
+                # Another process may have built the memmaps while this one was waiting for the lock
+                if not (store_dir / MANIFEST_FILENAME).is_file():
+                    logging.info(f"Building memmaps of {keys} in {store_dir}")
+                    cls._build(store_dir, hf_dataset, keys, manifest_json)
+                    cls._remove_outdated(root_dir, store_dir, manifest)
+
+        return cls(store_dir, keys)
+
+    @staticmethod
+    def _build(store_dir: Path, hf_dataset: datasets.Dataset, keys: list[str], manifest_json: str) -> None:
+        tmp_dir = Path(tempfile.mkdtemp(dir=store_dir.parent, prefix=f".{store_dir.name}-"))
+        try:
+            table = hf_dataset.with_format("arrow")[:]
+            for key in keys:
+                values = arrow_column_to_numpy(table.column(key))
+                memmap = np.lib.format.open_memmap(
+                    tmp_dir / f"{key}.npy", mode="w+", dtype=values.dtype, shape=values.shape
+                )
+                memmap[:] = values
+                memmap.flush()
+                del memmap
+            (tmp_dir / MANIFEST_FILENAME).write_text(manifest_json)
+
+            if store_dir.exists():
+                # Not a complete store, as it has no manifest
+                shutil.rmtree(store_dir)
+            os.replace(tmp_dir, store_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    @staticmethod
+    def _remove_outdated(root_dir: Path, store_dir: Path, manifest: dict) -> None:
+        """Removes the stores built from previous versions of the same data files."""
+        for manifest_path in root_dir.glob(f"*/{MANIFEST_FILENAME}"):
+            if manifest_path.parent == store_dir:
+                continue
+            other_manifest = json.loads(manifest_path.read_text())
+            if other_manifest.get("data_files", {}).keys() == manifest["data_files"].keys():
+                logging.info(f"Removing outdated memmaps in {manifest_path.parent}")
+                shutil.rmtree(manifest_path.parent, ignore_errors=True)
+
+    @property
+    def memmaps(self) -> dict[str, np.ndarray]:
+        # Opened lazily, so that each DataLoader worker opens its own memmaps.
+        if self._memmaps is None:
+            self._memmaps = {key: np.load(self.store_dir / f"{key}.npy", mmap_mode="c") for key in self.keys}
+        return self._memmaps
+
+    def __len__(self) -> int:
+        return len(self.memmaps[self.keys[0]]) if len(self.keys) > 0 else 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def __getstate__(self) -> dict:
+        # Don't pickle the memmaps, which would copy their whole content.
+        return {"store_dir": self.store_dir, "keys": self.keys}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def _to_torch(self, values: np.ndarray) -> torch.Tensor:
+        tensor = torch.from_numpy(values) if isinstance(values, np.ndarray) else torch.tensor(values)
+        # Match `hf_transform_to_torch`, which relies on torch's default floating point dtype
+        return tensor.float() if tensor.is_floating_point() else tensor
+
+    def get_row(self, idx: int) -> dict[str, torch.Tensor]:
+        """Returns the values of all the keys at row `idx`. Vectors are zero-copy views on the memmaps."""
+        return {key: self._to_torch(memmap[idx]) for key, memmap in self.memmaps.items()}
+
+    def gather(self, key: str, indices: np.ndarray | list[int]) -> torch.Tensor:
+        """Returns the stacked values of `key` at rows `indices`."""
+        return self._to_torch(self.memmaps[key][np.asarray(indices, dtype=np.int64)])
@@ -23,6 +23,7 @@ import datasets
 import numpy as np
 import packaging.version
 import PIL.Image
+import pyarrow as pa
 import torch
 import torch.utils
 from datasets import concatenate_datasets, load_dataset
@@ -30,8 +31,15 @@ from huggingface_hub import HfApi, snapshot_download
 from huggingface_hub.constants import REPOCARD_NAME
 from huggingface_hub.errors import RevisionNotFoundError
 
+try:
+    # Private helper of `datasets`, used to gather rows without the overhead of `Dataset.select`
+    from datasets.formatting import query_table
+except ImportError:
+    query_table = None
+
 from lerobot.constants import HF_LEROBOT_HOME
 from lerobot.datasets.compute_stats import aggregate_stats, compute_episode_stats
+from lerobot.datasets.frame_store import MEMMAP_DIR, MemmapFrameStore
 from lerobot.datasets.image_writer import AsyncImageWriter, write_image
 from lerobot.datasets.utils import (
     DEFAULT_FEATURES,
@@ -40,6 +48,7 @@ from lerobot.datasets.utils import (
     TASKS_PATH,
     _validate_feature_names,
     append_jsonlines,
+    arrow_column_to_numpy,
     backward_compatible_episodes_stats,
     check_delta_timestamps,
     check_timestamps_sync,
@@ -52,6 +61,7 @@ from lerobot.datasets.utils import (
     get_hf_features_from_features,
     get_safe_version,
     hf_transform_to_torch,
+    is_fixed_shape_numeric_feature,
     is_valid_version,
     load_episodes,
     load_episodes_stats,
@@ -65,12 +75,21 @@ from lerobot.datasets.utils import (
     write_info,
     write_json,
 )
+from lerobot.datasets.video_encoder import (
+    AsyncVideoEncoder,
+    StreamingVideoEncoder,
+    encode_and_cleanup,
+    encode_videos_in_parallel,
+)
 from lerobot.datasets.video_utils import (
+    SEQUENTIAL_DECODE_MAX_GAP_S,
+    DecodedFrameBuffer,
+    VideoDecoderCache,
     VideoFrame,
     decode_video_frames,
-    encode_video_frames,
     get_safe_default_codec,
     get_video_info,
+    split_timestamps_into_runs,
 )
 
 CODEBASE_VERSION = "v2.1"
@@ -341,6 +360,10 @@ class LeRobotDataset(torch.utils.data.Dataset):
         download_videos: bool = True,
         video_backend: str | None = None,
         batch_encoding_size: int = 1,
+        video_encoding_num_workers: int = 1,
+        video_decoder_cache_size: int = 16,
+        video_frame_buffer_size: int = 0,
+        use_memmap_store: bool = False,
     ):
         """
         2 modes are available for instantiating this class, depending on 2 different use cases:
@@ -444,6 +467,22 @@ class LeRobotDataset(torch.utils.data.Dataset):
                 You can also use the 'pyav' decoder used by Torchvision, which used to be the default option, or 'video_reader' which is another decoder of Torchvision.
             batch_encoding_size (int, optional): Number of episodes to accumulate before batch encoding videos.
                 Set to 1 for immediate encoding (default), or higher for batched encoding. Defaults to 1.
+            video_encoding_num_workers (int, optional): Number of videos encoded in parallel, each in its own
+                process, when `save_episode` encodes the videos of an episode or of a batch of episodes.
+                Defaults to 1.
+            video_decoder_cache_size (int, optional): Maximum number of video decoders kept open between calls
+                to `__getitem__`, in each process (e.g. in each DataLoader worker). Reusing open decoders avoids
+                re-parsing the video containers for every sample. Set to 0 to disable. Defaults to 16.
+            video_frame_buffer_size (int, optional): Number of decoded frames kept per video stream to serve
+                the next samples without seeking. Only useful when samples are accessed sequentially (e.g.
+                with `EpisodeAwareSampler(shuffle=False)`). Hits and misses are counted in
+                `video_frame_buffer.hits` and `video_frame_buffer.misses`, separately in each process: with
+                DataLoader workers, the counters of the main process are not updated. Set to 0 to disable.
+                Defaults to 0.
+            use_memmap_store (bool, optional): Flag to read the fixed-shape numeric features (e.g. state,
+                action, timestamp, indices) from numpy memmaps instead of the hf_dataset. The memmaps are built
+                in 'root/memmap' on first load, and rebuilt only when the parquet files change. Defaults to
+                False.
         """
         super().__init__()
         self.repo_id = repo_id
@@ -456,10 +495,17 @@ class LeRobotDataset(torch.utils.data.Dataset):
         self.video_backend = video_backend if video_backend else get_safe_default_codec()
         self.delta_indices = None
         self.batch_encoding_size = batch_encoding_size
+        self.video_encoding_num_workers = video_encoding_num_workers
         self.episodes_since_last_encoding = 0
+        self.video_decoder_cache = VideoDecoderCache(video_decoder_cache_size)
+        self.video_frame_buffer = (
+            DecodedFrameBuffer(video_frame_buffer_size) if video_frame_buffer_size > 0 else None
+        )
 
         # Unused attributes
         self.image_writer = None
+        self.video_encoder = None
+        self.streaming_encoder = None
         self.episode_buffer = None
 
         self.root.mkdir(exist_ok=True, parents=True)
@@ -484,17 +530,30 @@ class LeRobotDataset(torch.utils.data.Dataset):
             self.hf_dataset = self.load_hf_dataset()
 
         self.episode_data_index = get_episode_data_index(self.meta.episodes, self.episodes)
+        # Numpy copy of the episode boundaries, read for every sample by `_get_query_indices`
+        self._episode_data_index_np = {k: t.numpy() for k, t in self.episode_data_index.items()}
+
+        self.frame_store = None
+        if use_memmap_store:
+            data_files = [
+                self.root / self.meta.get_data_file_path(ep_idx) for ep_idx in self._episode_indices
+            ]
+            self.frame_store = MemmapFrameStore.load_or_build(
+                self.root / MEMMAP_DIR, self.hf_dataset, self.features, data_files
+            )
 
         # Check timestamps
         timestamps = torch.stack(self.hf_dataset["timestamp"]).numpy()
         episode_indices = torch.stack(self.hf_dataset["episode_index"]).numpy()
-        ep_data_index_np = {k: t.numpy() for k, t in self.episode_data_index.items()}
-        check_timestamps_sync(timestamps, episode_indices, ep_data_index_np, self.fps, self.tolerance_s)
+        check_timestamps_sync(
+            timestamps, episode_indices, self._episode_data_index_np, self.fps, self.tolerance_s
+        )
 
         # Setup delta_indices
         if self.delta_timestamps is not None:
             check_delta_timestamps(self.delta_timestamps, self.fps, self.tolerance_s)
-            self.delta_indices = get_delta_indices(self.delta_timestamps, self.fps)
+            delta_indices = get_delta_indices(self.delta_timestamps, self.fps)
+            self.delta_indices = {key: np.array(delta_idx) for key, delta_idx in delta_indices.items()}
 
     def push_to_hub(
         self,
@@ -508,7 +567,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
         upload_large_folder: bool = False,
         **card_kwargs,
     ) -> None:
-        ignore_patterns = ["images/"]
+        self._wait_video_encoder()
+
+        ignore_patterns = ["images/", f"{MEMMAP_DIR}/"]
         if not push_videos:
             ignore_patterns.append("videos/")
 
@@ -581,8 +642,12 @@ class LeRobotDataset(torch.utils.data.Dataset):
 
         self.pull_from_repo(allow_patterns=files, ignore_patterns=ignore_patterns)
 
+    @property
+    def _episode_indices(self) -> list[int]:
+        return self.episodes if self.episodes is not None else list(range(self.meta.total_episodes))
+
     def get_episodes_file_paths(self) -> list[Path]:
-        episodes = self.episodes if self.episodes is not None else list(range(self.meta.total_episodes))
+        episodes = self._episode_indices
         fpaths = [str(self.meta.get_data_file_path(ep_idx)) for ep_idx in episodes]
         if len(self.meta.video_keys) > 0:
             video_files = [
@@ -607,6 +672,24 @@ class LeRobotDataset(torch.utils.data.Dataset):
         hf_dataset.set_transform(hf_transform_to_torch)
         return hf_dataset
 
+    @property
+    def hf_dataset(self) -> datasets.Dataset:
+        """hf_dataset contains all the observations, states, actions, rewards, etc.
+
+        Episodes saved with `save_episode` are only concatenated to it when it is accessed, so that recording
+        an episode doesn't require concatenating the whole dataset.
+        """
+        if len(self._pending_episode_datasets) > 0:
+            self._hf_dataset = concatenate_datasets([self._hf_dataset, *self._pending_episode_datasets])
+            self._hf_dataset.set_transform(hf_transform_to_torch)
+            self._pending_episode_datasets = []
+        return self._hf_dataset
+
+    @hf_dataset.setter
+    def hf_dataset(self, hf_dataset: datasets.Dataset | None) -> None:
+        self._hf_dataset = hf_dataset
+        self._pending_episode_datasets = []
+
     def create_hf_dataset(self) -> datasets.Dataset:
         features = get_hf_features_from_features(self.features)
         ft_dict = {col: [] for col in features}
@@ -624,7 +707,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
     @property
     def num_frames(self) -> int:
         """Number of frames in selected episodes."""
-        return len(self.hf_dataset) if self.hf_dataset is not None else self.meta.total_frames
+        if self._hf_dataset is None:
+            return self.meta.total_frames
+        return len(self._hf_dataset) + sum(len(ep_dataset) for ep_dataset in self._pending_episode_datasets)
 
     @property
     def num_episodes(self) -> int:
@@ -638,24 +723,23 @@ class LeRobotDataset(torch.utils.data.Dataset):
     @property
     def hf_features(self) -> datasets.Features:
         """Features of the hf_dataset."""
-        if self.hf_dataset is not None:
-            return self.hf_dataset.features
+        if self._hf_dataset is not None:
+            return self._hf_dataset.features
         else:
             return get_hf_features_from_features(self.features)
 
-    def _get_query_indices(self, idx: int, ep_idx: int) -> tuple[dict[str, list[int | bool]]]:
-        ep_start = self.episode_data_index["from"][ep_idx]
-        ep_end = self.episode_data_index["to"][ep_idx]
-        query_indices = {
-            key: [max(ep_start.item(), min(ep_end.item() - 1, idx + delta)) for delta in delta_idx]
-            for key, delta_idx in self.delta_indices.items()
-        }
-        padding = {  # Pad values outside of current episode range
-            f"{key}_is_pad": torch.BoolTensor(
-                [(idx + delta < ep_start.item()) | (idx + delta >= ep_end.item()) for delta in delta_idx]
-            )
-            for key, delta_idx in self.delta_indices.items()
-        }
+    def _get_query_indices(
+        self, idx: int, ep_idx: int
+    ) -> tuple[dict[str, np.ndarray], dict[str, torch.Tensor]]:
+        ep_start = self._episode_data_index_np["from"][ep_idx]
+        ep_end = self._episode_data_index_np["to"][ep_idx]
+        query_indices = {}
+        padding = {}
+        for key, delta_idx in self.delta_indices.items():
+            indices = idx + np.asarray(delta_idx)
+            query_indices[key] = np.clip(indices, ep_start, ep_end - 1)
+            # Pad values outside of current episode range
+            padding[f"{key}_is_pad"] = torch.from_numpy((indices < ep_start) | (indices >= ep_end))
         return query_indices, padding
 
     def _get_query_timestamps(
@@ -664,21 +748,87 @@ class LeRobotDataset(torch.utils.data.Dataset):
         query_indices: dict[str, list[int]] | None = None,
     ) -> dict[str, list[float]]:
         query_timestamps = {}
+        if query_indices is not None:
+            video_query_indices = {
+                key: q_idx for key, q_idx in query_indices.items() if key in self.meta.video_keys
+            }
+            query_timestamps = {
+                key: timestamps.tolist()
+                for key, timestamps in self._gather_columns(video_query_indices, column="timestamp").items()
+            }
         for key in self.meta.video_keys:
-            if query_indices is not None and key in query_indices:
-                timestamps = self.hf_dataset.select(query_indices[key])["timestamp"]
-                query_timestamps[key] = torch.stack(timestamps).tolist()
-            else:
+            if key not in query_timestamps:
                 query_timestamps[key] = [current_ts]
 
         return query_timestamps
 
+    def _gather_columns(self, query_indices: dict[str, list[int]], column: str | None = None) -> dict:
+        """Reads the rows requested for each key with a single gather on the underlying Arrow table.
+
+        Args:
+            query_indices (dict[str, list[int]]): Indices of the rows to read, for each key.
+            column (str | None, optional): If provided, this column is read for all the keys (e.g.
+                "timestamp"). Otherwise, each key reads its own column. Defaults to None.
+
+        Returns:
+            dict: For each key, the stacked values of the requested rows as a torch.Tensor.
+        """
+        if len(query_indices) == 0:
+            return {}
+
+        if self.frame_store is not None and all((column or key) in self.frame_store for key in query_indices):
+            return {
+                key: self.frame_store.gather(column or key, q_idx) for key, q_idx in query_indices.items()
+            }
+
+        columns = list({column} if column is not None else query_indices)
+        all_indices = np.concatenate([np.asarray(q_idx, dtype=np.int64) for q_idx in query_indices.values()])
+        table = self._take_rows(all_indices, columns)
+
+        arrays = {col: arrow_column_to_numpy(table.column(col)) for col in columns}
+
+        result = {}
+        start = 0
+        for key, q_idx in query_indices.items():
+            values = arrays[column if column is not None else key][start : start + len(q_idx)]
+            tensor = torch.from_numpy(np.ascontiguousarray(values))
+            # Match `hf_transform_to_torch`, which relies on torch's default floating point dtype
+            result[key] = tensor.float() if tensor.is_floating_point() else tensor
+            start += len(q_idx)
+        return result
+
+    def _take_rows(self, indices: np.ndarray, columns: list[str]) -> pa.Table:
+        """Reads the given rows and columns of the hf_dataset as an Arrow table.
+
+        `query_table` and `Dataset._indices` are private to `datasets`: if they are unavailable or
+        behave differently in the installed version, the rows are read with the slower public
+        `Dataset.select` instead.
+        """
+        if query_table is not None:
+            try:
+                # `_indices` is only set when rows of the hf_dataset have been selected or shuffled.
+                table = query_table(self.hf_dataset.data, indices, indices=self.hf_dataset._indices)
+                return table.select(columns)
+            except (AttributeError, TypeError) as e:
+                logging.debug(f"Falling back to `Dataset.select` to read rows: {e}")
+        subset = self.hf_dataset.select(indices).with_format("arrow", columns=columns)
+        return subset[:]
+
     def _query_hf_dataset(self, query_indices: dict[str, list[int]]) -> dict:
-        return {
-            key: torch.stack(self.hf_dataset.select(q_idx)[key])
-            for key, q_idx in query_indices.items()
-            if key not in self.meta.video_keys
-        }
+        columnar_keys = []
+        other_keys = []
+        for key in query_indices:
+            if key in self.meta.video_keys:
+                continue
+            if key in self.features and is_fixed_shape_numeric_feature(self.features[key]):
+                columnar_keys.append(key)
+            else:
+                other_keys.append(key)
+
+        item = self._gather_columns({key: query_indices[key] for key in columnar_keys})
+        for key in other_keys:
+            item[key] = torch.stack(self.hf_dataset.select(query_indices[key])[key])
+        return item
 
     def _query_videos(self, query_timestamps: dict[str, list[float]], ep_idx: int) -> dict[str, torch.Tensor]:
         """Note: When using data workers (e.g. DataLoader with num_workers>0), do not call this function
@@ -689,11 +839,65 @@ class LeRobotDataset(torch.utils.data.Dataset):
         item = {}
         for vid_key, query_ts in query_timestamps.items():
             video_path = self.root / self.meta.get_video_file_path(ep_idx, vid_key)
-            frames = decode_video_frames(video_path, query_ts, self.tolerance_s, self.video_backend)
+            frames = decode_video_frames(
+                video_path,
+                query_ts,
+                self.tolerance_s,
+                self.video_backend,
+                decoder_cache=self.video_decoder_cache,
+                frame_buffer=self.video_frame_buffer,
+            )
             item[vid_key] = frames.squeeze(0)
 
         return item
 
+    def _query_videos_batch(
+        self, batch_query_timestamps: list[dict[str, list[float]]], batch_ep_idx: list[int]
+    ) -> list[dict[str, torch.Tensor]]:
+        """Same as `_query_videos` for several samples at once. Timestamps requested by the different samples
+        from the same video file are grouped, so that each frame is decoded only once per batch. With torchcodec,
+        which retrieves frames by random access, each video file is decoded in a single call. Other decoders
+        decode every frame between the first and the last requested timestamps, so that they are called once
+        per run of close timestamps instead.
+        """
+        requests = {}
+        for sample_idx, (query_timestamps, ep_idx) in enumerate(
+            zip(batch_query_timestamps, batch_ep_idx, strict=True)
+        ):
+            for vid_key, query_ts in query_timestamps.items():
+                requests.setdefault((ep_idx, vid_key), []).append((sample_idx, query_ts))
+
+        random_access = self.video_backend == "torchcodec" and self.video_frame_buffer is None
+        items = [{} for _ in batch_query_timestamps]
+        for (ep_idx, vid_key), samples_query_ts in requests.items():
+            # Only decode each requested timestamp once, in increasing order
+            unique_ts = sorted({ts for _, query_ts in samples_query_ts for ts in query_ts})
+            ts_to_frame_idx = {ts: i for i, ts in enumerate(unique_ts)}
+            video_path = self.root / self.meta.get_video_file_path(ep_idx, vid_key)
+            runs = (
+                [unique_ts]
+                if random_access
+                else split_timestamps_into_runs(unique_ts, SEQUENTIAL_DECODE_MAX_GAP_S)
+            )
+            frames = torch.cat(
+                [
+                    decode_video_frames(
+                        video_path,
+                        run,
+                        self.tolerance_s,
+                        self.video_backend,
+                        decoder_cache=self.video_decoder_cache,
+                        frame_buffer=self.video_frame_buffer,
+                    )
+                    for run in runs
+                ]
+            )
+            for sample_idx, query_ts in samples_query_ts:
+                frame_indices = [ts_to_frame_idx[ts] for ts in query_ts]
+                items[sample_idx][vid_key] = frames[frame_indices].squeeze(0)
+
+        return items
+
     def _add_padding_keys(self, item: dict, padding: dict[str, list[bool]]) -> dict:
         for key, val in padding.items():
             item[key] = torch.BoolTensor(val)
@@ -702,8 +906,21 @@ class LeRobotDataset(torch.utils.data.Dataset):
     def __len__(self):
         return self.num_frames
 
-    def __getitem__(self, idx) -> dict:
-        item = self.hf_dataset[idx]
+    def _get_hf_row(self, idx: int) -> dict:
+        if self.frame_store is None:
+            return self.hf_dataset[idx]
+
+        item = self.frame_store.get_row(idx)
+        if len(self.frame_store.keys) < len(self.hf_dataset.column_names):
+            # Columns that aren't stored in memmaps (e.g. images) are still read from the hf_dataset
+            item = {**self.hf_dataset[idx], **item}
+        return item
+
+    def _get_item_without_videos(self, idx: int) -> tuple[dict, int, dict[str, list[float]] | None]:
+        """Returns the item at `idx` without its video frames, along with its episode index and the
+        timestamps to decode from each video (None if the dataset has no video).
+        """
+        item = self._get_hf_row(idx)
         ep_idx = item["episode_index"].item()
 
         query_indices = None
@@ -714,12 +931,14 @@ class LeRobotDataset(torch.utils.data.Dataset):
             for key, val in query_result.items():
                 item[key] = val
 
+        query_timestamps = None
         if len(self.meta.video_keys) > 0:
             current_ts = item["timestamp"].item()
             query_timestamps = self._get_query_timestamps(current_ts, query_indices)
-            video_frames = self._query_videos(query_timestamps, ep_idx)
-            item = {**video_frames, **item}
 
+        return item, ep_idx, query_timestamps
+
+    def _finalize_item(self, item: dict) -> dict:
         if self.image_transforms is not None:
             image_keys = self.meta.camera_keys
             for cam in image_keys:
@@ -731,6 +950,33 @@ class LeRobotDataset(torch.utils.data.Dataset):
 
         return item
 
+    def __getitem__(self, idx) -> dict:
+        item, ep_idx, query_timestamps = self._get_item_without_videos(idx)
+
+        if query_timestamps is not None:
+            video_frames = self._query_videos(query_timestamps, ep_idx)
+            item = {**video_frames, **item}
+
+        return self._finalize_item(item)
+
+    def __getitems__(self, indices: list[int]) -> list[dict]:
+        """Batched version of `__getitem__`, used by `torch.utils.data.DataLoader` when batching samples.
+
+        Video frames requested by all the samples of the batch are grouped by video file (i.e. by episode and
+        camera), so that each video file is decoded with a single call instead of once per sample.
+        """
+        if len(self.meta.video_keys) == 0:
+            return [self[idx] for idx in indices]
+
+        items, batch_ep_idx, batch_query_timestamps = zip(
+            *[self._get_item_without_videos(idx) for idx in indices], strict=True
+        )
+        batch_video_frames = self._query_videos_batch(list(batch_query_timestamps), list(batch_ep_idx))
+        return [
+            self._finalize_item({**video_frames, **item})
+            for item, video_frames in zip(items, batch_video_frames, strict=True)
+        ]
+
     def __repr__(self):
         feature_keys = list(self.features)
         return (
@@ -769,8 +1015,8 @@ class LeRobotDataset(torch.utils.data.Dataset):
     def add_frame(self, frame: dict, task: str, timestamp: float | None = None) -> None:
         """
         This function only adds the frame to the episode_buffer. Apart from images — which are written in a
-        temporary directory — nothing is written to disk. To save those frames, the 'save_episode()' method
-        then needs to be called.
+        temporary directory, or directly encoded when a streaming encoder has been started — nothing is written
+        to disk. To save those frames, the 'save_episode()' method then needs to be called.
         """
         # Convert torch to numpy if needed
         for name in frame:
@@ -797,7 +1043,12 @@ class LeRobotDataset(torch.utils.data.Dataset):
                     f"An element of the frame is not in the features. '{key}' not in '{self.features.keys()}'."
                 )
 
-            if self.features[key]["dtype"] in ["image", "video"]:
+            if self.features[key]["dtype"] == "video" and self.streaming_encoder is not None:
+                video_path = self.root / self.meta.get_video_file_path(
+                    self.episode_buffer["episode_index"], key
+                )
+                self.streaming_encoder.add_frame(key, video_path, frame[key])
+            elif self.features[key]["dtype"] in ["image", "video"]:
                 img_path = self._get_image_file_path(
                     episode_index=self.episode_buffer["episode_index"], image_key=key, frame_index=frame_index
                 )
@@ -854,6 +1105,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
             episode_buffer[key] = np.stack(episode_buffer[key])
 
         self._wait_image_writer()
+        if self.streaming_encoder is not None:
+            # The videos are already encoded, the sampled frames replace the image paths to compute the stats
+            episode_buffer.update(self.streaming_encoder.finish_episode())
         self._save_episode_table(episode_buffer, episode_index)
         ep_stats = compute_episode_stats(episode_buffer, self.features)
 
@@ -861,7 +1115,7 @@ class LeRobotDataset(torch.utils.data.Dataset):
         use_batched_encoding = self.batch_encoding_size > 1
 
         if has_video_keys and not use_batched_encoding:
-            self.encode_episode_videos(episode_index)
+            self.encode_episode_videos(episode_index, num_workers=self.video_encoding_num_workers)
 
         # `meta.save_episode` should be executed after encoding the videos
         self.meta.save_episode(episode_index, episode_length, episode_tasks, ep_stats)
@@ -875,12 +1129,11 @@ class LeRobotDataset(torch.utils.data.Dataset):
                 logging.info(
                     f"Batch encoding {self.batch_encoding_size} videos for episodes {start_ep} to {end_ep - 1}"
                 )
-                self.batch_encode_videos(start_ep, end_ep)
+                self.batch_encode_videos(start_ep, end_ep, num_workers=self.video_encoding_num_workers)
                 self.episodes_since_last_encoding = 0
 
-        # Episode data index and timestamp checking
-        ep_data_index = get_episode_data_index(self.meta.episodes, [episode_index])
-        ep_data_index_np = {k: t.numpy() for k, t in ep_data_index.items()}
+        # Timestamp checking, the episode buffer contains a single episode
+        ep_data_index_np = {"from": np.array([0]), "to": np.array([episode_length])}
         check_timestamps_sync(
             episode_buffer["timestamp"],
             episode_buffer["episode_index"],
@@ -889,13 +1142,11 @@ class LeRobotDataset(torch.utils.data.Dataset):
             self.tolerance_s,
         )
 
-        # Verify that we have one parquet file per episode and the number of video files matches the number of encoded episodes
-        parquet_files = list(self.root.rglob("*.parquet"))
-        assert len(parquet_files) == self.num_episodes
-        video_files = list(self.root.rglob("*.mp4"))
-        assert len(video_files) == (self.num_episodes - self.episodes_since_last_encoding) * len(
-            self.meta.video_keys
-        )
+        # Verify that the files of this episode have been written, without listing the whole dataset
+        assert (self.root / self.meta.get_data_file_path(episode_index)).is_file()
+        if has_video_keys and not use_batched_encoding and self.video_encoder is None:
+            for key in self.meta.video_keys:
+                assert (self.root / self.meta.get_video_file_path(episode_index, key)).is_file()
 
         if not episode_data:  # Reset the buffer
             self.episode_buffer = self.create_episode_buffer()
@@ -904,8 +1155,10 @@ class LeRobotDataset(torch.utils.data.Dataset):
         episode_dict = {key: episode_buffer[key] for key in self.hf_features}
         ep_dataset = datasets.Dataset.from_dict(episode_dict, features=self.hf_features, split="train")
         ep_dataset = embed_images(ep_dataset)
-        self.hf_dataset = concatenate_datasets([self.hf_dataset, ep_dataset])
-        self.hf_dataset.set_transform(hf_transform_to_torch)
+        # The concatenation to hf_dataset is deferred until it is accessed
+        self._pending_episode_datasets.append(ep_dataset)
+        # The memmaps don't contain the new episode, they will be rebuilt at the next load
+        self.frame_store = None
         ep_data_path = self.root / self.meta.get_data_file_path(ep_index=episode_index)
         ep_data_path.parent.mkdir(parents=True, exist_ok=True)
         ep_dataset.to_parquet(ep_data_path)
@@ -922,6 +1175,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
                 if img_dir.is_dir():
                     shutil.rmtree(img_dir)
 
+        if self.streaming_encoder is not None:
+            self.streaming_encoder.abort_episode()
+
         # Reset the buffer
         self.episode_buffer = self.create_episode_buffer()
 
@@ -950,20 +1206,62 @@ class LeRobotDataset(torch.utils.data.Dataset):
         if self.image_writer is not None:
             self.image_writer.wait_until_done()
 
-    def encode_episode_videos(self, episode_index: int) -> None:
+    def start_streaming_encoder(self, max_queue_size: int = 0, **encode_kwargs) -> None:
         """
-        Use ffmpeg to convert frames stored as png into mp4 videos.
-        Note: `encode_video_frames` is a blocking call. Making it asynchronous shouldn't speedup encoding,
-        since video encoding with ffmpeg is already using multithreading.
+        Encode the frames of the video features as they are added with `add_frame`, instead of writing them as
+        PNG images and encoding them when the episode is saved. See `StreamingVideoEncoder`.
+        """
+        if isinstance(self.streaming_encoder, StreamingVideoEncoder):
+            logging.warning(
+                "You are starting a new StreamingVideoEncoder that is replacing an already existing one in the dataset."
+            )
+            self.streaming_encoder.stop()
 
-        This method handles video encoding steps:
-        - Video encoding via ffmpeg
-        - Video info updating in metadata
-        - Raw image cleanup
+        self.streaming_encoder = StreamingVideoEncoder(
+            self.fps, max_queue_size=max_queue_size, **encode_kwargs
+        )
 
-        Args:
-            episode_index (int): Index of the episode to encode.
+    def stop_streaming_encoder(self) -> None:
+        """Stop the encoding threads. The videos of an episode that was not saved are discarded."""
+        if self.streaming_encoder is not None:
+            self.streaming_encoder.stop()
+            self.streaming_encoder = None
+
+    def start_video_encoder(
+        self, num_workers: int = 1, max_pending_jobs: int = 16, num_threads_per_job: int | None = None
+    ) -> None:
+        if isinstance(self.video_encoder, AsyncVideoEncoder):
+            logging.warning(
+                "You are starting a new AsyncVideoEncoder that is replacing an already existing one in the dataset."
+            )
+
+        self.video_encoder = AsyncVideoEncoder(
+            num_workers=num_workers,
+            max_pending_jobs=max_pending_jobs,
+            num_threads_per_job=num_threads_per_job,
+        )
+
+    def stop_video_encoder(self) -> None:
         """
+        Wait for the videos being encoded in the background, then stop the encoding processes. Like
+        `stop_image_writer`, this needs to be called before wrapping this dataset inside a DataLoader.
+        """
+        if self.video_encoder is not None:
+            self._wait_video_encoder()
+            self.video_encoder.stop()
+            self.video_encoder = None
+
+    def _wait_video_encoder(self) -> None:
+        """Wait for asynchronous video encoder to finish, and write the video info it couldn't write."""
+        if self.video_encoder is not None:
+            self.video_encoder.wait_until_done()
+            if len(self.meta.video_keys) > 0 and self.meta.total_episodes > 0:
+                self.meta.update_video_info()
+                write_info(self.meta.info, self.meta.root)
+
+    def _get_video_encoding_jobs(self, episode_index: int) -> list[tuple[Path, Path]]:
+        """(images directory, video path) of the videos of an episode that still need to be encoded."""
+        jobs = []
         for key in self.meta.video_keys:
             video_path = self.root / self.meta.get_video_file_path(episode_index, key)
             if video_path.is_file():
@@ -972,34 +1270,101 @@ class LeRobotDataset(torch.utils.data.Dataset):
             img_dir = self._get_image_file_path(
                 episode_index=episode_index, image_key=key, frame_index=0
             ).parent
-            encode_video_frames(img_dir, video_path, self.fps, overwrite=True)
-            shutil.rmtree(img_dir)
+            jobs.append((img_dir, video_path))
+        return jobs
 
+    def _encode_videos(
+        self, jobs: list[tuple[Path, Path]], num_workers: int = 1, num_threads_per_job: int | None = None
+    ) -> None:
+        if self.video_encoder is not None:
+            for img_dir, video_path in jobs:
+                self.video_encoder.encode(img_dir, video_path, self.fps)
+        elif num_workers > 1 and len(jobs) > 1:
+            encode_videos_in_parallel(jobs, self.fps, num_workers, num_threads_per_job)
+        else:
+            for img_dir, video_path in jobs:
+                encode_and_cleanup(img_dir, video_path, self.fps, num_threads=num_threads_per_job)
+
+    def _update_video_info(self, start_episode: int, end_episode: int) -> None:
         # Update video info (only needed when first episode is encoded since it reads from episode 0)
-        if len(self.meta.video_keys) > 0 and episode_index == 0:
+        # Note: with a video encoder, this is done by `_wait_video_encoder` once the videos are written.
+        if len(self.meta.video_keys) > 0 and start_episode == 0 < end_episode and self.video_encoder is None:
             self.meta.update_video_info()
             write_info(self.meta.info, self.meta.root)  # ensure video info always written properly
 
-    def batch_encode_videos(self, start_episode: int = 0, end_episode: int | None = None) -> None:
+    def encode_episode_videos(
+        self, episode_index: int, num_workers: int = 1, num_threads_per_job: int | None = None
+    ) -> None:
+        """
+        Use ffmpeg to convert frames stored as png into mp4 videos.
+        Note: `encode_video_frames` is a blocking call. When a video encoder has been started with
+        `start_video_encoder`, the videos are encoded in background processes instead, and this method returns
+        as soon as the encoding jobs are submitted.
+
+        This method handles video encoding steps:
+        - Video encoding via ffmpeg
+        - Video info updating in metadata
+        - Raw image cleanup
+
+        Args:
+            episode_index (int): Index of the episode to encode.
+            num_workers (int): Number of cameras encoded in parallel, each in its own process. Defaults to 1.
+            num_threads_per_job (int | None): Number of threads used to encode each video. Defaults to the
+                number of cores divided by `num_workers` when encoding in parallel, and to the encoder's
+                default otherwise.
+        """
+        self._encode_videos(self._get_video_encoding_jobs(episode_index), num_workers, num_threads_per_job)
+        self._update_video_info(episode_index, episode_index + 1)
+
+    def batch_encode_videos(
+        self,
+        start_episode: int = 0,
+        end_episode: int | None = None,
+        num_workers: int = 1,
+        num_threads_per_job: int | None = None,
+    ) -> None:
         """
         Batch encode videos for multiple episodes.
 
+        Each (episode, camera) video is an independent job. With `num_workers` > 1, the jobs are scheduled on a
+        pool of processes, with `num_threads_per_job` encoding threads each, so that a batch of episodes uses
+        all the cores without oversubscribing them.
+
         Args:
             start_episode: Starting episode index (inclusive)
             end_episode: Ending episode index (exclusive). If None, encodes all episodes from start_episode
+            num_workers: Number of videos encoded in parallel. Defaults to 1.
+            num_threads_per_job: Number of threads used to encode each video. Defaults to the number of cores
+                divided by `num_workers` when encoding in parallel, and to the encoder's default otherwise.
         """
         if end_episode is None:
             end_episode = self.meta.total_episodes
 
         logging.info(f"Starting batch video encoding for episodes {start_episode} to {end_episode - 1}")
 
-        # Encode all episodes with cleanup enabled for individual episodes
+        jobs = []
         for ep_idx in range(start_episode, end_episode):
-            logging.info(f"Encoding videos for episode {ep_idx}")
-            self.encode_episode_videos(ep_idx)
+            jobs.extend(self._get_video_encoding_jobs(ep_idx))
+        logging.info(f"Encoding {len(jobs)} videos with {num_workers} workers")
+        self._encode_videos(jobs, num_workers, num_threads_per_job)
+        self._update_video_info(start_episode, end_episode)
 
         logging.info("Batch video encoding completed")
 
+    def encode_missing_videos(self) -> None:
+        """
+        Encode the videos of saved episodes whose videos are missing but whose frames are still on disk. This
+        happens when recording stopped before the background or batch encoding of these episodes completed.
+        """
+        for ep_idx in range(self.meta.total_episodes):
+            for key in self.meta.video_keys:
+                video_path = self.root / self.meta.get_video_file_path(ep_idx, key)
+                img_dir = self._get_image_file_path(episode_index=ep_idx, image_key=key, frame_index=0).parent
+                if not video_path.is_file() and img_dir.is_dir():
+                    logging.info(f"Encoding missing videos of episode {ep_idx}")
+                    self.encode_episode_videos(ep_idx, num_workers=self.video_encoding_num_workers)
+                    break
+
     @classmethod
     def create(
         cls,
@@ -1014,6 +1379,9 @@ class LeRobotDataset(torch.utils.data.Dataset):
         image_writer_threads: int = 0,
         video_backend: str | None = None,
         batch_encoding_size: int = 1,
+        video_encoding_num_workers: int = 1,
+        video_encoder_workers: int = 0,
+        streaming_encoding: bool = False,
     ) -> "LeRobotDataset":
         """Create a LeRobot Dataset from scratch in order to record data."""
         obj = cls.__new__(cls)
@@ -1030,12 +1398,20 @@ class LeRobotDataset(torch.utils.data.Dataset):
         obj.revision = None
         obj.tolerance_s = tolerance_s
         obj.image_writer = None
+        obj.video_encoder = None
+        obj.streaming_encoder = None
         obj.batch_encoding_size = batch_encoding_size
+        obj.video_encoding_num_workers = video_encoding_num_workers
         obj.episodes_since_last_encoding = 0
 
         if image_writer_processes or image_writer_threads:
             obj.start_image_writer(image_writer_processes, image_writer_threads)
 
+        if streaming_encoding and len(obj.meta.video_keys) > 0:
+            obj.start_streaming_encoder()
+        elif video_encoder_workers and len(obj.meta.video_keys) > 0:
+            obj.start_video_encoder(video_encoder_workers)
+
         # TODO(aliberts, rcadene, alexander-soare): Merge this with OnlineBuffer/DataBuffer
         obj.episode_buffer = obj.create_episode_buffer()
 
@@ -1045,7 +1421,11 @@ class LeRobotDataset(torch.utils.data.Dataset):
         obj.delta_timestamps = None
         obj.delta_indices = None
         obj.episode_data_index = None
+        obj._episode_data_index_np = None
         obj.video_backend = video_backend if video_backend is not None else get_safe_default_codec()
+        obj.video_decoder_cache = VideoDecoderCache()
+        obj.video_frame_buffer = None
+        obj.frame_store = None
         return obj
 
 
@@ -28,6 +28,8 @@ import datasets
 import jsonlines
 import numpy as np
 import packaging.version
+import pyarrow as pa
+import pyarrow.compute as pc
 import torch
 from datasets.table import embed_table_storage
 from huggingface_hub import DatasetCard, DatasetCardData, HfApi
@@ -272,6 +274,21 @@ def hf_transform_to_torch(items_dict: dict[torch.Tensor | None]):
     return items_dict
 
 
+def is_fixed_shape_numeric_feature(feature: dict) -> bool:
+    """Whether a feature is stored as a flat numeric column (i.e. a scalar or a 1D vector per frame)."""
+    return feature["dtype"] not in ["image", "video", "string"] and len(feature["shape"]) == 1
+
+
+def arrow_column_to_numpy(chunked_array: pa.ChunkedArray) -> np.ndarray:
+    """Converts a column of scalars or of fixed-length lists to a (num_rows,) or (num_rows, length) array
+    without going through Python objects.
+    """
+    if pa.types.is_list(chunked_array.type) or pa.types.is_fixed_size_list(chunked_array.type):
+        flat_values = pc.list_flatten(chunked_array).to_numpy()
+        return flat_values.reshape(len(chunked_array), -1)
+    return chunked_array.to_numpy()
+
+
 def is_valid_version(version: str) -> bool:
     try:
         packaging.version.parse(version)
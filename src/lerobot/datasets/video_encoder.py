@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import av
+import numpy as np
+import PIL.Image
+
+from lerobot.datasets.compute_stats import auto_downsample_height_width
+from lerobot.datasets.image_writer import image_array_to_uint8_hwc
+from lerobot.datasets.video_utils import encode_video_frames, get_num_available_cores, open_video_stream
+
+
+def get_partial_video_path(video_path: Path) -> Path:
+    """Path where a video is written while it is being encoded."""
+    return video_path.with_name(f"{video_path.stem}.partial{video_path.suffix}")
+
+
+def encode_and_cleanup(imgs_dir: Path, video_path: Path, fps: int, **encode_kwargs) -> Path:
+    """Encodes the frames of `imgs_dir` into `video_path`, then removes `imgs_dir`.
+
+    The video is first written to a temporary file and then renamed, so that `video_path` only exists once
+    the video is complete. If encoding is interrupted, the frames are left untouched and the episode can be
+    encoded again later.
+    """
+    video_path = Path(video_path)
+    partial_video_path = get_partial_video_path(video_path)
+    encode_video_frames(imgs_dir, partial_video_path, fps, overwrite=True, **encode_kwargs)
+    os.replace(partial_video_path, video_path)
+    shutil.rmtree(imgs_dir)
+    return video_path
+
+
+def get_num_threads_per_job(num_workers: int) -> int:
+    """Number of encoding threads per video so that `num_workers` videos encoded in parallel use all the cores
+    available to this process, without oversubscribing them."""
+    return max(1, get_num_available_cores() // num_workers)
+
+
+def encode_videos_in_parallel(
+    jobs: list[tuple[Path, Path]],
+    fps: int,
+    num_workers: int,
+    num_threads_per_job: int | None = None,
+    **encode_kwargs,
+) -> None:
+    """Encodes independent videos in a pool of `num_workers` processes, with `encode_and_cleanup`.
+
+    Args:
+        jobs (list[tuple[Path, Path]]): (images directory, video path) of each video to encode.
+        fps (int): Frame rate of the videos.
+        num_workers (int): Number of videos encoded at the same time.
+        num_threads_per_job (int | None): Number of threads used to encode each video. Defaults to the number
+            of cores divided by the number of workers.
+        **encode_kwargs: Codec arguments passed to `encode_video_frames`.
+    """
+    if num_workers <= 0:
+        raise ValueError("Number of workers must be greater than zero.")
+    if len(jobs) == 0:
+        return
+
+    num_workers = min(num_workers, len(jobs))
+    if num_threads_per_job is None:
+        num_threads_per_job = get_num_threads_per_job(num_workers)
+
+    # Longest videos first, so that the last running jobs are short ones and all workers finish together
+    jobs = sorted(jobs, key=lambda job: len(os.listdir(job[0])) if os.path.isdir(job[0]) else 0, reverse=True)
+
+    errors = []
+    with ProcessPoolExecutor(
+        max_workers=num_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futures = {
+            pool.submit(
+                encode_and_cleanup,
+                imgs_dir,
+                video_path,
+                fps,
+                num_threads=num_threads_per_job,
+                **encode_kwargs,
+            ): video_path
+            for imgs_dir, video_path in jobs
+        }
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Video encoding of {futures[future]} failed: {e}")
+                errors.append(e)
+    if len(errors) > 0:
+        raise errors[0]
+
+
+class AsyncVideoEncoder:
+    """
+    Encodes videos in a pool of background processes, so that recording can continue while the videos of the
+    previous episodes are being encoded.
+
+    The number of jobs waiting to be encoded is bounded by `max_pending_jobs`: when the limit is reached,
+    `encode` blocks until a job completes. This prevents raw frames from piling up on disk faster than they
+    can be encoded. Use `wait_until_done` as a completion barrier before reading or uploading the videos.
+
+    Args:
+        num_workers (int): Number of encoding processes. Each video is encoded by a single process, and the
+            encoder (e.g. libsvtav1) is already multithreaded, so 1 or 2 workers are usually enough.
+        max_pending_jobs (int): Maximum number of videos submitted but not yet encoded.
+        num_threads_per_job (int | None): Number of threads used to encode each video. Defaults to the encoder's
+            default, which uses all the cores.
+    """
+
+    def __init__(
+        self, num_workers: int = 1, max_pending_jobs: int = 16, num_threads_per_job: int | None = None
+    ):
+        if num_workers <= 0 or max_pending_jobs <= 0:
+            raise ValueError(
+                "Number of workers and maximum number of pending jobs must be greater than zero."
+            )
+
+        self.num_workers = num_workers
+        self.max_pending_jobs = max_pending_jobs
+        self.num_threads_per_job = num_threads_per_job
+        # Use "spawn" since the recording process runs threads (cameras, image writer) that don't survive a fork
+        self.executor = ProcessPoolExecutor(
+            max_workers=num_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._pending_slots = threading.BoundedSemaphore(max_pending_jobs)
+        self._futures: list[Future] = []
+        self._stopped = False
+
+    def encode(self, imgs_dir: Path, video_path: Path, fps: int, **encode_kwargs) -> Future:
+        """Submits the encoding of the frames in `imgs_dir` into `video_path`. Blocks if too many jobs are
+        pending."""
+        if self._stopped:
+            raise RuntimeError("The video encoder has been stopped.")
+
+        self._pending_slots.acquire()
+        try:
+            if self.num_threads_per_job is not None:
+                encode_kwargs.setdefault("num_threads", self.num_threads_per_job)
+            future = self.executor.submit(encode_and_cleanup, imgs_dir, video_path, fps, **encode_kwargs)
+        except Exception:
+            self._pending_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._pending_slots.release())
+        self._futures.append(future)
+        return future
+
+    @property
+    def num_pending_jobs(self) -> int:
+        return sum(not future.done() for future in self._futures)
+
+    def wait_until_done(self) -> None:
+        """Waits for all submitted videos to be encoded. Raises the first encoding error, if any."""
+        futures, self._futures = self._futures, []
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Video encoding failed: {e}")
+                errors.append(e)
+        if len(errors) > 0:
+            raise errors[0]
+
+    def stop(self) -> None:
+        if self._stopped:
+            return
+        try:
+            self.wait_until_done()
+        finally:
+            self.executor.shutdown(wait=True)
+            self._stopped = True
+
+
+class _VideoStreamWriter(threading.Thread):
+    """Encodes the frames of a single camera as they are received, one video per episode.
+
+    Along with the video, a subset of the frames is kept (downsampled) to compute the statistics of the episode,
+    since these frames are not written on disk. The subset is made of the frames whose index is a multiple of
+    a stride, which is doubled each time more than `max_stats_samples` frames have been kept.
+    """
+
+    def __init__(self, fps: int, max_queue_size: int, max_stats_samples: int, encode_kwargs: dict):
+        super().__init__(daemon=True)
+        self.fps = fps
+        self.max_stats_samples = max_stats_samples
+        self.encode_kwargs = encode_kwargs
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.results = queue.Queue()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.container = None
+        self.stream = None
+        self.video_path = None
+        self.error = None
+        self.num_frames = 0
+        self.stats_stride = 1
+        self.stats_samples = []
+
+    def _close(self, remove: bool) -> None:
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+        if remove and self.video_path is not None:
+            get_partial_video_path(self.video_path).unlink(missing_ok=True)
+
+    def _encode_frame(self, video_path: Path, image: np.ndarray | PIL.Image.Image) -> None:
+        if isinstance(image, PIL.Image.Image):
+            image = np.asarray(image.convert("RGB"))
+        image = image_array_to_uint8_hwc(image)
+
+        if self.container is None:
+            self.video_path = Path(video_path)
+            self.video_path.parent.mkdir(parents=True, exist_ok=True)
+            height, width, _ = image.shape
+            self.container, self.stream = open_video_stream(
+                get_partial_video_path(self.video_path), self.fps, width, height, **self.encode_kwargs
+            )
+
+        frame = av.VideoFrame.from_ndarray(np.ascontiguousarray(image), format="rgb24")
+        self.container.mux(self.stream.encode(frame))
+
+        if self.num_frames % self.stats_stride == 0:
+            sample = auto_downsample_height_width(image.transpose(2, 0, 1))
+            self.stats_samples.append(np.ascontiguousarray(sample))
+            if len(self.stats_samples) > self.max_stats_samples:
+                self.stats_samples = self.stats_samples[::2]
+                self.stats_stride *= 2
+        self.num_frames += 1
+
+    def _finish_episode(self) -> np.ndarray:
+        if self.error is not None:
+            raise self.error
+        if self.container is None:
+            raise RuntimeError("No frame was received for this episode.")
+        # Flush the encoder
+        self.container.mux(self.stream.encode())
+        self._close(remove=False)
+        os.replace(get_partial_video_path(self.video_path), self.video_path)
+        return np.stack(self.stats_samples)
+
+    def run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self._close(remove=True)
+                self.queue.task_done()
+                break
+
+            command, args = item
+            if command == "frame":
+                if self.error is None:
+                    try:
+                        self._encode_frame(*args)
+                    except Exception as e:
+                        # Report the error when the episode is finished, and skip the remaining frames
+                        logging.error(f"Video encoding of {args[0]} failed: {e}")
+                        self.error = e
+                        self._close(remove=True)
+            elif command == "finish":
+                try:
+                    self.results.put(self._finish_episode())
+                except Exception as e:
+                    self._close(remove=True)
+                    self.results.put(e)
+                self._reset()
+            elif command == "abort":
+                self._close(remove=True)
+                self._reset()
+                self.results.put(None)
+            self.queue.task_done()
+
+
+class StreamingVideoEncoder:
+    """
+    Encodes the frames of each camera as soon as they are added to the episode, instead of writing them as PNG
+    images to encode them once the episode is saved. Each camera has its own encoding thread, so that
+    `add_frame` doesn't wait for the encoding.
+
+    Since the frames never reach the disk, an episode that was not saved before a crash cannot be recovered.
+    When this matters, use the default mode which writes PNG images and encodes them with
+    `LeRobotDataset.encode_episode_videos` (possibly in background processes with `AsyncVideoEncoder`).
+
+    Args:
+        fps (int): Frame rate of the videos.
+        max_queue_size (int): Maximum number of frames waiting to be encoded, per camera. `add_frame` blocks
+            when the limit is reached. Set to 0 for no limit.
+        max_stats_samples (int): Maximum number of frames per episode and camera kept to compute the episode
+            statistics.
+        **encode_kwargs: Codec arguments passed to `open_video_stream` (e.g. `vcodec`, `crf`, `g`).
+    """
+
+    def __init__(self, fps: int, max_queue_size: int = 0, max_stats_samples: int = 200, **encode_kwargs):
+        self.fps = fps
+        self.max_queue_size = max_queue_size
+        self.max_stats_samples = max_stats_samples
+        self.encode_kwargs = encode_kwargs
+        self.writers: dict[str, _VideoStreamWriter] = {}
+
+    def add_frame(self, key: str, video_path: Path, image: np.ndarray | PIL.Image.Image) -> None:
+        """Queues a frame of camera `key` to be encoded in `video_path`. The image is not copied, and should
+        not be modified afterwards."""
+        if key not in self.writers:
+            writer = _VideoStreamWriter(
+                self.fps, self.max_queue_size, self.max_stats_samples, self.encode_kwargs
+            )
+            writer.start()
+            self.writers[key] = writer
+        self.writers[key].queue.put(("frame", (video_path, image)))
+
+    def finish_episode(self) -> dict[str, np.ndarray]:
+        """Waits for the videos of the current episode to be written.
+
+        Returns:
+            dict[str, np.ndarray]: For each camera, the frames sampled to compute the episode statistics, as a
+                (N, C, H, W) uint8 array.
+        """
+        for writer in self.writers.values():
+            writer.queue.put(("finish", None))
+
+        samples, errors = {}, []
+        for key, writer in self.writers.items():
+            result = writer.results.get()
+            if isinstance(result, Exception):
+                errors.append(result)
+            else:
+                samples[key] = result
+        if len(errors) > 0:
+            raise errors[0]
+        return samples
+
+    def abort_episode(self) -> None:
+        """Discards the frames and the partially written videos of the current episode."""
+        for writer in self.writers.values():
+            writer.queue.put(("abort", None))
+        for writer in self.writers.values():
+            writer.results.get()
+
+    def stop(self) -> None:
+        """Stops the encoding threads. The videos of an unfinished episode are discarded."""
+        for writer in self.writers.values():
+            writer.queue.put(None)
+        for writer in self.writers.values():
+            writer.join()
+        self.writers = {}
@@ -16,8 +16,11 @@
 import glob
 import importlib
 import logging
+import os
 import shutil
 import warnings
+from collections import OrderedDict
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, ClassVar
@@ -29,6 +32,18 @@ import torchvision
 from datasets.features.features import register_feature
 from PIL import Image
 
+# Decoders other than torchcodec without a frame buffer decode every frame between the first and the last
+# requested timestamps: timestamps further apart than this are decoded in separate calls, each seeking to the
+# key frame preceding its first timestamp
+SEQUENTIAL_DECODE_MAX_GAP_S = 0.5
+
+
+def get_num_available_cores() -> int:
+    """Number of cores available to this process."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
 
 def get_safe_default_codec():
     if importlib.util.find_spec("torchcodec"):
@@ -40,11 +55,201 @@ def get_safe_default_codec():
         return "pyav"
 
 
+class VideoDecoderCache:
+    """LRU cache of open video decoders, keyed by video path and backend.
+
+    Opening a decoder parses the container headers and probes the streams, which can dominate the cost of
+    decoding the handful of frames needed for a single sample. Keeping the decoders open across calls avoids
+    paying that cost for every `__getitem__`.
+
+    The cache is owned by the process that filled it. When a `LeRobotDataset` is sent to DataLoader workers
+    (either pickled or forked), each worker starts with an empty cache and opens its own decoders: decoders
+    are never shared between processes. Decoders are closed when they are evicted, when `clear()` is called
+    or when the cache is garbage collected (e.g. when a DataLoader worker is recycled at the end of an epoch).
+
+    Args:
+        max_size (int): Maximum number of decoders kept open at the same time. Least recently used decoders
+            are closed first. A value of 0 disables caching.
+    """
+
+    def __init__(self, max_size: int = 16):
+        if max_size < 0:
+            raise ValueError(f"`max_size` must be positive or 0, but {max_size} was provided.")
+        self.max_size = max_size
+        self._decoders = OrderedDict()
+        self._pid = os.getpid()
+
+    def __len__(self) -> int:
+        self._check_owner()
+        return len(self._decoders)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        self._check_owner()
+        return key in self._decoders
+
+    def __getstate__(self) -> dict:
+        # Open decoders can't be pickled, workers start with an empty cache.
+        return {"max_size": self.max_size}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def __del__(self):
+        self.clear()
+
+    def _check_owner(self) -> None:
+        if self._pid != os.getpid():
+            # This cache has been forked into a new process (e.g. a DataLoader worker). The decoders belong
+            # to the parent process, so we drop our references without closing them.
+            self._decoders = OrderedDict()
+            self._pid = os.getpid()
+
+    def get(self, video_path: Path | str, backend: str, open_fn: Callable[[], Any]) -> Any:
+        """Returns the decoder of `video_path` for `backend`, opening it with `open_fn` on a cache miss."""
+        if self.max_size == 0:
+            return open_fn()
+
+        self._check_owner()
+        key = (str(video_path), backend)
+        if key in self._decoders:
+            self._decoders.move_to_end(key)
+            return self._decoders[key]
+
+        decoder = open_fn()
+        self._decoders[key] = decoder
+        while len(self._decoders) > self.max_size:
+            _, evicted = self._decoders.popitem(last=False)
+            _close_decoder(evicted)
+        return decoder
+
+    def evict(self, video_path: Path | str, backend: str) -> None:
+        """Closes and removes the decoder of `video_path` for `backend` if it is cached."""
+        self._check_owner()
+        decoder = self._decoders.pop((str(video_path), backend), None)
+        if decoder is not None:
+            _close_decoder(decoder)
+
+    def clear(self) -> None:
+        """Closes and removes all the decoders opened by this process."""
+        decoders = getattr(self, "_decoders", None)
+        if not decoders or self._pid != os.getpid():
+            return
+        while self._decoders:
+            _, decoder = self._decoders.popitem(last=False)
+            _close_decoder(decoder)
+
+
+def _close_decoder(decoder: Any) -> None:
+    # torchvision's VideoReader keeps an open pyav container, torchcodec's VideoDecoder closes on deletion.
+    container = getattr(decoder, "container", None)
+    if container is not None:
+        container.close()
+
+
+class DecodedFrameBuffer:
+    """Keeps the most recently decoded frames of each video stream to serve neighboring queries.
+
+    Decoding a frame requires decoding all the frames since the previous key frame. When samples are accessed
+    sequentially (e.g. `EpisodeAwareSampler(shuffle=False)` for evaluation, stats computation or dataset
+    conversion), consecutive samples query overlapping timestamps and would decode the same frames over and
+    over. With this buffer, the decoders read ahead up to `capacity` frames on a miss and keep them, so that
+    the next queries are served from memory without seeking.
+
+    Frames are kept in their decoded uint8 format. Like `VideoDecoderCache`, the buffer is owned by a single
+    process and pickles empty.
+
+    Args:
+        capacity (int): Number of decoded frames kept per video stream.
+        max_streams (int): Maximum number of video streams buffered at the same time. Least recently used
+            streams are dropped first.
+
+    Attributes:
+        hits (int): Number of queries served from the buffer.
+        misses (int): Number of queries that required decoding.
+
+    The counters are local to the process owning the buffer. With a DataLoader using workers, each worker
+    counts its own queries on its copy of the buffer, and the counters of the dataset in the main process
+    stay at 0. They are meant for profiling with `num_workers=0`, or must be read from within the workers.
+    """
+
+    def __init__(self, capacity: int = 32, max_streams: int = 8):
+        if capacity < 1 or max_streams < 1:
+            raise ValueError(
+                f"`capacity` and `max_streams` must be strictly positive, but {capacity=} and {max_streams=} "
+                "were provided."
+            )
+        self.capacity = capacity
+        self.max_streams = max_streams
+        self._streams = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self) -> dict:
+        return {"capacity": self.capacity, "max_streams": self.max_streams}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def reset_counters(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        self._streams.clear()
+
+    def lookup(
+        self, video_path: Path | str, timestamps: list[float], tolerance_s: float
+    ) -> torch.Tensor | None:
+        """Returns the buffered frames closest to `timestamps`, or None if any of them is not buffered."""
+        key = str(video_path)
+        if key in self._streams:
+            loaded_ts, loaded_frames = self._streams[key]
+            query_ts = torch.tensor(timestamps)
+            dist = torch.cdist(query_ts[:, None], loaded_ts[:, None], p=1)
+            min_, argmin_ = dist.min(1)
+            if (min_ < tolerance_s).all():
+                self._streams.move_to_end(key)
+                self.hits += 1
+                return loaded_frames[argmin_]
+
+        self.misses += 1
+        return None
+
+    def add(self, video_path: Path | str, loaded_ts: list[float], loaded_frames: list[torch.Tensor]) -> None:
+        """Replaces the buffered frames of `video_path` by the last `capacity` decoded frames."""
+        key = str(video_path)
+        self._streams[key] = (
+            torch.tensor(loaded_ts[-self.capacity :]),
+            torch.stack(loaded_frames[-self.capacity :]),
+        )
+        self._streams.move_to_end(key)
+        while len(self._streams) > self.max_streams:
+            self._streams.popitem(last=False)
+
+
+def split_timestamps_into_runs(timestamps: list[float], max_gap_s: float) -> list[list[float]]:
+    """Split sorted `timestamps` into runs, wherever two consecutive timestamps are more than `max_gap_s` apart."""
+    runs = []
+    for ts in timestamps:
+        if runs and ts - runs[-1][-1] <= max_gap_s:
+            runs[-1].append(ts)
+        else:
+            runs.append([ts])
+    return runs
+
+
 def decode_video_frames(
     video_path: Path | str,
     timestamps: list[float],
     tolerance_s: float,
     backend: str | None = None,
+    decoder_cache: VideoDecoderCache | None = None,
+    frame_buffer: DecodedFrameBuffer | None = None,
 ) -> torch.Tensor:
     """
     Decodes video frames using the specified backend.
@@ -54,6 +259,10 @@ def decode_video_frames(
         timestamps (list[float]): List of timestamps to extract frames.
         tolerance_s (float): Allowed deviation in seconds for frame retrieval.
         backend (str, optional): Backend to use for decoding. Defaults to "torchcodec" when available in the platform; otherwise, defaults to "pyav"..
+        decoder_cache (VideoDecoderCache, optional): Cache of open decoders to reuse between calls. If None,
+            a new decoder is opened (and closed) for each call.
+        frame_buffer (DecodedFrameBuffer, optional): Buffer of recently decoded frames, used to serve
+            sequential queries without seeking. If None, only the requested frames are decoded.
 
     Returns:
         torch.Tensor: Decoded frames.
@@ -63,9 +272,18 @@ def decode_video_frames(
     if backend is None:
         backend = get_safe_default_codec()
     if backend == "torchcodec":
-        return decode_video_frames_torchcodec(video_path, timestamps, tolerance_s)
+        return decode_video_frames_torchcodec(
+            video_path, timestamps, tolerance_s, decoder_cache=decoder_cache, frame_buffer=frame_buffer
+        )
     elif backend in ["pyav", "video_reader"]:
-        return decode_video_frames_torchvision(video_path, timestamps, tolerance_s, backend)
+        return decode_video_frames_torchvision(
+            video_path,
+            timestamps,
+            tolerance_s,
+            backend,
+            decoder_cache=decoder_cache,
+            frame_buffer=frame_buffer,
+        )
     else:
         raise ValueError(f"Unsupported video backend: {backend}")
 
@@ -76,6 +294,8 @@ def decode_video_frames_torchvision(
     tolerance_s: float,
     backend: str = "pyav",
     log_loaded_timestamps: bool = False,
+    decoder_cache: VideoDecoderCache | None = None,
+    frame_buffer: DecodedFrameBuffer | None = None,
 ) -> torch.Tensor:
     """Loads frames associated to the requested timestamps of a video
 
@@ -95,9 +315,16 @@ def decode_video_frames_torchvision(
     that key frame. As a consequence, to access a requested frame, we need to load the preceding key frame,
     and all subsequent frames until reaching the requested frame. The number of key frames in a video
     can be adjusted during encoding to take into account decoding time and video size in bytes.
+    When a `frame_buffer` is provided, decoding continues past the last requested frame to fill the buffer,
+    and the next requests are served from it when possible.
     """
     video_path = str(video_path)
 
+    if frame_buffer is not None:
+        buffered_frames = frame_buffer.lookup(video_path, timestamps, tolerance_s)
+        if buffered_frames is not None:
+            return buffered_frames.type(torch.float32) / 255
+
     # set backend
     keyframes_only = False
     torchvision.set_video_backend(backend)
@@ -106,7 +333,12 @@ def decode_video_frames_torchvision(
 
     # set a video stream reader
     # TODO(rcadene): also load audio stream at the same time
-    reader = torchvision.io.VideoReader(video_path, "video")
+    if decoder_cache is not None:
+        reader = decoder_cache.get(
+            video_path, backend, lambda: torchvision.io.VideoReader(video_path, "video")
+        )
+    else:
+        reader = torchvision.io.VideoReader(video_path, "video")
 
     # set the first and last requested timestamps
     # Note: previous timestamps are usually loaded, since we need to access the previous key frame
@@ -127,14 +359,17 @@ def decode_video_frames_torchvision(
             logging.info(f"frame loaded at timestamp={current_ts:.4f}")
         loaded_frames.append(frame["data"])
         loaded_ts.append(current_ts)
-        if current_ts >= last_ts:
+        if current_ts >= last_ts and (frame_buffer is None or len(loaded_frames) >= frame_buffer.capacity):
             break
 
-    if backend == "pyav":
+    if backend == "pyav" and decoder_cache is None:
         reader.container.close()
 
     reader = None
 
+    if frame_buffer is not None:
+        frame_buffer.add(video_path, loaded_ts, loaded_frames)
+
     query_ts = torch.tensor(timestamps)
     loaded_ts = torch.tensor(loaded_ts)
 
@@ -174,6 +409,8 @@ def decode_video_frames_torchcodec(
     tolerance_s: float,
     device: str = "cpu",
     log_loaded_timestamps: bool = False,
+    decoder_cache: VideoDecoderCache | None = None,
+    frame_buffer: DecodedFrameBuffer | None = None,
 ) -> torch.Tensor:
     """Loads frames associated with the requested timestamps of a video using torchcodec.
 
@@ -184,7 +421,13 @@ def decode_video_frames_torchcodec(
     that key frame. As a consequence, to access a requested frame, we need to load the preceding key frame,
     and all subsequent frames until reaching the requested frame. The number of key frames in a video
     can be adjusted during encoding to take into account decoding time and video size in bytes.
+    When a `frame_buffer` is provided, the contiguous range of frames starting at the first requested frame
+    is decoded to fill the buffer, and the next requests are served from it when possible.
     """
+    if frame_buffer is not None:
+        buffered_frames = frame_buffer.lookup(video_path, timestamps, tolerance_s)
+        if buffered_frames is not None:
+            return buffered_frames.type(torch.float32) / 255
 
     if importlib.util.find_spec("torchcodec"):
         from torchcodec.decoders import VideoDecoder
@@ -192,7 +435,14 @@ def decode_video_frames_torchcodec(
         raise ImportError("torchcodec is required but not available.")
 
     # initialize video decoder
-    decoder = VideoDecoder(video_path, device=device, seek_mode="approximate")
+    if decoder_cache is not None:
+        decoder = decoder_cache.get(
+            video_path,
+            f"torchcodec-{device}",
+            lambda: VideoDecoder(video_path, device=device, seek_mode="approximate"),
+        )
+    else:
+        decoder = VideoDecoder(video_path, device=device, seek_mode="approximate")
     loaded_frames = []
     loaded_ts = []
     # get metadata for frame information
@@ -203,7 +453,12 @@ def decode_video_frames_torchcodec(
     frame_indices = [round(ts * average_fps) for ts in timestamps]
 
     # retrieve frames based on indices
-    frames_batch = decoder.get_frames_at(indices=frame_indices)
+    if frame_buffer is not None:
+        start = min(frame_indices)
+        stop = min(max(max(frame_indices) + 1, start + frame_buffer.capacity), len(decoder))
+        frames_batch = decoder.get_frames_in_range(start=start, stop=stop)
+    else:
+        frames_batch = decoder.get_frames_at(indices=frame_indices)
 
     for frame, pts in zip(frames_batch.data, frames_batch.pts_seconds, strict=False):
         loaded_frames.append(frame)
@@ -211,6 +466,9 @@ def decode_video_frames_torchcodec(
         if log_loaded_timestamps:
             logging.info(f"Frame loaded at timestamp={pts:.4f}")
 
+    if frame_buffer is not None:
+        frame_buffer.add(video_path, loaded_ts, loaded_frames)
+
     query_ts = torch.tensor(timestamps)
     loaded_ts = torch.tensor(loaded_ts)
 
@@ -243,28 +501,32 @@ def decode_video_frames_torchcodec(
     return closest_frames
 
 
-def encode_video_frames(
-    imgs_dir: Path | str,
+def open_video_stream(
     video_path: Path | str,
     fps: int,
+    width: int,
+    height: int,
     vcodec: str = "libsvtav1",
     pix_fmt: str = "yuv420p",
     g: int | None = 2,
     crf: int | None = 30,
     fast_decode: int = 0,
-    log_level: int | None = av.logging.ERROR,
-    overwrite: bool = False,
-) -> None:
-    """More info on ffmpeg arguments tuning on `benchmark/video/README.md`"""
+    num_threads: int | None = None,
+) -> tuple["av.container.OutputContainer", "av.video.stream.VideoStream"]:
+    """Opens `video_path` for writing and adds a video stream to it. Frames are then encoded with
+    `stream.encode(frame)` and the resulting packets written with `container.mux(packets)`. The encoder needs
+    to be flushed with `container.mux(stream.encode())` before closing the container.
+
+    `num_threads` limits the number of threads used by the encoder, which otherwise uses all the cores. This
+    avoids oversubscription when several videos are encoded in parallel. SVT-AV1 can't be given a number of
+    threads though: its "lp" parameter is a level of parallelism (from 1 to 6), and the size of its thread pool
+    grows with the number of cores of the machine at any level. A budget below the number of available cores is
+    thus clamped to the lowest level, "lp=1".
+    """
     # Check encoder availability
     if vcodec not in ["h264", "hevc", "libsvtav1"]:
         raise ValueError(f"Unsupported video codec: {vcodec}. Supported codecs are: h264, hevc, libsvtav1.")
 
-    video_path = Path(video_path)
-    imgs_dir = Path(imgs_dir)
-
-    video_path.parent.mkdir(parents=True, exist_ok=overwrite)
-
     # Encoders/pixel formats incompatibility check
     if (vcodec == "libsvtav1" or vcodec == "hevc") and pix_fmt == "yuv444p":
         logging.warning(
@@ -272,18 +534,6 @@ def encode_video_frames(
         )
         pix_fmt = "yuv420p"
 
-    # Get input frames
-    template = "frame_" + ("[0-9]" * 6) + ".png"
-    input_list = sorted(
-        glob.glob(str(imgs_dir / template)), key=lambda x: int(x.split("_")[-1].split(".")[0])
-    )
-
-    # Define video output frame size (assuming all input frames are the same size)
-    if len(input_list) == 0:
-        raise FileNotFoundError(f"No images found in {imgs_dir}.")
-    dummy_image = Image.open(input_list[0])
-    width, height = dummy_image.size
-
     # Define video codec options
     video_options = {}
 
@@ -298,18 +548,73 @@ def encode_video_frames(
         value = f"fast-decode={fast_decode}" if vcodec == "libsvtav1" else "fastdecode"
         video_options[key] = value
 
+    if num_threads is not None:
+        if vcodec == "libsvtav1":
+            # SVT-AV1 ignores the "threads" option, see the docstring
+            if num_threads < get_num_available_cores():
+                svtav1_params = [p for p in [video_options.get("svtav1-params"), "lp=1"] if p]
+                video_options["svtav1-params"] = ":".join(svtav1_params)
+        else:
+            video_options["threads"] = str(num_threads)
+
+    # Create and open output file (overwrite by default)
+    output = av.open(str(video_path), "w")
+    output_stream = output.add_stream(vcodec, fps, options=video_options)
+    output_stream.pix_fmt = pix_fmt
+    output_stream.width = width
+    output_stream.height = height
+    return output, output_stream
+
+
+def encode_video_frames(
+    imgs_dir: Path | str,
+    video_path: Path | str,
+    fps: int,
+    vcodec: str = "libsvtav1",
+    pix_fmt: str = "yuv420p",
+    g: int | None = 2,
+    crf: int | None = 30,
+    fast_decode: int = 0,
+    log_level: int | None = av.logging.ERROR,
+    overwrite: bool = False,
+    num_threads: int | None = None,
+) -> None:
+    """More info on ffmpeg arguments tuning on `benchmark/video/README.md`"""
+    video_path = Path(video_path)
+    imgs_dir = Path(imgs_dir)
+
+    video_path.parent.mkdir(parents=True, exist_ok=overwrite)
+
+    # Get input frames
+    template = "frame_" + ("[0-9]" * 6) + ".png"
+    input_list = sorted(
+        glob.glob(str(imgs_dir / template)), key=lambda x: int(x.split("_")[-1].split(".")[0])
+    )
+
+    # Define video output frame size (assuming all input frames are the same size)
+    if len(input_list) == 0:
+        raise FileNotFoundError(f"No images found in {imgs_dir}.")
+    dummy_image = Image.open(input_list[0])
+    width, height = dummy_image.size
+
     # Set logging level
     if log_level is not None:
         # "While less efficient, it is generally preferable to modify logging with Python’s logging"
         logging.getLogger("libav").setLevel(log_level)
 
-    # Create and open output file (overwrite by default)
-    with av.open(str(video_path), "w") as output:
-        output_stream = output.add_stream(vcodec, fps, options=video_options)
-        output_stream.pix_fmt = pix_fmt
-        output_stream.width = width
-        output_stream.height = height
-
+    output, output_stream = open_video_stream(
+        video_path,
+        fps,
+        width,
+        height,
+        vcodec=vcodec,
+        pix_fmt=pix_fmt,
+        g=g,
+        crf=crf,
+        fast_decode=fast_decode,
+        num_threads=num_threads,
+    )
+    with output:
         # Loop through input frames and encode them
         for input_data in input_list:
             input_image = Image.open(input_data).convert("RGB")
@@ -487,7 +792,18 @@ class VideoEncodingManager:
                 f"Encoding remaining {self.dataset.episodes_since_last_encoding} episodes, "
                 f"from episode {start_ep} to {end_ep - 1}"
             )
-            self.dataset.batch_encode_videos(start_ep, end_ep)
+            self.dataset.batch_encode_videos(
+                start_ep, end_ep, num_workers=self.dataset.video_encoding_num_workers
+            )
+
+        # Stop the streaming encoder, discarding the videos of an interrupted episode
+        if getattr(self.dataset, "streaming_encoder", None) is not None:
+            self.dataset.stop_streaming_encoder()
+
+        # Wait for the videos encoded in the background before cleaning up
+        if getattr(self.dataset, "video_encoder", None) is not None:
+            logging.info("Waiting for background video encoding to complete...")
+            self.dataset.stop_video_encoder()
 
         # Clean up episode images if recording was interrupted
         if exc_type is not None:
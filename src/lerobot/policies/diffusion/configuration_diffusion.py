@@ -98,6 +98,14 @@ class DiffusionConfig(PreTrainedConfig):
         clip_sample_range: The magnitude of the clipping range as described above.
         num_inference_steps: Number of reverse diffusion steps to use at inference time (steps are evenly
             spaced). If not provided, this defaults to be the same as `num_train_timesteps`.
+        sampling_mode: How the reverse diffusion process is run at inference time. "scheduler" steps through
+            the noise scheduler, "precomputed" precomputes the coefficients of every step as tensors beforehand,
+            and "compiled" additionally compiles the whole denoising loop with `torch.compile` (captured as a
+            CUDA graph on GPUs), for a fixed batch size and horizon. The last two skip most of the Python and
+            kernel launch overhead of the loop, which dominates the latency of small models.
+        cache_image_features: Whether to keep the image features of the observations encoded when predicting
+            an action chunk during rollouts, so that frames still in the observation queue at the next
+            prediction are not encoded again. Only the new frames then go through the vision backbone.
         do_mask_loss_for_padding: Whether to mask the loss when there are copy-padded actions. See
             `LeRobotDataset` and `load_previous_and_future_frames` for more information. Note, this defaults
             to False as the original Diffusion Policy implementation does the same.
@@ -147,6 +155,8 @@ class DiffusionConfig(PreTrainedConfig):
 
     # Inference
     num_inference_steps: int | None = None
+    sampling_mode: str = "scheduler"
+    cache_image_features: bool = False
 
     # Loss computation
     do_mask_loss_for_padding: bool = False
@@ -180,6 +190,12 @@ class DiffusionConfig(PreTrainedConfig):
                 f"Got {self.noise_scheduler_type}."
             )
 
+        supported_sampling_modes = ["scheduler", "precomputed", "compiled"]
+        if self.sampling_mode not in supported_sampling_modes:
+            raise ValueError(
+                f"`sampling_mode` must be one of {supported_sampling_modes}. Got {self.sampling_mode}."
+            )
+
         # Check that the horizon size and U-Net downsampling is compatible.
         # U-Net downsamples by 2 with each stage.
         downsampling_factor = 2 ** len(self.down_dims)
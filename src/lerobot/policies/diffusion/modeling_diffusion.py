@@ -44,6 +44,9 @@ from lerobot.policies.utils import (
     populate_queues,
 )
 
+# Image features of the observations, computed ahead of `DiffusionModel.generate_actions`
+OBS_IMAGE_FEATURES = "observation.image_features"
+
 
 class DiffusionPolicy(PreTrainedPolicy):
     """
@@ -80,6 +83,8 @@ class DiffusionPolicy(PreTrainedPolicy):
 
         # queues are populated during rollout of the policy, they contain the n latest observations and actions
         self._queues = None
+        # (frame, features) pairs of the images encoded at the last action chunk prediction
+        self._image_features_cache = []
 
         self.diffusion = DiffusionModel(config)
 
@@ -98,12 +103,43 @@ class DiffusionPolicy(PreTrainedPolicy):
             self._queues["observation.images"] = deque(maxlen=self.config.n_obs_steps)
         if self.config.env_state_feature:
             self._queues["observation.environment_state"] = deque(maxlen=self.config.n_obs_steps)
+        self._image_features_cache = []
+
+    def _encode_queued_images(self) -> Tensor:
+        """Encode the images of the observation queue, reusing the features of the frames that were already
+        encoded at the previous call. Returns a (B, n_obs_steps, num_cameras * feature_dim) tensor.
+        """
+        frames = list(self._queues[OBS_IMAGES])
+        cache = list(self._image_features_cache)
+
+        def lookup(frame: Tensor) -> Tensor | None:
+            return next((feats for cached_frame, feats in cache if cached_frame is frame), None)
+
+        # The queue is initially filled with copies of the first observation, which are encoded once
+        new_frames = []
+        for frame in frames:
+            if lookup(frame) is None and not any(frame is new_frame for new_frame in new_frames):
+                new_frames.append(frame)
+        if new_frames:
+            new_features = self.diffusion.encode_images(torch.stack(new_frames, dim=1))
+            cache += [(frame, new_features[:, i]) for i, frame in enumerate(new_frames)]
+
+        features = [lookup(frame) for frame in frames]
+        self._image_features_cache = list(zip(frames, features, strict=True))
+        return torch.stack(features, dim=1)
 
     @torch.no_grad()
     def predict_action_chunk(self, batch: dict[str, Tensor]) -> Tensor:
         """Predict a chunk of actions given environment observations."""
         # stack n latest observations from the queue
-        batch = {k: torch.stack(list(self._queues[k]), dim=1) for k in batch if k in self._queues}
+        encode_images = self.config.cache_image_features and OBS_IMAGES in batch
+        batch = {
+            k: torch.stack(list(self._queues[k]), dim=1)
+            for k in batch
+            if k in self._queues and not (encode_images and k == OBS_IMAGES)
+        }
+        if encode_images:
+            batch[OBS_IMAGE_FEATURES] = self._encode_queued_images()
         actions = self.diffusion.generate_actions(batch)
 
         # TODO(rcadene): make above methods return output dictionary?
@@ -176,6 +212,125 @@ def _make_noise_scheduler(name: str, **kwargs: dict) -> DDPMScheduler | DDIMSche
         raise ValueError(f"Unsupported noise scheduler type {name}")
 
 
+class DiffusionSampler(nn.Module):
+    """Runs the reverse diffusion process of a DDPM or DDIM noise scheduler with its per-step coefficients
+    precomputed as tensors.
+
+    Each step of the scheduler is affine in the sample and the model output (the predicted original sample
+    being clipped in between), so it reduces to a handful of element-wise ops without any `set_timesteps`,
+    indexing on the host or small tensor allocation in the loop. With `compile=True`, the whole denoising loop
+    is compiled with `torch.compile`, as a CUDA graph on GPUs. The compiled function is specialized to the batch
+    size and horizon of the samples, and recompiled if they change.
+    """
+
+    def __init__(
+        self, noise_scheduler: DDPMScheduler | DDIMScheduler, num_inference_steps: int, compile: bool
+    ):
+        super().__init__()
+        scheduler_config = noise_scheduler.config
+        if scheduler_config.prediction_type not in ["epsilon", "sample"]:
+            raise ValueError(f"Unsupported prediction type {scheduler_config.prediction_type}")
+        if scheduler_config.thresholding:
+            raise ValueError("Dynamic thresholding is not supported by DiffusionSampler")
+
+        noise_scheduler.set_timesteps(num_inference_steps)
+        timesteps = [int(t) for t in noise_scheduler.timesteps]
+        alphas_cumprod = noise_scheduler.alphas_cumprod.double()
+        is_ddim = isinstance(noise_scheduler, DDIMScheduler)
+
+        coefficients = []
+        for i, t in enumerate(timesteps):
+            if is_ddim:
+                prev_t = t - scheduler_config.num_train_timesteps // num_inference_steps
+                alpha_prod_t_prev = (
+                    alphas_cumprod[prev_t] if prev_t >= 0 else noise_scheduler.final_alpha_cumprod.double()
+                )
+            else:
+                prev_t = timesteps[i + 1] if i + 1 < len(timesteps) else -1
+                alpha_prod_t_prev = alphas_cumprod[prev_t] if prev_t >= 0 else torch.tensor(1.0).double()
+            alpha_prod_t = alphas_cumprod[t]
+            beta_prod_t = 1 - alpha_prod_t
+
+            # Predicted original sample: x_0 = x0_sample * sample + x0_output * model_output
+            if scheduler_config.prediction_type == "epsilon":
+                x0_sample, x0_output = 1 / alpha_prod_t.sqrt(), -beta_prod_t.sqrt() / alpha_prod_t.sqrt()
+            else:
+                x0_sample, x0_output = torch.tensor(0.0).double(), torch.tensor(1.0).double()
+
+            # Previous sample: x_t-1 = prev_x0 * clip(x_0) + prev_sample * sample + prev_output * model_output
+            #                          + std * noise
+            if is_ddim:
+                # Deterministic DDIM (eta = 0), along the direction of the predicted noise
+                if scheduler_config.prediction_type == "epsilon":
+                    eps_sample, eps_output = torch.tensor(0.0).double(), torch.tensor(1.0).double()
+                else:
+                    eps_sample, eps_output = 1 / beta_prod_t.sqrt(), -alpha_prod_t.sqrt() / beta_prod_t.sqrt()
+                direction = (1 - alpha_prod_t_prev).sqrt()
+                prev_x0 = alpha_prod_t_prev.sqrt()
+                prev_sample, prev_output = direction * eps_sample, direction * eps_output
+                std = torch.tensor(0.0).double()
+            else:
+                current_alpha_t = alpha_prod_t / alpha_prod_t_prev
+                current_beta_t = 1 - current_alpha_t
+                prev_x0 = alpha_prod_t_prev.sqrt() * current_beta_t / beta_prod_t
+                prev_sample = current_alpha_t.sqrt() * (1 - alpha_prod_t_prev) / beta_prod_t
+                prev_output = torch.tensor(0.0).double()
+                # "fixed_small" variance, only added before the last step
+                variance = ((1 - alpha_prod_t_prev) / beta_prod_t * current_beta_t).clamp(min=1e-20)
+                std = variance.sqrt() if t > 0 else torch.tensor(0.0).double()
+
+            coefficients.append(
+                torch.stack([x0_sample, x0_output, prev_x0, prev_sample, prev_output, std]).float()
+            )
+
+        self.clip_sample_range = scheduler_config.clip_sample_range if scheduler_config.clip_sample else None
+        self.stochastic = not is_ddim
+        self.register_buffer("timesteps", torch.tensor(timesteps, dtype=torch.long), persistent=False)
+        self.register_buffer("coefficients", torch.stack(coefficients), persistent=False)
+
+        self._denoise_fn = self._denoise
+        if compile:
+            self._denoise_fn = torch.compile(
+                self._denoise, mode="reduce-overhead" if torch.cuda.is_available() else None, dynamic=False
+            )
+
+    def _denoise(self, unet: nn.Module, sample: Tensor, global_cond: Tensor | None, noise: Tensor | None):
+        batch_size = sample.shape[0]
+        coefficients = self.coefficients.to(sample.dtype)
+        for i in range(len(self.timesteps)):
+            x0_sample, x0_output, prev_x0, prev_sample, prev_output, std = coefficients[i]
+            model_output = unet(sample, self.timesteps[i].expand(batch_size), global_cond=global_cond)
+            pred_original_sample = x0_sample * sample + x0_output * model_output
+            if self.clip_sample_range is not None:
+                pred_original_sample = pred_original_sample.clamp(
+                    -self.clip_sample_range, self.clip_sample_range
+                )
+            sample = prev_x0 * pred_original_sample + prev_sample * sample + prev_output * model_output
+            if noise is not None:
+                sample = sample + std * noise[i]
+        return sample
+
+    def forward(
+        self,
+        unet: nn.Module,
+        sample: Tensor,
+        global_cond: Tensor | None = None,
+        generator: torch.Generator | None = None,
+    ) -> Tensor:
+        """Denoise `sample`, drawn from the prior, into a sample of the data distribution."""
+        noise = None
+        if self.stochastic:
+            # Noise is drawn ahead of the loop, as random number generation can not be part of a captured graph
+            noise = torch.randn(
+                (len(self.timesteps), *sample.shape),
+                dtype=sample.dtype,
+                device=sample.device,
+                generator=generator,
+            )
+        # Outputs of CUDA graphs are overwritten by the next replay
+        return self._denoise_fn(unet, sample, global_cond, noise).clone()
+
+
 class DiffusionModel(nn.Module):
     def __init__(self, config: DiffusionConfig):
         super().__init__()
@@ -213,6 +368,12 @@ class DiffusionModel(nn.Module):
         else:
             self.num_inference_steps = config.num_inference_steps
 
+        self.sampler = None
+        if config.sampling_mode != "scheduler":
+            self.sampler = DiffusionSampler(
+                self.noise_scheduler, self.num_inference_steps, compile=config.sampling_mode == "compiled"
+            )
+
     # ========= inference  ============
     def conditional_sample(
         self, batch_size: int, global_cond: Tensor | None = None, generator: torch.Generator | None = None
@@ -228,6 +389,9 @@ class DiffusionModel(nn.Module):
             generator=generator,
         )
 
+        if self.sampler is not None:
+            return self.sampler(self.unet, sample, global_cond=global_cond, generator=generator)
+
         self.noise_scheduler.set_timesteps(self.num_inference_steps)
 
         for t in self.noise_scheduler.timesteps:
@@ -242,37 +406,35 @@ class DiffusionModel(nn.Module):
 
         return sample
 
+    def encode_images(self, images: Tensor) -> Tensor:
+        """Encode (B, S, num_cameras, C, H, W) images to (B, S, num_cameras * feature_dim) features."""
+        batch_size, n_obs_steps = images.shape[:2]
+        if self.config.use_separate_rgb_encoder_per_camera:
+            # Combine batch and sequence dims while rearranging to make the camera index dimension first.
+            images_per_camera = einops.rearrange(images, "b s n ... -> n (b s) ...")
+            img_features_list = torch.cat(
+                [encoder(images) for encoder, images in zip(self.rgb_encoder, images_per_camera, strict=True)]
+            )
+            # Separate batch and sequence dims back out. The camera index dim gets absorbed into the
+            # feature dim (effectively concatenating the camera features).
+            return einops.rearrange(
+                img_features_list, "(n b s) ... -> b s (n ...)", b=batch_size, s=n_obs_steps
+            )
+
+        # Combine batch, sequence, and "which camera" dims before passing to shared encoder.
+        img_features = self.rgb_encoder(einops.rearrange(images, "b s n ... -> (b s n) ..."))
+        # Separate batch dim and sequence dim back out. The camera index dim gets absorbed into the
+        # feature dim (effectively concatenating the camera features).
+        return einops.rearrange(img_features, "(b s n) ... -> b s (n ...)", b=batch_size, s=n_obs_steps)
+
     def _prepare_global_conditioning(self, batch: dict[str, Tensor]) -> Tensor:
         """Encode image features and concatenate them all together along with the state vector."""
-        batch_size, n_obs_steps = batch[OBS_STATE].shape[:2]
         global_cond_feats = [batch[OBS_STATE]]
-        # Extract image features.
-        if self.config.image_features:
-            if self.config.use_separate_rgb_encoder_per_camera:
-                # Combine batch and sequence dims while rearranging to make the camera index dimension first.
-                images_per_camera = einops.rearrange(batch["observation.images"], "b s n ... -> n (b s) ...")
-                img_features_list = torch.cat(
-                    [
-                        encoder(images)
-                        for encoder, images in zip(self.rgb_encoder, images_per_camera, strict=True)
-                    ]
-                )
-                # Separate batch and sequence dims back out. The camera index dim gets absorbed into the
-                # feature dim (effectively concatenating the camera features).
-                img_features = einops.rearrange(
-                    img_features_list, "(n b s) ... -> b s (n ...)", b=batch_size, s=n_obs_steps
-                )
-            else:
-                # Combine batch, sequence, and "which camera" dims before passing to shared encoder.
-                img_features = self.rgb_encoder(
-                    einops.rearrange(batch["observation.images"], "b s n ... -> (b s n) ...")
-                )
-                # Separate batch dim and sequence dim back out. The camera index dim gets absorbed into the
-                # feature dim (effectively concatenating the camera features).
-                img_features = einops.rearrange(
-                    img_features, "(b s n) ... -> b s (n ...)", b=batch_size, s=n_obs_steps
-                )
-            global_cond_feats.append(img_features)
+        # Extract image features, unless they were computed ahead.
+        if OBS_IMAGE_FEATURES in batch:
+            global_cond_feats.append(batch[OBS_IMAGE_FEATURES])
+        elif self.config.image_features:
+            global_cond_feats.append(self.encode_images(batch["observation.images"]))
 
         if self.config.env_state_feature:
             global_cond_feats.append(batch[OBS_ENV_STATE])
@@ -287,6 +449,8 @@ class DiffusionModel(nn.Module):
             "observation.state": (B, n_obs_steps, state_dim)
 
             "observation.images": (B, n_obs_steps, num_cameras, C, H, W)
+                OR
+            "observation.image_features": (B, n_obs_steps, num_cameras * feature_dim)
                 AND/OR
             "observation.environment_state": (B, n_obs_steps, environment_dim)
         }
@@ -65,6 +65,13 @@ class PI0Config(PreTrainedConfig):
 
     # Decoding
     num_steps: int = 10
+    # When set, fewer integration steps are taken at runtime so that sampling fits in this budget, based on the
+    # cost of a step measured on the current device. It is never reduced below `min_num_steps`.
+    latency_budget_ms: float | None = None
+    min_num_steps: int = 1
+    # When set, integration stops once the RMS update of the velocity between two steps falls below this
+    # threshold, and the last velocity is followed to the end of the path.
+    early_stop_threshold: float | None = None
 
     # Attention utils
     use_cache: bool = True
@@ -102,6 +109,16 @@ class PI0Config(PreTrainedConfig):
                 f"Multiple observation steps not handled yet. Got `nobs_steps={self.n_obs_steps}`"
             )
 
+        if not 1 <= self.min_num_steps <= self.num_steps:
+            raise ValueError(
+                f"`min_num_steps` must be between 1 and `num_steps`. Got {self.min_num_steps} for `min_num_steps` "
+                f"and {self.num_steps} for `num_steps`."
+            )
+        if self.latency_budget_ms is not None and self.latency_budget_ms <= 0:
+            raise ValueError(f"`latency_budget_ms` must be positive. Got {self.latency_budget_ms}.")
+        if self.early_stop_threshold is not None and self.early_stop_threshold < 0:
+            raise ValueError(f"`early_stop_threshold` must be non-negative. Got {self.early_stop_threshold}.")
+
         if self.use_delta_joint_actions_aloha:
             raise NotImplementedError(
                 "`use_delta_joint_actions_aloha` is used by pi0 for aloha real models. It is not ported yet in LeRobot."
@@ -51,6 +51,7 @@ policy = Pi0Policy.from_pretrained("lerobot/pi0")
 """
 
 import math
+import time
 from collections import deque
 
 import torch
@@ -66,7 +67,12 @@ from lerobot.policies.pi0.paligemma_with_expert import (
     PaliGemmaWithExpertModel,
 )
 from lerobot.policies.pretrained import PreTrainedPolicy
-from lerobot.policies.utils import log_model_loading_keys
+from lerobot.policies.utils import (
+    DenoisingStepProfile,
+    TokenizedPromptCache,
+    log_model_loading_keys,
+    sample_flow_adaptive,
+)
 from lerobot.utils.utils import get_safe_dtype, init_logging
 
 
@@ -245,6 +251,7 @@ class PI0Policy(PreTrainedPolicy):
         )
 
         self.language_tokenizer = AutoTokenizer.from_pretrained("google/paligemma-3b-pt-224")
+        self._prompt_cache = TokenizedPromptCache()
         self.model = PI0FlowMatching(config)
 
         self.reset()
@@ -252,6 +259,7 @@ class PI0Policy(PreTrainedPolicy):
     def reset(self):
         """This should be called whenever the environment is reset."""
         self._action_queue = deque([], maxlen=self.config.n_action_steps)
+        self._prompt_cache.clear()
 
     @classmethod
     def _transform_state_dict_keys(cls, state_dict: dict) -> dict:
@@ -490,17 +498,14 @@ class PI0Policy(PreTrainedPolicy):
         # PaliGemma prompt has to end with a new line
         tasks = [task if task.endswith("\n") else f"{task}\n" for task in tasks]
 
-        tokenized_prompt = self.language_tokenizer.__call__(
+        # The instruction is usually the same at every step of an episode: tokens are cached
+        return self._prompt_cache.get(
+            self.language_tokenizer,
             tasks,
+            device,
             padding="max_length",
-            padding_side="right",
             max_length=self.config.tokenizer_max_length,
-            return_tensors="pt",
         )
-        lang_tokens = tokenized_prompt["input_ids"].to(device=device)
-        lang_masks = tokenized_prompt["attention_mask"].to(device=device, dtype=torch.bool)
-
-        return lang_tokens, lang_masks
 
     def _pi_aloha_decode_state(self, state):
         # Flip the joints.
@@ -586,6 +591,11 @@ class PI0FlowMatching(nn.Module):
         self.action_time_mlp_in = nn.Linear(self.config.proj_width * 2, self.config.proj_width)
         self.action_time_mlp_out = nn.Linear(self.config.proj_width, self.config.proj_width)
 
+        # Prefix key/value cache, whose buffers are reused by the successive calls to `sample_actions`
+        self._kv_cache = {}
+        # Measured cost of a denoising step, to fit `sample_actions` in `config.latency_budget_ms`
+        self._step_profile = DenoisingStepProfile()
+
         self.set_requires_grad()
 
     def set_requires_grad(self):
@@ -756,6 +766,7 @@ class PI0FlowMatching(nn.Module):
 
     def sample_actions(self, images, img_masks, lang_tokens, lang_masks, state, noise=None) -> Tensor:
         """Do a full inference forward and compute the action (batch_size x num_steps x num_motors)"""
+        start_time = time.perf_counter()
         bsize = state.shape[0]
         device = state.device
 
@@ -773,19 +784,36 @@ class PI0FlowMatching(nn.Module):
         _, past_key_values = self.paligemma_with_expert.forward(
             attention_mask=prefix_att_2d_masks,
             position_ids=prefix_position_ids,
-            past_key_values=None,
+            past_key_values=self._kv_cache if self.config.use_cache else None,
             inputs_embeds=[prefix_embs, None],
             use_cache=self.config.use_cache,
             fill_kv_cache=True,
         )
 
+        if self.config.latency_budget_ms is not None or self.config.early_stop_threshold is not None:
+            x_t, _ = sample_flow_adaptive(
+                lambda x_t, timestep: self.denoise_step(
+                    state, prefix_pad_masks, past_key_values, x_t, timestep
+                ),
+                noise,
+                num_steps=self.config.num_steps,
+                profile=self._step_profile,
+                start_time=start_time,
+                latency_budget=(
+                    None if self.config.latency_budget_ms is None else self.config.latency_budget_ms / 1000
+                ),
+                min_num_steps=self.config.min_num_steps,
+                early_stop_threshold=self.config.early_stop_threshold,
+            )
+            return x_t
+
         dt = -1.0 / self.config.num_steps
         dt = torch.tensor(dt, dtype=torch.float32, device=device)
 
         x_t = noise
-        time = torch.tensor(1.0, dtype=torch.float32, device=device)
-        while time >= -dt / 2:
-            expanded_time = time.expand(bsize)
+        t = torch.tensor(1.0, dtype=torch.float32, device=device)
+        while t >= -dt / 2:
+            expanded_time = t.expand(bsize)
             v_t = self.denoise_step(
                 state,
                 prefix_pad_masks,
@@ -796,7 +824,7 @@ class PI0FlowMatching(nn.Module):
 
             # Euler step
             x_t += dt * v_t
-            time += dt
+            t += dt
         return x_t
 
     def denoise_step(
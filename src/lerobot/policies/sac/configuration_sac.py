@@ -53,6 +53,29 @@ class ActorLearnerConfig:
     learner_port: int = 50051
     policy_parameters_push_frequency: int = 4
     queue_get_timeout: float = 2
+    # Send the transitions collected by the actor every `transitions_flush_steps` steps and/or every
+    # `transitions_flush_interval_s` seconds, instead of only at the end of the episode (None disables each).
+    transitions_flush_steps: int | None = None
+    transitions_flush_interval_s: float | None = None
+    # Maximum number of transition blocks waiting to be sent to the learner (0 means unbounded). When it is
+    # reached, flushes are postponed and transitions keep accumulating on the actor until the next one.
+    transitions_queue_maxsize: int = 0
+    # Only send the parameters that changed since the last full snapshot, which is sent every
+    # `parameters_snapshot_frequency` pushes.
+    parameters_delta_compression: bool = False
+    parameters_snapshot_frequency: int = 10
+    # Precision of the floating point parameters sent to the actor ("float16", "bfloat16" or None to keep it)
+    parameters_dtype: str | None = None
+
+    def __post_init__(self):
+        if self.parameters_dtype not in (None, "float16", "bfloat16"):
+            raise ValueError(
+                f"parameters_dtype must be None, 'float16' or 'bfloat16', got '{self.parameters_dtype}'."
+            )
+
+    @property
+    def use_parameters_encoder(self) -> bool:
+        return self.parameters_delta_compression or self.parameters_dtype is not None
 
 
 @dataclass
@@ -147,6 +170,9 @@ class SACConfig(PreTrainedConfig):
     offline_buffer_capacity: int = 100000
     # Whether to use asynchronous prefetching for the buffers
     async_prefetch: bool = False
+    # Number of processes sampling batches from the buffers, which are then stored in shared memory.
+    # Set to 0 to sample in the learner process (in a thread if `async_prefetch` is set).
+    num_sampler_workers: int = 0
     # Number of steps before learning starts
     online_step_before_learning: int = 100
     # Frequency of policy updates
@@ -55,6 +55,7 @@ policy = SmolVLAPolicy.from_pretrained("lerobot/smolvla_base")
 import math
 import os
 import re
+import time
 from collections import deque
 
 import safetensors
@@ -72,7 +73,10 @@ from lerobot.policies.pretrained import PreTrainedPolicy
 from lerobot.policies.smolvla.configuration_smolvla import SmolVLAConfig
 from lerobot.policies.smolvla.smolvlm_with_expert import SmolVLMWithExpertModel
 from lerobot.policies.utils import (
+    DenoisingStepProfile,
+    TokenizedPromptCache,
     populate_queues,
+    sample_flow_adaptive,
 )
 from lerobot.utils.utils import get_safe_dtype
 
@@ -348,6 +352,7 @@ class SmolVLAPolicy(PreTrainedPolicy):
         )
 
         self.language_tokenizer = AutoProcessor.from_pretrained(self.config.vlm_model_name).tokenizer
+        self._prompt_cache = TokenizedPromptCache()
         self.model = VLAFlowMatching(config)
         self.reset()
 
@@ -356,6 +361,7 @@ class SmolVLAPolicy(PreTrainedPolicy):
         self._queues = {
             ACTION: deque(maxlen=self.config.n_action_steps),
         }
+        self._prompt_cache.clear()
 
     # HACK(aliberts, danaaubakirova): we overwrite this classmethod here to fix smolVLA-specific issues
     @classmethod
@@ -530,17 +536,14 @@ class SmolVLAPolicy(PreTrainedPolicy):
 
         tasks = [task if task.endswith("\n") else f"{task}\n" for task in tasks]
 
-        tokenized_prompt = self.language_tokenizer.__call__(
+        # The instruction is usually the same at every step of an episode: tokens are cached
+        return self._prompt_cache.get(
+            self.language_tokenizer,
             tasks,
+            device,
             padding=self.config.pad_language_to,
-            padding_side="right",
             max_length=self.config.tokenizer_max_length,
-            return_tensors="pt",
         )
-        lang_tokens = tokenized_prompt["input_ids"].to(device=device)
-        lang_masks = tokenized_prompt["attention_mask"].to(device=device, dtype=torch.bool)
-
-        return lang_tokens, lang_masks
 
     def _pi_aloha_decode_state(self, state):
         # Flip the joints.
@@ -668,6 +671,10 @@ class VLAFlowMatching(nn.Module):
         self.add_image_special_tokens = self.config.add_image_special_tokens
         self.image_end_token = torch.tensor([self.fake_image_token], dtype=torch.long)
         self.prefix_length = self.config.prefix_length
+        # Prefix key/value cache, whose buffers are reused by the successive calls to `sample_actions`
+        self._kv_cache = {}
+        # Measured cost of a denoising step, to fit `sample_actions` in `config.latency_budget_ms`
+        self._step_profile = DenoisingStepProfile()
 
     def set_requires_grad(self):
         for params in self.state_proj.parameters():
@@ -866,6 +873,7 @@ class VLAFlowMatching(nn.Module):
 
     def sample_actions(self, images, img_masks, lang_tokens, lang_masks, state, noise=None) -> Tensor:
         """Do a full inference forward and compute the action (batch_size x num_steps x num_motors)"""
+        start_time = time.perf_counter()
         bsize = state.shape[0]
         device = state.device
 
@@ -882,18 +890,33 @@ class VLAFlowMatching(nn.Module):
         _, past_key_values = self.vlm_with_expert.forward(
             attention_mask=prefix_att_2d_masks,
             position_ids=prefix_position_ids,
-            past_key_values=None,
+            past_key_values=self._kv_cache if self.config.use_cache else None,
             inputs_embeds=[prefix_embs, None],
             use_cache=self.config.use_cache,
             fill_kv_cache=True,
         )
+        if self.config.latency_budget_ms is not None or self.config.early_stop_threshold is not None:
+            x_t, _ = sample_flow_adaptive(
+                lambda x_t, timestep: self.denoise_step(prefix_pad_masks, past_key_values, x_t, timestep),
+                noise,
+                num_steps=self.config.num_steps,
+                profile=self._step_profile,
+                start_time=start_time,
+                latency_budget=(
+                    None if self.config.latency_budget_ms is None else self.config.latency_budget_ms / 1000
+                ),
+                min_num_steps=self.config.min_num_steps,
+                early_stop_threshold=self.config.early_stop_threshold,
+            )
+            return x_t
+
         dt = -1.0 / self.config.num_steps
         dt = torch.tensor(dt, dtype=torch.float32, device=device)
 
         x_t = noise
-        time = torch.tensor(1.0, dtype=torch.float32, device=device)
-        while time >= -dt / 2:
-            expanded_time = time.expand(bsize)
+        t = torch.tensor(1.0, dtype=torch.float32, device=device)
+        while t >= -dt / 2:
+            expanded_time = t.expand(bsize)
             v_t = self.denoise_step(
                 prefix_pad_masks,
                 past_key_values,
@@ -902,7 +925,7 @@ class VLAFlowMatching(nn.Module):
             )
             # Euler step
             x_t += dt * v_t
-            time += dt
+            t += dt
         return x_t
 
     def denoise_step(
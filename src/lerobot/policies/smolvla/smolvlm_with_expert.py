@@ -24,6 +24,8 @@ from transformers import (
     SmolVLMForConditionalGeneration,
 )
 
+from lerobot.policies.utils import extend_kv_cache, fill_prefix_kv_cache
+
 
 def apply_rope(x, positions, max_wavelength=10_000):
     """
@@ -252,17 +254,11 @@ class SmolVLMWithExpertModel(nn.Module):
 
         if use_cache:
             if fill_kv_cache:
-                past_key_values[layer_idx] = {
-                    "key_states": key_states,
-                    "value_states": value_states,
-                }
+                fill_prefix_kv_cache(past_key_values, layer_idx, key_states, value_states)
             else:
-                # TODO here, some optimization can be done - similar to a `StaticCache` we can declare the `max_len` before.
-                # so we create an empty cache, with just one cuda malloc, and if (in autoregressive case) we reach
-                # the max len, then we (for instance) double the cache size. This implementation already exists
-                # in `transformers`. (molbap)
-                key_states = torch.cat([past_key_values[layer_idx]["key_states"], key_states], dim=1)
-                value_states = torch.cat([past_key_values[layer_idx]["value_states"], value_states], dim=1)
+                key_states, value_states = extend_kv_cache(
+                    past_key_values, layer_idx, key_states, value_states
+                )
 
         attention_interface = self.get_attention_interface()
 
@@ -15,7 +15,10 @@
 # limitations under the License.
 
 import logging
-from collections import deque
+import math
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable
 
 import torch
 from torch import nn
@@ -85,3 +88,197 @@ def log_model_loading_keys(missing_keys: list[str], unexpected_keys: list[str])
         logging.warning(f"Missing key(s) when loading model: {missing_keys}")
     if unexpected_keys:
         logging.warning(f"Unexpected key(s) when loading model: {unexpected_keys}")
+
+
+def fill_prefix_kv_cache(
+    past_key_values: dict, layer_idx: int, key_states: torch.Tensor, value_states: torch.Tensor
+):
+    """Cache the keys and values of the prefix at `layer_idx`, keeping the buffers allocated by `extend_kv_cache`
+    at previous calls."""
+    cache = past_key_values.setdefault(layer_idx, {})
+    cache["key_states"] = key_states
+    cache["value_states"] = value_states
+    cache["prefix_in_buffers"] = False
+
+
+def extend_kv_cache(
+    past_key_values: dict, layer_idx: int, key_states: torch.Tensor, value_states: torch.Tensor
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """Return the cached keys and values of the prefix at `layer_idx`, followed by `key_states` and `value_states`.
+
+    They are written in (batch_size, prefix_len + suffix_len, num_heads, head_dim) buffers, allocated once and
+    reused by the following calls with the same shapes, instead of being concatenated at every denoising step.
+    The prefix is copied to the buffers once per `fill_prefix_kv_cache`. The returned tensors are overwritten by the
+    next call.
+    """
+    cache = past_key_values[layer_idx]
+    prefix_key_states, prefix_value_states = cache["key_states"], cache["value_states"]
+    prefix_len = prefix_key_states.shape[1]
+    shape = (key_states.shape[0], prefix_len + key_states.shape[1], *key_states.shape[2:])
+
+    key_buffer = cache.get("key_buffer")
+    if (
+        key_buffer is None
+        or key_buffer.shape != shape
+        or key_buffer.dtype != key_states.dtype
+        or key_buffer.device != key_states.device
+    ):
+        cache["key_buffer"] = key_states.new_empty(shape)
+        cache["value_buffer"] = value_states.new_empty(shape)
+        cache["prefix_in_buffers"] = False
+
+    key_buffer, value_buffer = cache["key_buffer"], cache["value_buffer"]
+    if not cache["prefix_in_buffers"]:
+        key_buffer[:, :prefix_len].copy_(prefix_key_states)
+        value_buffer[:, :prefix_len].copy_(prefix_value_states)
+        cache["prefix_in_buffers"] = True
+
+    key_buffer[:, prefix_len:].copy_(key_states)
+    value_buffer[:, prefix_len:].copy_(value_states)
+    return key_buffer, value_buffer
+
+
+class DenoisingStepProfile:
+    """Moving average of the measured duration of a denoising step, per device and batch size.
+
+    It is used to predict how many integration steps fit in a latency budget. The device key includes the name
+    of CUDA devices, so that a profile is not reused across heterogeneous GPUs.
+    """
+
+    def __init__(self, momentum: float = 0.2):
+        self.momentum = momentum
+        self._costs: dict[tuple[str, int], float] = {}
+
+    def __len__(self) -> int:
+        return len(self._costs)
+
+    @staticmethod
+    def _key(device: torch.device, batch_size: int) -> tuple[str, int]:
+        name = torch.cuda.get_device_name(device) if device.type == "cuda" else device.type
+        return f"{device}:{name}", batch_size
+
+    def get(self, device: torch.device, batch_size: int) -> float | None:
+        """Return the expected duration of a step in seconds, or None if it was never measured."""
+        return self._costs.get(self._key(device, batch_size))
+
+    def update(self, device: torch.device, batch_size: int, duration: float) -> None:
+        key = self._key(device, batch_size)
+        cost = self._costs.get(key)
+        self._costs[key] = duration if cost is None else cost + self.momentum * (duration - cost)
+
+    def clear(self) -> None:
+        self._costs.clear()
+
+
+def sample_flow_adaptive(
+    denoise_fn: Callable[[torch.Tensor, torch.Tensor], torch.Tensor],
+    noise: torch.Tensor,
+    num_steps: int,
+    profile: DenoisingStepProfile,
+    start_time: float,
+    latency_budget: float | None = None,
+    min_num_steps: int = 1,
+    early_stop_threshold: float | None = None,
+) -> tuple[torch.Tensor, int]:
+    """Integrate a flow matching velocity field from the noise (time 1) to the actions (time 0) with Euler steps,
+    adapting the number of steps at runtime.
+
+    Args:
+        denoise_fn: Maps the current sample `x_t` and the (batch_size,) time to the velocity at `x_t`.
+        noise: The sample at time 1.
+        num_steps: The maximum number of steps, evenly spaced when neither a budget nor a threshold is given.
+        profile: Per-device cost of a step, used to plan the steps and updated with the measured ones.
+        start_time: `time.perf_counter()` at the start of the inference call, from which the budget is counted.
+        latency_budget: When given, the remaining time is split in as many steps as the remaining budget allows,
+            given the cost of a step. Once it is exhausted, the last velocity is followed to time 0. Measuring
+            the steps synchronizes CUDA devices.
+        min_num_steps: Lower bound on the number of steps, taken even if the budget is exceeded.
+        early_stop_threshold: When given, the last velocity is followed to time 0 as soon as the RMS of its
+            update from the previous step falls below this threshold, i.e. the remaining path is straight.
+
+    Returns:
+        The sample at time 0 and the number of steps taken.
+    """
+    device = noise.device
+    batch_size = noise.shape[0]
+    deadline = None if latency_budget is None else start_time + latency_budget
+
+    def steps_within_budget(now: float) -> int:
+        step_cost = profile.get(device, batch_size)
+        if deadline is None or step_cost is None:
+            return num_steps
+        return max(0, math.floor((deadline - now) / max(step_cost, 1e-9)))
+
+    remaining_steps = max(1, min(num_steps, steps_within_budget(time.perf_counter())))
+    num_steps_taken = 0
+    x_t = noise
+    t = 1.0
+    v_prev = None
+    while remaining_steps > 0:
+        step_start = time.perf_counter()
+        v_t = denoise_fn(x_t, torch.full((batch_size,), t, dtype=torch.float32, device=device))
+        num_steps_taken += 1
+
+        # Plan the following steps, knowing the velocity at `t`
+        remaining_steps -= 1
+        if deadline is not None:
+            if device.type == "cuda":
+                torch.cuda.synchronize(device)
+            now = time.perf_counter()
+            profile.update(device, batch_size, now - step_start)
+            remaining_steps = min(remaining_steps, steps_within_budget(now))
+        if early_stop_threshold is not None and v_prev is not None:
+            update_rms = torch.sqrt(torch.mean((v_t - v_prev).float() ** 2))
+            if update_rms.item() < early_stop_threshold:
+                remaining_steps = 0
+        remaining_steps = max(remaining_steps, min_num_steps - num_steps_taken)
+
+        # Euler step, to time 0 when no step remains
+        dt = -t / (remaining_steps + 1)
+        x_t = x_t + dt * v_t
+        t += dt
+        v_prev = v_t
+
+    return x_t, num_steps_taken
+
+
+class TokenizedPromptCache:
+    """Bounded LRU cache of tokenized prompts, already moved to their device.
+
+    The instruction of a policy is usually constant over an episode, so that tokenizing it again at every
+    inference call only adds latency. Prompts are cached per batch of tasks, along with the tokenizer settings.
+    """
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max_size
+        self._cache: OrderedDict[tuple, tuple[torch.Tensor, torch.Tensor]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get(
+        self, tokenizer, tasks: list[str], device: torch.device, padding: str, max_length: int
+    ) -> tuple[torch.Tensor, torch.Tensor]:
+        """Return the (token ids, boolean attention mask) of `tasks`, tokenizing them on a cache miss."""
+        key = (tuple(tasks), padding, max_length, str(device))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        tokenized_prompt = tokenizer.__call__(
+            tasks,
+            padding=padding,
+            padding_side="right",
+            max_length=max_length,
+            return_tensors="pt",
+        )
+        lang_tokens = tokenized_prompt["input_ids"].to(device=device)
+        lang_masks = tokenized_prompt["attention_mask"].to(device=device, dtype=torch.bool)
+
+        self._cache[key] = (lang_tokens, lang_masks)
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return lang_tokens, lang_masks
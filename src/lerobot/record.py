@@ -149,6 +149,15 @@ class DatasetRecordConfig:
     # Number of episodes to record before batch encoding videos
     # Set to 1 for immediate encoding (default behavior), or higher for batched encoding
     video_encoding_batch_size: int = 1
+    # Number of videos (one per episode and camera) encoded in parallel, each in its own process, when the videos
+    # of an episode or of a batch of episodes are encoded in the main process
+    video_encoding_num_workers: int = 1
+    # Number of background processes encoding videos while recording continues. Set to 0 to encode the videos
+    # of each episode in the main process, which blocks recording until encoding is done.
+    num_video_encoder_workers: int = 0
+    # Encode the camera frames while recording instead of writing them as PNG images first. Faster and lighter
+    # on disk, but the frames of an episode interrupted by a crash can't be recovered.
+    streaming_encoding: bool = False
 
     def __post_init__(self):
         if self.single_task is None:
@@ -303,6 +312,7 @@ def record(cfg: RecordConfig) -> LeRobotDataset:
             cfg.dataset.repo_id,
             root=cfg.dataset.root,
             batch_encoding_size=cfg.dataset.video_encoding_batch_size,
+            video_encoding_num_workers=cfg.dataset.video_encoding_num_workers,
         )
 
         if hasattr(robot, "cameras") and len(robot.cameras) > 0:
@@ -310,7 +320,13 @@ def record(cfg: RecordConfig) -> LeRobotDataset:
                 num_processes=cfg.dataset.num_image_writer_processes,
                 num_threads=cfg.dataset.num_image_writer_threads_per_camera * len(robot.cameras),
             )
+        if cfg.dataset.streaming_encoding and len(dataset.meta.video_keys) > 0:
+            dataset.start_streaming_encoder()
+        elif cfg.dataset.num_video_encoder_workers and len(dataset.meta.video_keys) > 0:
+            dataset.start_video_encoder(cfg.dataset.num_video_encoder_workers)
         sanity_check_dataset_robot_compatibility(dataset, robot, cfg.dataset.fps, dataset_features)
+        # Encode the episodes left unencoded by a previous recording session that was interrupted
+        dataset.encode_missing_videos()
     else:
         # Create empty dataset or load existing saved episodes
         sanity_check_dataset_name(cfg.dataset.repo_id, cfg.policy)
@@ -324,6 +340,9 @@ def record(cfg: RecordConfig) -> LeRobotDataset:
             image_writer_processes=cfg.dataset.num_image_writer_processes,
             image_writer_threads=cfg.dataset.num_image_writer_threads_per_camera * len(robot.cameras),
             batch_encoding_size=cfg.dataset.video_encoding_batch_size,
+            video_encoding_num_workers=cfg.dataset.video_encoding_num_workers,
+            video_encoder_workers=cfg.dataset.num_video_encoder_workers,
+            streaming_encoding=cfg.dataset.streaming_encoding,
         )
 
     # Load pretrained policy
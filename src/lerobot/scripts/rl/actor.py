@@ -50,7 +50,7 @@ import logging
 import os
 import time
 from functools import lru_cache
-from queue import Empty
+from queue import Empty, Full
 
 import grpc
 import torch
@@ -61,27 +61,31 @@ from lerobot.cameras import opencv  # noqa: F401
 from lerobot.configs import parser
 from lerobot.configs.train import TrainRLServerPipelineConfig
 from lerobot.policies.factory import make_policy
+from lerobot.policies.sac.configuration_sac import ActorLearnerConfig
 from lerobot.policies.sac.modeling_sac import SACPolicy
 from lerobot.robots import so100_follower  # noqa: F401
 from lerobot.scripts.rl.gym_manipulator import make_robot_env
 from lerobot.teleoperators import gamepad, so101_leader  # noqa: F401
 from lerobot.transport import services_pb2, services_pb2_grpc
 from lerobot.transport.utils import (
+    StateDictDeltaDecoder,
     bytes_to_state_dict,
     grpc_channel_options,
+    is_parameters_snapshot,
     python_object_to_bytes,
     receive_bytes_in_chunks,
     send_bytes_in_chunks,
-    transitions_to_bytes,
+    transition_batch_to_bytes,
 )
 from lerobot.utils.process import ProcessSignalHandler
-from lerobot.utils.queue import get_last_item_from_queue
+from lerobot.utils.queue import get_last_item_from_queue, get_last_items_from_queue
 from lerobot.utils.random_utils import set_seed
 from lerobot.utils.robot_utils import busy_wait
 from lerobot.utils.transition import (
     Transition,
     move_state_dict_to_device,
     move_transition_to_device,
+    stack_transitions,
 )
 from lerobot.utils.utils import (
     TimerManager,
@@ -137,7 +141,7 @@ def actor_cli(cfg: TrainRLServerPipelineConfig):
     logging.info("[ACTOR] Connection with Learner established")
 
     parameters_queue = Queue()
-    transitions_queue = Queue()
+    transitions_queue = Queue(maxsize=cfg.policy.actor_learner_config.transitions_queue_maxsize)
     interactions_queue = Queue()
 
     concurrency_entity = None
@@ -217,6 +221,7 @@ def act_with_policy(
     Executes policy interaction within the environment.
 
     This function rolls out the policy in the environment, collecting interaction data and pushing it to a queue for streaming to the learner.
+    Transitions are pushed at the end of each episode and, if configured, periodically during the episode.
     Once an episode is completed, updated network parameters received from the learner are retrieved from a queue and loaded into the network.
 
     Args:
@@ -267,6 +272,10 @@ def act_with_policy(
     episode_total_steps = 0
 
     policy_timer = TimerManager("Policy inference", log=False)
+    parameters_decoder = (
+        StateDictDeltaDecoder() if cfg.policy.actor_learner_config.use_parameters_encoder else None
+    )
+    last_transitions_push_time = time.perf_counter()
 
     for interaction_step in range(cfg.policy.online_steps):
         start_time = time.perf_counter()
@@ -314,17 +323,36 @@ def act_with_policy(
         # assign obs to the next obs and continue the rollout
         obs = next_obs
 
+        if not (done or truncated) and should_push_transitions(
+            num_transitions=len(list_transition_to_send_to_learner),
+            last_push_time=last_transitions_push_time,
+            transitions_queue=transitions_queue,
+            cfg=cfg.policy.actor_learner_config,
+        ):
+            if push_transitions_to_transport_queue(
+                transitions=list_transition_to_send_to_learner,
+                transitions_queue=transitions_queue,
+            ):
+                list_transition_to_send_to_learner = []
+                last_transitions_push_time = time.perf_counter()
+
         if done or truncated:
             logging.info(f"[ACTOR] Global step {interaction_step}: Episode reward: {sum_reward_episode}")
 
-            update_policy_parameters(policy=policy, parameters_queue=parameters_queue, device=device)
+            update_policy_parameters(
+                policy=policy,
+                parameters_queue=parameters_queue,
+                device=device,
+                parameters_decoder=parameters_decoder,
+            )
 
-            if len(list_transition_to_send_to_learner) > 0:
-                push_transitions_to_transport_queue(
-                    transitions=list_transition_to_send_to_learner,
-                    transitions_queue=transitions_queue,
-                )
+            # If the queue is full, the transitions of this episode are sent with the next flush
+            if len(list_transition_to_send_to_learner) > 0 and push_transitions_to_transport_queue(
+                transitions=list_transition_to_send_to_learner,
+                transitions_queue=transitions_queue,
+            ):
                 list_transition_to_send_to_learner = []
+            last_transitions_push_time = time.perf_counter()
 
             stats = get_frequency_stats(policy_timer)
             policy_timer.reset()
@@ -611,11 +639,25 @@ def interactions_stream(
 #################################################
 
 
-def update_policy_parameters(policy: SACPolicy, parameters_queue: Queue, device):
-    bytes_state_dict = get_last_item_from_queue(parameters_queue, block=False)
-    if bytes_state_dict is not None:
+def update_policy_parameters(
+    policy: SACPolicy,
+    parameters_queue: Queue,
+    device,
+    parameters_decoder: StateDictDeltaDecoder | None = None,
+):
+    if parameters_decoder is not None:
+        # A delta is only usable along with the snapshot it is relative to, which must not be dropped
+        state_dicts = None
+        for bytes_state_dict in get_last_items_from_queue(
+            parameters_queue, keep=is_parameters_snapshot, block=False
+        ):
+            state_dicts = parameters_decoder.decode(bytes_state_dict)
+    else:
+        bytes_state_dict = get_last_item_from_queue(parameters_queue, block=False)
+        state_dicts = bytes_to_state_dict(bytes_state_dict) if bytes_state_dict is not None else None
+
+    if state_dicts is not None:
         logging.info("[ACTOR] Load new parameters from Learner.")
-        state_dicts = bytes_to_state_dict(bytes_state_dict)
 
         # TODO: check encoder parameter synchronization possible issues:
         # 1. When shared_encoder=True, we're loading stale encoder params from actor's state_dict
@@ -645,24 +687,62 @@ def update_policy_parameters(policy: SACPolicy, parameters_queue: Queue, device)
 #################################################
 
 
-def push_transitions_to_transport_queue(transitions: list, transitions_queue):
-    """Send transitions to learner in smaller chunks to avoid network issues.
+def push_transitions_to_transport_queue(transitions: list, transitions_queue) -> bool:
+    """Send transitions to learner as a single block, with one stacked tensor per key.
+
+    The block is never waited for: if the queue is full, nothing is pushed and the caller keeps the
+    transitions, so that they are sent along with the next flush instead of stalling the control loop.
 
     Args:
         transitions: List of transitions to send
-        message_queue: Queue to send messages to learner
-        chunk_size: Size of each chunk to send
+        transitions_queue: Queue to send messages to learner
+
+    Returns:
+        bool: True if the transitions were pushed, False if the queue was full.
     """
-    transition_to_send_to_learner = []
-    for transition in transitions:
-        tr = move_transition_to_device(transition=transition, device="cpu")
-        for key, value in tr["state"].items():
-            if torch.isnan(value).any():
-                logging.warning(f"Found NaN values in transition {key}")
+    transition_batch = move_transition_to_device(transition=stack_transitions(transitions), device="cpu")
+    for key, value in transition_batch["state"].items():
+        if torch.isnan(value).any():
+            logging.warning(f"Found NaN values in transition {key}")
 
-        transition_to_send_to_learner.append(tr)
+    try:
+        transitions_queue.put_nowait(transition_batch_to_bytes(transition_batch))
+    except Full:
+        logging.debug(f"[ACTOR] Transitions queue is full, postponing {len(transitions)} transitions")
+        return False
+    return True
+
+
+def should_push_transitions(
+    num_transitions: int,
+    last_push_time: float,
+    transitions_queue: Queue,
+    cfg: ActorLearnerConfig,
+) -> bool:
+    """Whether the transitions collected so far in the episode should be sent to the learner right away.
+
+    Args:
+        num_transitions: Number of transitions waiting to be sent.
+        last_push_time: `time.perf_counter()` at the last push.
+        transitions_queue: Queue to send messages to learner. Nothing is pushed while it is full, so that a slow
+            learner connection doesn't pile up small blocks.
+        cfg: Actor-learner configuration, which holds the flush frequencies.
+
+    Returns:
+        bool: True if the transitions should be pushed now.
+    """
+    if num_transitions == 0:
+        return False
+
+    steps_reached = cfg.transitions_flush_steps is not None and num_transitions >= cfg.transitions_flush_steps
+    interval_reached = (
+        cfg.transitions_flush_interval_s is not None
+        and time.perf_counter() - last_push_time >= cfg.transitions_flush_interval_s
+    )
+    if not (steps_reached or interval_reached):
+        return False
 
-    transitions_queue.put(transitions_to_bytes(transition_to_send_to_learner))
+    return not transitions_queue.full()
 
 
 def get_frequency_stats(timer: TimerManager) -> dict[str, float]:
@@ -78,8 +78,9 @@ from lerobot.teleoperators import gamepad, so101_leader  # noqa: F401
 from lerobot.transport import services_pb2_grpc
 from lerobot.transport.utils import (
     MAX_MESSAGE_SIZE,
+    StateDictDeltaEncoder,
     bytes_to_python_object,
-    bytes_to_transitions,
+    bytes_to_transition_batch,
     state_to_bytes,
 )
 from lerobot.utils.buffer import ReplayBuffer, concatenate_batch_transitions
@@ -91,7 +92,12 @@ from lerobot.utils.train_utils import (
     save_checkpoint,
     update_last_checkpoint,
 )
-from lerobot.utils.transition import move_state_dict_to_device, move_transition_to_device
+from lerobot.utils.transition import (
+    find_nan_transitions,
+    index_transitions,
+    move_state_dict_to_device,
+    move_transition_to_device,
+)
 from lerobot.utils.utils import (
     format_big_number,
     get_safe_torch_device,
@@ -301,6 +307,7 @@ def add_actor_information_and_train(
     saving_checkpoint = cfg.save_checkpoint
     online_steps = cfg.policy.online_steps
     async_prefetch = cfg.policy.async_prefetch
+    num_sampler_workers = cfg.policy.num_sampler_workers
 
     # Initialize logging for multiprocessing
     if not use_threads(cfg):
@@ -321,7 +328,10 @@ def add_actor_information_and_train(
 
     policy.train()
 
-    push_actor_policy_to_queue(parameters_queue=parameters_queue, policy=policy)
+    parameters_encoder = make_parameters_encoder(cfg)
+    push_actor_policy_to_queue(
+        parameters_queue=parameters_queue, policy=policy, parameters_encoder=parameters_encoder
+    )
 
     last_time_policy_pushed = time.time()
 
@@ -388,12 +398,18 @@ def add_actor_information_and_train(
 
         if online_iterator is None:
             online_iterator = replay_buffer.get_iterator(
-                batch_size=batch_size, async_prefetch=async_prefetch, queue_size=2
+                batch_size=batch_size,
+                async_prefetch=async_prefetch,
+                queue_size=2,
+                num_workers=num_sampler_workers,
             )
 
         if offline_replay_buffer is not None and offline_iterator is None:
             offline_iterator = offline_replay_buffer.get_iterator(
-                batch_size=batch_size, async_prefetch=async_prefetch, queue_size=2
+                batch_size=batch_size,
+                async_prefetch=async_prefetch,
+                queue_size=2,
+                num_workers=num_sampler_workers,
             )
 
         time_for_one_optimization_step = time.time()
@@ -556,7 +572,9 @@ def add_actor_information_and_train(
 
         # Push policy to actors if needed
         if time.time() - last_time_policy_pushed > policy_parameters_push_frequency:
-            push_actor_policy_to_queue(parameters_queue=parameters_queue, policy=policy)
+            push_actor_policy_to_queue(
+                parameters_queue=parameters_queue, policy=policy, parameters_encoder=parameters_encoder
+            )
             last_time_policy_pushed = time.time()
 
         # Update target networks (main and discrete)
@@ -961,6 +979,7 @@ def initialize_replay_buffer(
             state_keys=cfg.policy.input_features.keys(),
             storage_device=storage_device,
             optimize_memory=True,
+            shared_memory=cfg.policy.num_sampler_workers > 0,
         )
 
     logging.info("Resume training load the online dataset")
@@ -1069,6 +1088,9 @@ def check_nan_in_transition(
     """
     Check for NaN values in transition data.
 
+    The check is done with `find_nan_transitions`, which syncs with the device once for the whole batch.
+    The offending keys are only looked for when NaN values are found.
+
     Args:
         observations: Dictionary of observation tensors
         actions: Action tensor
@@ -1078,35 +1100,45 @@ def check_nan_in_transition(
     Returns:
         bool: True if NaN values were detected, False otherwise
     """
-    nan_detected = False
-
-    # Check observations
-    for key, tensor in observations.items():
+    nan_mask = find_nan_transitions({"state": observations, "action": actions, "next_state": next_state})
+    if not nan_mask.any():
+        return False
+
+    tensors = {
+        **{f"observations[{key}]": tensor for key, tensor in observations.items()},
+        **{f"next_state[{key}]": tensor for key, tensor in next_state.items()},
+        "actions": actions,
+    }
+    for name, tensor in tensors.items():
         if torch.isnan(tensor).any():
-            logging.error(f"observations[{key}] contains NaN values")
-            nan_detected = True
+            logging.error(f"{name} contains NaN values")
             if raise_error:
-                raise ValueError(f"NaN detected in observations[{key}]")
+                raise ValueError(f"NaN detected in {name}")
+
+    return True
 
-    # Check next state
-    for key, tensor in next_state.items():
-        if torch.isnan(tensor).any():
-            logging.error(f"next_state[{key}] contains NaN values")
-            nan_detected = True
-            if raise_error:
-                raise ValueError(f"NaN detected in next_state[{key}]")
 
-    # Check actions
-    if torch.isnan(actions).any():
-        logging.error("actions contains NaN values")
-        nan_detected = True
-        if raise_error:
-            raise ValueError("NaN detected in actions")
+def make_parameters_encoder(cfg: TrainRLServerPipelineConfig) -> StateDictDeltaEncoder | None:
+    """Create the encoder of the parameters pushed to the actor, if delta compression or a lower precision
+    is enabled in the actor-learner configuration."""
+    actor_learner_config = cfg.policy.actor_learner_config
+    if not actor_learner_config.use_parameters_encoder:
+        return None
 
-    return nan_detected
+    dtype = actor_learner_config.parameters_dtype
+    return StateDictDeltaEncoder(
+        snapshot_frequency=(
+            actor_learner_config.parameters_snapshot_frequency
+            if actor_learner_config.parameters_delta_compression
+            else 1
+        ),
+        dtype=getattr(torch, dtype) if dtype is not None else None,
+    )
 
 
-def push_actor_policy_to_queue(parameters_queue: Queue, policy: nn.Module):
+def push_actor_policy_to_queue(
+    parameters_queue: Queue, policy: nn.Module, parameters_encoder: StateDictDeltaEncoder | None = None
+):
     logging.debug("[LEARNER] Pushing actor policy to the queue")
 
     # Create a dictionary to hold all the state dicts
@@ -1119,7 +1151,10 @@ def push_actor_policy_to_queue(parameters_queue: Queue, policy: nn.Module):
         )
         logging.debug("[LEARNER] Including discrete critic in state dict push")
 
-    state_bytes = state_to_bytes(state_dicts)
+    if parameters_encoder is not None:
+        state_bytes = parameters_encoder.encode(state_dicts)
+    else:
+        state_bytes = state_to_bytes(state_dicts)
     parameters_queue.put(state_bytes)
 
 
@@ -1157,28 +1192,23 @@ def process_transitions(
         shutdown_event: Event to signal shutdown
     """
     while not transition_queue.empty() and not shutdown_event.is_set():
-        transition_list = transition_queue.get()
-        transition_list = bytes_to_transitions(buffer=transition_list)
-
-        for transition in transition_list:
-            transition = move_transition_to_device(transition=transition, device=device)
-
-            # Skip transitions with NaN values
-            if check_nan_in_transition(
-                observations=transition["state"],
-                actions=transition["action"],
-                next_state=transition["next_state"],
-            ):
-                logging.warning("[LEARNER] NaN detected in transition, skipping")
-                continue
-
-            replay_buffer.add(**transition)
-
-            # Add to offline buffer if it's an intervention
-            if dataset_repo_id is not None and transition.get("complementary_info", {}).get(
-                "is_intervention"
-            ):
-                offline_replay_buffer.add(**transition)
+        transition_batch = bytes_to_transition_batch(buffer=transition_queue.get())
+        transition_batch = move_transition_to_device(transition=transition_batch, device=device)
+
+        # Skip transitions with NaN values
+        nan_mask = find_nan_transitions(transition_batch)
+        if nan_mask.any():
+            logging.warning(f"[LEARNER] NaN detected in {int(nan_mask.sum())} transitions, skipping")
+            transition_batch = index_transitions(transition_batch, ~nan_mask)
+
+        replay_buffer.add_batch(**transition_batch)
+
+        # Add to offline buffer if it's an intervention
+        complementary_info = transition_batch["complementary_info"] or {}
+        if dataset_repo_id is not None and "is_intervention" in complementary_info:
+            is_intervention = complementary_info["is_intervention"].bool()
+            if is_intervention.any():
+                offline_replay_buffer.add_batch(**index_transitions(transition_batch, is_intervention))
 
 
 def process_interaction_messages(
@@ -20,8 +20,8 @@ import time
 from multiprocessing import Event, Queue
 
 from lerobot.transport import services_pb2, services_pb2_grpc
-from lerobot.transport.utils import receive_bytes_in_chunks, send_bytes_in_chunks
-from lerobot.utils.queue import get_last_item_from_queue
+from lerobot.transport.utils import is_parameters_snapshot, receive_bytes_in_chunks, send_bytes_in_chunks
+from lerobot.utils.queue import get_last_items_from_queue
 
 MAX_WORKERS = 3  # Stream parameters, send transitions and interactions
 SHUTDOWN_TIMEOUT = 10
@@ -49,6 +49,8 @@ class LearnerService(services_pb2_grpc.LearnerServiceServicer):
         self.transition_queue = transition_queue
         self.interaction_message_queue = interaction_message_queue
         self.queue_get_timeout = queue_get_timeout
+        # Most recent parameters snapshot sent, which the deltas that follow it are relative to
+        self._last_snapshot = None
 
     def StreamParameters(self, request, context):  # noqa: N802
         # TODO: authorize the request
@@ -56,6 +58,15 @@ class LearnerService(services_pb2_grpc.LearnerServiceServicer):
 
         last_push_time = 0
 
+        if self._last_snapshot is not None:
+            # Deltas are relative to a snapshot the actor may not have received, e.g. after reconnecting
+            yield from send_bytes_in_chunks(
+                self._last_snapshot,
+                services_pb2.Parameters,
+                log_prefix="[LEARNER] Sending parameters",
+                silent=True,
+            )
+
         while not self.shutdown_event.is_set():
             time_since_last_push = time.time() - last_push_time
             if time_since_last_push < self.seconds_between_pushes:
@@ -65,19 +76,23 @@ class LearnerService(services_pb2_grpc.LearnerServiceServicer):
                 continue
 
             logging.info("[LEARNER] Push parameters to the Actor")
-            buffer = get_last_item_from_queue(
-                self.parameters_queue, block=True, timeout=self.queue_get_timeout
+            # Only the most recent parameters are sent, along with the snapshot they are relative to
+            buffers = get_last_items_from_queue(
+                self.parameters_queue, keep=is_parameters_snapshot, block=True, timeout=self.queue_get_timeout
             )
 
-            if buffer is None:
+            if not buffers:
                 continue
 
-            yield from send_bytes_in_chunks(
-                buffer,
-                services_pb2.Parameters,
-                log_prefix="[LEARNER] Sending parameters",
-                silent=True,
-            )
+            for buffer in buffers:
+                if is_parameters_snapshot(buffer):
+                    self._last_snapshot = buffer
+                yield from send_bytes_in_chunks(
+                    buffer,
+                    services_pb2.Parameters,
+                    log_prefix="[LEARNER] Sending parameters",
+                    silent=True,
+                )
 
             last_push_time = time.time()
             logging.info("[LEARNER] Parameters sent")
@@ -21,7 +21,10 @@ from lerobot.robots.config import RobotConfig
 from lerobot.scripts.server.constants import (
     DEFAULT_FPS,
     DEFAULT_INFERENCE_LATENCY,
+    DEFAULT_MAX_CLIENTS,
     DEFAULT_OBS_QUEUE_TIMEOUT,
+    DEFAULT_SESSION_TIMEOUT,
+    RPC_WORKERS_PER_CLIENT,
 )
 
 # Aggregate function registry for CLI usage
@@ -63,6 +66,35 @@ class PolicyServerConfig:
         default=DEFAULT_OBS_QUEUE_TIMEOUT, metadata={"help": "Timeout for observation queue in seconds"}
     )
 
+    image_similarity_atol: float | None = field(
+        default=None,
+        metadata={
+            "help": "If set, observations are only skipped as similar when their camera thumbnails also differ by "
+            "less than this mean absolute difference (in [0, 1], e.g. 0.02). None only compares robot states"
+        },
+    )
+
+    session_timeout_s: float = field(
+        default=DEFAULT_SESSION_TIMEOUT,
+        metadata={"help": "Sessions of clients that were inactive for this long (in seconds) are evicted"},
+    )
+
+    # Batching configuration, to serve several clients with the same policy
+    max_clients: int = field(
+        default=DEFAULT_MAX_CLIENTS,
+        metadata={
+            "help": "Maximum number of clients served at the same time. The gRPC server runs "
+            f"{RPC_WORKERS_PER_CLIENT} worker threads per client, one of them held by its action stream"
+        },
+    )
+    max_batch_size: int = field(
+        default=1, metadata={"help": "Maximum number of client observations run as one batch (1 disables)"}
+    )
+    max_batch_wait_s: float = field(
+        default=0.005,
+        metadata={"help": "Maximum time to wait for other clients' observations before running a batch"},
+    )
+
     def __post_init__(self):
         """Validate configuration after initialization."""
         if self.port < 1 or self.port > 65535:
@@ -77,6 +109,21 @@ class PolicyServerConfig:
         if self.obs_queue_timeout < 0:
             raise ValueError(f"obs_queue_timeout must be non-negative, got {self.obs_queue_timeout}")
 
+        if self.image_similarity_atol is not None and self.image_similarity_atol < 0:
+            raise ValueError(f"image_similarity_atol must be non-negative, got {self.image_similarity_atol}")
+
+        if self.session_timeout_s <= 0:
+            raise ValueError(f"session_timeout_s must be positive, got {self.session_timeout_s}")
+
+        if self.max_clients < 1:
+            raise ValueError(f"max_clients must be at least 1, got {self.max_clients}")
+
+        if self.max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {self.max_batch_size}")
+
+        if self.max_batch_wait_s < 0:
+            raise ValueError(f"max_batch_wait_s must be non-negative, got {self.max_batch_wait_s}")
+
     @classmethod
     def from_dict(cls, config_dict: dict) -> "PolicyServerConfig":
         """Create a PolicyServerConfig from a dictionary."""
@@ -87,6 +134,11 @@ class PolicyServerConfig:
         """Environment time step, in seconds"""
         return 1 / self.fps
 
+    @property
+    def num_rpc_workers(self) -> int:
+        """Number of worker threads of the gRPC server, enough for `max_clients` clients"""
+        return RPC_WORKERS_PER_CLIENT * self.max_clients
+
     def to_dict(self) -> dict:
         """Convert the configuration to a dictionary."""
         return {
@@ -95,6 +147,11 @@ class PolicyServerConfig:
             "fps": self.fps,
             "environment_dt": self.environment_dt,
             "inference_latency": self.inference_latency,
+            "image_similarity_atol": self.image_similarity_atol,
+            "session_timeout_s": self.session_timeout_s,
+            "max_clients": self.max_clients,
+            "max_batch_size": self.max_batch_size,
+            "max_batch_wait_s": self.max_batch_wait_s,
         }
 
 
@@ -136,6 +193,21 @@ class RobotClientConfig:
         metadata={"help": f"Name of aggregate function to use. Options: {list(AGGREGATE_FUNCTIONS.keys())}"},
     )
 
+    # Observation encoding configuration
+    image_codecs: dict[str, str] = field(
+        default_factory=dict,
+        metadata={"help": "Codec used to compress the frames of each camera ('jpeg' or 'png'), raw if unset"},
+    )
+    jpeg_quality: int = field(default=90, metadata={"help": "Quality of the JPEG compression (0-100)"})
+
+    temporal_ensemble_coeff: float | None = field(
+        default=None,
+        metadata={
+            "help": "If set, overlapping actions are combined with ACT's exponential temporal ensembling, "
+            "weighting the i-th prediction of a timestep by exp(-coeff * i), instead of aggregate_fn_name"
+        },
+    )
+
     # Debug configuration
     debug_visualize_queue_size: bool = field(
         default=False, metadata={"help": "Visualize the action queue size"}
@@ -174,6 +246,13 @@ class RobotClientConfig:
         if self.actions_per_chunk <= 0:
             raise ValueError(f"actions_per_chunk must be positive, got {self.actions_per_chunk}")
 
+        for key, codec in self.image_codecs.items():
+            if codec not in ("jpeg", "png"):
+                raise ValueError(f"image_codecs must be 'jpeg' or 'png', got '{codec}' for '{key}'")
+
+        if self.jpeg_quality < 0 or self.jpeg_quality > 100:
+            raise ValueError(f"jpeg_quality must be between 0 and 100, got {self.jpeg_quality}")
+
         self.aggregate_fn = get_aggregate_function(self.aggregate_fn_name)
 
     @classmethod
@@ -194,4 +273,7 @@ class RobotClientConfig:
             "task": self.task,
             "debug_visualize_queue_size": self.debug_visualize_queue_size,
             "aggregate_fn_name": self.aggregate_fn_name,
+            "temporal_ensemble_coeff": self.temporal_ensemble_coeff,
+            "image_codecs": self.image_codecs,
+            "jpeg_quality": self.jpeg_quality,
         }
@@ -25,5 +25,19 @@ DEFAULT_OBS_QUEUE_TIMEOUT = 2
 # All action chunking policies
 SUPPORTED_POLICIES = ["act", "smolvla", "diffusion", "pi0", "tdmpc", "vqbet"]
 
+# Policies keeping state between inference calls (e.g. queues of past observations): a server can only run them
+# for one client at a time
+STATEFUL_POLICIES = ["smolvla", "diffusion", "pi0", "tdmpc", "vqbet"]
+
+"""Server side: Sessions of clients that were inactive for this long (in seconds) are evicted"""
+DEFAULT_SESSION_TIMEOUT = 30
+
+"""Server side: Maximum number of clients served at the same time"""
+DEFAULT_MAX_CLIENTS = 4
+
+# gRPC worker threads needed by each client: one held by its action stream for the whole session, and two for
+# its concurrent calls (e.g. SendObservations while a GetActions or Ready call is being served)
+RPC_WORKERS_PER_CLIENT = 3
+
 # TODO: Add all other robots
 SUPPORTED_ROBOTS = ["so100_follower", "so101_follower"]
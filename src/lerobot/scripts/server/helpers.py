@@ -14,11 +14,16 @@
 
 import logging
 import logging.handlers
+import math
 import os
+import threading
 import time
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from pathlib import Path
+from queue import Empty
 
+import numpy as np
 import torch
 
 from lerobot.configs.types import PolicyFeature
@@ -42,6 +47,9 @@ LeRobotObservation = dict[str, torch.Tensor]
 # observation, ready for policy inference (image keys resized)
 Observation = dict[str, torch.Tensor]
 
+# Resolution of the camera thumbnails compared to detect changes in the scene
+THUMBNAIL_SIZE = 16
+
 
 def visualize_action_queue_size(action_queue_size: list[int]) -> None:
     import matplotlib.pyplot as plt
@@ -86,26 +94,98 @@ def resize_robot_observation_image(image: torch.tensor, resize_dims: tuple[int,
     return resized.squeeze(0)
 
 
+class ObservationPreprocessor:
+    """Turns raw robot observations into observations ready for policy inference, on the policy device.
+
+    Camera frames are uploaded as uint8 (through pinned staging buffers reused between observations when the
+    device is a GPU and `pin_memory` is set), and the cameras sharing the same resolution are converted to
+    float32 in [0, 1] and resized to the policy resolution as a single batch.
+
+    Pinned buffers are expensive to allocate and only pay off when the preprocessor is reused across many
+    observations: disable `pin_memory` for one-off conversions.
+    """
+
+    def __init__(
+        self,
+        lerobot_features: dict[str, dict],
+        policy_image_features: dict[str, PolicyFeature],
+        device: str | torch.device,
+        pin_memory: bool = True,
+    ):
+        self.lerobot_features = lerobot_features
+        self.policy_image_features = policy_image_features
+        self.device = torch.device(device)
+        self._pin_memory = pin_memory and self.device.type == "cuda"
+        # Staging buffers, along with the events recorded after their last upload
+        self._staging_buffers: dict[tuple, tuple[torch.Tensor, torch.cuda.Event]] = {}
+        # The server can preprocess observations of several clients concurrently
+        self._lock = threading.Lock()
+
+    def _upload_images(self, group_key: tuple, images: list[np.ndarray | torch.Tensor]) -> torch.Tensor:
+        """Stacks (H, W, C) frames of the same shape and uploads them to the device as (N, H, W, C)"""
+        if not self._pin_memory:
+            return torch.stack([torch.as_tensor(image) for image in images]).to(self.device)
+
+        if group_key in self._staging_buffers:
+            buffer, upload_done = self._staging_buffers[group_key]
+            # The previous upload from the buffer must be over before overwriting it
+            upload_done.synchronize()
+        else:
+            first_image = torch.as_tensor(images[0])
+            buffer = torch.empty((len(images), *first_image.shape), dtype=first_image.dtype, pin_memory=True)
+
+        for i, image in enumerate(images):
+            buffer[i].copy_(torch.as_tensor(image))
+        images_device = buffer.to(self.device, non_blocking=True)
+
+        upload_done = torch.cuda.Event()
+        upload_done.record()
+        self._staging_buffers[group_key] = (buffer, upload_done)
+
+        return images_device
+
+    def __call__(self, raw_observation: RawObservation) -> Observation:
+        lerobot_obs = make_lerobot_observation(raw_observation, self.lerobot_features)
+        # state's shape is expected as (B, state_dim)
+        observation = {OBS_STATE: extract_state_from_raw_observation(lerobot_obs).to(self.device)}
+
+        # Groups the cameras by input and policy resolutions, so that each group is resized in one op
+        groups = {}
+        for key in filter(is_image_key, lerobot_obs):
+            resize_dims = tuple(self.policy_image_features[key].shape[1:])
+            image = lerobot_obs[key]
+            groups.setdefault((tuple(image.shape), str(image.dtype), resize_dims), []).append(key)
+
+        with self._lock:
+            for group_key, keys in groups.items():
+                images = self._upload_images(group_key, [lerobot_obs[key] for key in keys])
+                # (N, H, W, C) uint8 -> (N, C, H, W) float32 in [0, 1]
+                images = images.permute(0, 3, 1, 2).type(torch.float32) / 255
+                resize_dims = group_key[-1]
+                if images.shape[-2:] != resize_dims:
+                    images = torch.nn.functional.interpolate(
+                        images, size=resize_dims, mode="bilinear", align_corners=False
+                    )
+                # Policy expects images in shape (B, C, H, W)
+                for i, key in enumerate(keys):
+                    observation[key] = images[i : i + 1].contiguous()
+
+        # VLAs present natural-language instructions in observations
+        if "task" in raw_observation:
+            observation["task"] = raw_observation["task"]
+
+        return observation
+
+
 def raw_observation_to_observation(
     raw_observation: RawObservation,
     lerobot_features: dict[str, dict],
     policy_image_features: dict[str, PolicyFeature],
     device: str,
 ) -> Observation:
-    observation = {}
-
-    observation = prepare_raw_observation(raw_observation, lerobot_features, policy_image_features)
-    for k, v in observation.items():
-        if isinstance(v, torch.Tensor):  # VLAs present natural-language instructions in observations
-            if "image" in k:
-                # Policy expects images in shape (B, C, H, W)
-                observation[k] = prepare_image(v).unsqueeze(0).to(device)
-            else:
-                observation[k] = v.to(device)
-        else:
-            observation[k] = v
-
-    return observation
+    # One-off conversion: pinned staging buffers would be allocated for a single upload
+    preprocessor = ObservationPreprocessor(lerobot_features, policy_image_features, device, pin_memory=False)
+    return preprocessor(raw_observation)
 
 
 def prepare_image(image: torch.Tensor) -> torch.Tensor:
@@ -201,6 +281,13 @@ def get_logger(name: str, log_to_file: bool = True) -> logging.Logger:
     return logging.getLogger(name)
 
 
+def make_thumbnail(image: np.ndarray | torch.Tensor, size: int = THUMBNAIL_SIZE) -> torch.Tensor:
+    """Downsample a (H, W, C) uint8 camera frame to a (size, size) grayscale thumbnail in [0, 1]."""
+    image = torch.as_tensor(image, dtype=torch.float32)
+    gray = image.mean(dim=-1)[None, None]
+    return torch.nn.functional.adaptive_avg_pool2d(gray, size)[0, 0] / 255
+
+
 @dataclass
 class TimedData:
     """A data object with timestamp and timestep information.
@@ -233,10 +320,197 @@ class TimedAction(TimedData):
 class TimedObservation(TimedData):
     observation: RawObservation
     must_go: bool = False
+    # Camera thumbnails used to compare observations, computed on first use
+    _thumbnails: dict[str, torch.Tensor] | None = field(default=None, init=False, repr=False, compare=False)
 
     def get_observation(self):
         return self.observation
 
+    def get_thumbnails(self, size: int = THUMBNAIL_SIZE) -> dict[str, torch.Tensor]:
+        """Grayscale (size, size) thumbnails in [0, 1] of the camera frames of the observation."""
+        if self._thumbnails is None or any(t.shape[-1] != size for t in self._thumbnails.values()):
+            self._thumbnails = {
+                key: make_thumbnail(value, size)
+                for key, value in self.observation.items()
+                if isinstance(value, (np.ndarray, torch.Tensor)) and value.ndim == 3
+            }
+        return self._thumbnails
+
+
+class TimedActionQueue:
+    """Queue of the actions to perform, stored as a tensor indexed by their (consecutive) timesteps.
+
+    Actions are kept in a ring buffer of shape (capacity, action_dim): popping an action only moves the head
+    of the buffer, and merging an incoming action chunk aggregates the whole slice of timesteps it shares with
+    the queue in a single tensor operation.
+
+    Args:
+        temporal_ensemble_coeff: If set, overlapping actions are combined with the exponential temporal
+            ensembling of ACT (https://huggingface.co/papers/2304.13705): the i-th prediction of a timestep is
+            weighted by exp(-temporal_ensemble_coeff * i), so older predictions weigh more for positive
+            coefficients. Otherwise, they are combined with the `aggregate_fn` given to `merge`.
+    """
+
+    def __init__(self, temporal_ensemble_coeff: float | None = None):
+        self.temporal_ensemble_coeff = temporal_ensemble_coeff
+        self._actions = None  # (capacity, action_dim)
+        self._timestamps = None  # (capacity,)
+        # Number of predictions ensembled in each action
+        self._counts = None  # (capacity,)
+        self._head = 0
+        self._size = 0
+        # Timestep of the action at the head of the queue
+        self._first_timestep = 0
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    @property
+    def timesteps(self) -> list[int]:
+        return list(range(self._first_timestep, self._first_timestep + self._size))
+
+    def _indices(self, start: int = 0, stop: int | None = None) -> torch.Tensor:
+        """Buffer indices of the actions at positions [start, stop) from the head of the queue"""
+        stop = self._size if stop is None else stop
+        return (self._head + torch.arange(start, stop)) % len(self._actions)
+
+    def timed_actions(self) -> list[TimedAction]:
+        if self._size == 0:
+            return []
+        indices = self._indices()
+        return [
+            TimedAction(timestamp=timestamp.item(), timestep=timestep, action=action)
+            for timestamp, timestep, action in zip(
+                self._timestamps[indices], self.timesteps, self._actions[indices], strict=True
+            )
+        ]
+
+    def get_nowait(self) -> TimedAction:
+        if self._size == 0:
+            raise Empty
+        timed_action = TimedAction(
+            timestamp=self._timestamps[self._head].item(),
+            timestep=self._first_timestep,
+            action=self._actions[self._head].clone(),
+        )
+        self._head = (self._head + 1) % len(self._actions)
+        self._size -= 1
+        self._first_timestep += 1
+        return timed_action
+
+    def _reserve(self, capacity: int, action: torch.Tensor) -> None:
+        """Make room for `capacity` actions shaped like `action`, keeping the actions of the queue in order"""
+        if (
+            self._actions is not None
+            and capacity <= len(self._actions)
+            and action.shape == self._actions.shape[1:]
+            and action.dtype == self._actions.dtype
+        ):
+            return
+
+        if self._actions is not None:
+            capacity = max(capacity, 2 * len(self._actions))
+        actions = action.new_empty((capacity, *action.shape))
+        timestamps = torch.empty(capacity, dtype=torch.float64)
+        counts = torch.empty(capacity, dtype=torch.int64)
+        if self._size > 0:
+            indices = self._indices()
+            actions[: self._size] = self._actions[indices]
+            timestamps[: self._size] = self._timestamps[indices]
+            counts[: self._size] = self._counts[indices]
+
+        self._actions, self._timestamps, self._counts = actions, timestamps, counts
+        self._head = 0
+
+    def put(self, timed_action: TimedAction) -> None:
+        """Append an action, whose timestep must follow the last one of the queue"""
+        if self._size == 0:
+            self._first_timestep = timed_action.get_timestep()
+        elif timed_action.get_timestep() != self._first_timestep + self._size:
+            raise ValueError(
+                f"Expected action #{self._first_timestep + self._size}, got #{timed_action.get_timestep()}"
+            )
+
+        self._reserve(self._size + 1, timed_action.get_action())
+        index = (self._head + self._size) % len(self._actions)
+        self._actions[index] = timed_action.get_action()
+        self._timestamps[index] = timed_action.get_timestamp()
+        self._counts[index] = 1
+        self._size += 1
+
+    def merge(
+        self,
+        first_timestep: int,
+        actions: torch.Tensor,
+        timestamps: torch.Tensor,
+        latest_action: int,
+        aggregate_fn: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
+    ) -> None:
+        """Replace the queue with an incoming chunk of consecutive actions.
+
+        Incoming actions up to `latest_action` (already performed) are discarded, and the ones sharing a
+        timestep with an action of the queue are combined with it. Actions of the queue that are not part of
+        the incoming chunk are dropped.
+
+        Args:
+            first_timestep: Timestep of the first action of the chunk.
+            actions: (chunk_size, action_dim) actions of the chunk.
+            timestamps: (chunk_size,) timestamps of the actions.
+            latest_action: Timestep of the latest action performed by the robot.
+            aggregate_fn: Elementwise function combining the (n, action_dim) actions of the queue and the
+                incoming ones on their n shared timesteps. Defaults to keeping the incoming actions.
+        """
+        skip = max(0, latest_action + 1 - first_timestep)
+        actions = actions[skip:]
+        timestamps = timestamps[skip:].to(torch.float64)
+        first_timestep += skip
+        counts = torch.ones(len(actions), dtype=torch.int64)
+
+        # Slice of timesteps shared by the queue and the incoming chunk
+        start = max(first_timestep, self._first_timestep)
+        stop = min(first_timestep + len(actions), self._first_timestep + self._size)
+        if stop > start:
+            actions = actions.clone()
+            old_indices = self._indices(start - self._first_timestep, stop - self._first_timestep)
+            old_actions = self._actions[old_indices].to(actions.dtype)
+            new_slice = slice(start - first_timestep, stop - first_timestep)
+
+            if self.temporal_ensemble_coeff is not None:
+                old_counts = self._counts[old_indices]
+                old_weights = self._cumulative_weights(old_counts)
+                new_weights = torch.exp(-self.temporal_ensemble_coeff * old_counts.double())
+                actions[new_slice] = (
+                    (old_actions * old_weights[:, None] + actions[new_slice] * new_weights[:, None])
+                    / (old_weights + new_weights)[:, None]
+                ).to(actions.dtype)
+                counts[new_slice] = old_counts + 1
+            elif aggregate_fn is not None:
+                actions[new_slice] = aggregate_fn(old_actions, actions[new_slice])
+
+        # The merged chunk replaces the whole queue
+        self._head = 0
+        self._size = 0
+        self._first_timestep = first_timestep
+        if len(actions) == 0:
+            return
+        self._reserve(len(actions), actions[0])
+        n = len(actions)
+        self._actions[:n] = actions
+        self._timestamps[:n] = timestamps
+        self._counts[:n] = counts
+        self._size = n
+
+    def _cumulative_weights(self, counts: torch.Tensor) -> torch.Tensor:
+        """Sum of the weights exp(-coeff * i) of the first `counts` predictions of each timestep"""
+        counts = counts.double()
+        if self.temporal_ensemble_coeff == 0:
+            return counts
+        decay = math.exp(-self.temporal_ensemble_coeff)
+        return (1 - decay**counts) / (1 - decay)
+
 
 @dataclass
 class FPSTracker:
@@ -280,15 +554,32 @@ def _compare_observation_states(obs1_state: torch.Tensor, obs2_state: torch.Tens
     return bool(torch.linalg.norm(obs1_state - obs2_state) < atol)
 
 
+def _compare_observation_images(
+    obs1_thumbnails: dict[str, torch.Tensor], obs2_thumbnails: dict[str, torch.Tensor], atol: float
+) -> bool:
+    """Check if the camera thumbnails of two observations are similar, i.e. if the mean absolute difference
+    of every camera is under a tolerance threshold"""
+    if obs1_thumbnails.keys() != obs2_thumbnails.keys():
+        return False
+
+    return all(
+        float((obs1_thumbnails[key] - obs2_thumbnails[key]).abs().mean()) < atol for key in obs1_thumbnails
+    )
+
+
 def observations_similar(
-    obs1: TimedObservation, obs2: TimedObservation, lerobot_features: dict[str, dict], atol: float = 1
+    obs1: TimedObservation,
+    obs2: TimedObservation,
+    lerobot_features: dict[str, dict],
+    atol: float = 1,
+    image_atol: float | None = None,
 ) -> bool:
     """Check if two observations are similar, under a tolerance threshold. Measures distance between
     observations as the difference in joint-space between the two observations.
 
-    NOTE(fracapuano): This is a very simple check, and it is enough for the current use case.
-    An immediate next step is to use (fast) perceptual difference metrics comparing some camera views,
-    to surpass this joint-space similarity check.
+    If `image_atol` is set, the scene must also be still: the mean absolute difference between the low
+    resolution grayscale thumbnails of each camera (in [0, 1]) must be under `image_atol`. Thumbnails are
+    cached on the observations, so that each frame is only downsampled once.
     """
     obs1_state = extract_state_from_raw_observation(
         make_lerobot_observation(obs1.get_observation(), lerobot_features)
@@ -297,4 +588,10 @@ def observations_similar(
         make_lerobot_observation(obs2.get_observation(), lerobot_features)
     )
 
-    return _compare_observation_states(obs1_state, obs2_state, atol=atol)
+    if not _compare_observation_states(obs1_state, obs2_state, atol=atol):
+        return False
+
+    if image_atol is None:
+        return True
+
+    return _compare_observation_images(obs1.get_thumbnails(), obs2.get_thumbnails(), atol=image_atol)
@@ -29,7 +29,7 @@ import pickle  # nosec
 import threading
 import time
 from concurrent import futures
-from dataclasses import asdict
+from dataclasses import asdict, dataclass, field
 from pprint import pformat
 from queue import Empty, Queue
 
@@ -39,17 +39,18 @@ import torch
 
 from lerobot.policies.factory import get_policy_class
 from lerobot.scripts.server.configs import PolicyServerConfig
-from lerobot.scripts.server.constants import SUPPORTED_POLICIES
+from lerobot.scripts.server.constants import STATEFUL_POLICIES, SUPPORTED_POLICIES
 from lerobot.scripts.server.helpers import (
     FPSTracker,
     Observation,
+    ObservationPreprocessor,
     RemotePolicyConfig,
     TimedAction,
     TimedObservation,
     get_logger,
     observations_similar,
-    raw_observation_to_observation,
 )
+from lerobot.scripts.server.serialization import bytes_to_timed_observation, timed_actions_to_bytes
 from lerobot.transport import (
     services_pb2,  # type: ignore
     services_pb2_grpc,  # type: ignore
@@ -57,7 +58,33 @@ from lerobot.transport import (
 from lerobot.transport.utils import receive_bytes_in_chunks
 
 
+@dataclass
+class ClientSession:
+    """State of the server relative to one connected RobotClient."""
+
+    client_id: str
+    fps_tracker: FPSTracker
+    # only running inference on the latest observation received from the client
+    observation_queue: Queue = field(default_factory=lambda: Queue(maxsize=1))
+    predicted_timesteps: set[int] = field(default_factory=set)
+    predicted_timesteps_lock: threading.Lock = field(default_factory=threading.Lock)
+    last_processed_obs: TimedObservation | None = None
+    # Time of the last request of the client, to evict the sessions of clients that went away
+    last_active: float = field(default_factory=time.perf_counter)
+
+
 class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
+    """Runs a policy on the observations streamed by one or more RobotClients.
+
+    All the clients share the same policy. When `config.max_batch_size > 1`, the observations that clients
+    request actions for within `config.max_batch_wait_s` of each other are run through the policy as a single
+    batch, and the resulting action chunks are routed back to each client.
+
+    Policies keeping state between inference calls (see `STATEFUL_POLICIES`) only serve one client at a time,
+    and are reset when a client connects. The session of a client is evicted when its action stream ends, or
+    after `config.session_timeout_s` without requests.
+    """
+
     prefix = "policy_server"
     logger = get_logger(prefix)
 
@@ -65,15 +92,15 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
         self.config = config
         self.shutdown_event = threading.Event()
 
-        # FPS measurement
-        self.fps_tracker = FPSTracker(target_fps=config.fps)
-
-        self.observation_queue = Queue(maxsize=1)
+        self._sessions_lock = threading.Lock()
+        self.sessions: dict[str, ClientSession] = {}
+        # Number of open action streams, each holding a gRPC worker thread. Guarded by `_sessions_lock`
+        self._num_streams = 0
 
-        self._predicted_timesteps_lock = threading.Lock()
-        self._predicted_timesteps = set()
-
-        self.last_processed_obs = None
+        # Observations waiting to be batched, along with the futures their action chunks are returned through
+        self._inference_queue = Queue()
+        self._batching_thread = None
+        self._batching_thread_lock = threading.Lock()
 
         # Attributes will be set by SendPolicyInstructions
         self.device = None
@@ -81,6 +108,9 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
         self.lerobot_features = None
         self.actions_per_chunk = None
         self.policy = None
+        self._loaded_policy_specs = None
+        # Built on the first observation, as it depends on the policy and robot features
+        self._preprocessor = None
 
     @property
     def running(self):
@@ -90,19 +120,73 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
     def policy_image_features(self):
         return self.policy.config.image_features
 
+    @property
+    def is_stateful(self) -> bool:
+        return self.policy_type in STATEFUL_POLICIES
+
+    def get_session(self, client_id: str) -> ClientSession:
+        """Returns the session of `client_id`, creating it if the client is not known yet."""
+        with self._sessions_lock:
+            self._evict_idle_sessions()
+            if client_id not in self.sessions:
+                self.sessions[client_id] = ClientSession(
+                    client_id=client_id, fps_tracker=FPSTracker(target_fps=self.config.fps)
+                )
+            session = self.sessions[client_id]
+            session.last_active = time.perf_counter()
+            return session
+
+    def _evict_idle_sessions(self) -> None:
+        """Evicts the sessions of the clients inactive for more than `session_timeout_s`. Must be called with
+        `_sessions_lock` held."""
+        now = time.perf_counter()
+        for client_id, session in list(self.sessions.items()):
+            if now - session.last_active > self.config.session_timeout_s:
+                self.logger.info(
+                    f"Evicting the session of {client_id}, inactive for {now - session.last_active:.1f}s"
+                )
+                del self.sessions[client_id]
+
+    def evict_session(self, session: ClientSession) -> None:
+        """Evicts `session`, unless its client already started a new one."""
+        with self._sessions_lock:
+            if self.sessions.get(session.client_id) is session:
+                self.logger.info(f"Evicting the session of {session.client_id}")
+                del self.sessions[session.client_id]
+
+    def _check_single_client(self, client_id: str, policy_type: str | None, context) -> None:
+        """Aborts the request of `client_id` if `policy_type` is stateful and already serves another client."""
+        if policy_type not in STATEFUL_POLICIES:
+            return
+
+        with self._sessions_lock:
+            self._evict_idle_sessions()
+            other_clients = [other for other in self.sessions if other != client_id]
+        if other_clients:
+            context.abort(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                f"Policy type {policy_type} keeps state between inference calls and already serves "
+                f"{other_clients}. It can only serve one client at a time.",
+            )
+
     def _reset_server(self) -> None:
-        """Flushes server state when new client connects."""
-        # only running inference on the latest observation received by the server
+        """Flushes server state when the server stops."""
         self.shutdown_event.set()
-        self.observation_queue = Queue(maxsize=1)
 
-        with self._predicted_timesteps_lock:
-            self._predicted_timesteps = set()
+        with self._sessions_lock:
+            self.sessions = {}
 
     def Ready(self, request, context):  # noqa: N802
         client_id = context.peer()
+        self._check_single_client(client_id, self.policy_type, context)
         self.logger.info(f"Client {client_id} connected and ready")
-        self._reset_server()
+        # Flushes the state of a client that reconnects, without affecting the other clients
+        with self._sessions_lock:
+            self.sessions.pop(client_id, None)
+        self.get_session(client_id)
+        if self.policy is not None and self.is_stateful:
+            # The state of the policy (e.g. its queues of past observations) only belongs to this client
+            self.policy.reset()
         self.shutdown_event.clear()
 
         return services_pb2.Empty()
@@ -127,6 +211,8 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
                 f"Supported policies: {SUPPORTED_POLICIES}"
             )
 
+        self._check_single_client(client_id, policy_specs.policy_type, context)
+
         self.logger.info(
             f"Receiving policy instructions from {client_id} | "
             f"Policy type: {policy_specs.policy_type} | "
@@ -135,16 +221,28 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
             f"Device: {policy_specs.device}"
         )
 
+        if self.policy is not None and self._loaded_policy_specs == policy_specs:
+            self.logger.info("Policy already loaded, sharing it with the other clients")
+            return services_pb2.Empty()
+
+        if self.policy is not None:
+            self.logger.warning(
+                f"Client {client_id} replaces the policy shared with the other clients: "
+                f"{self._loaded_policy_specs.pretrained_name_or_path} -> {policy_specs.pretrained_name_or_path}"
+            )
+
         self.device = policy_specs.device
         self.policy_type = policy_specs.policy_type  # act, pi0, etc.
         self.lerobot_features = policy_specs.lerobot_features
         self.actions_per_chunk = policy_specs.actions_per_chunk
+        self._preprocessor = None
 
         policy_class = get_policy_class(self.policy_type)
 
         start = time.perf_counter()
         self.policy = policy_class.from_pretrained(policy_specs.pretrained_name_or_path)
         self.policy.to(self.device)
+        self._loaded_policy_specs = policy_specs
         end = time.perf_counter()
 
         self.logger.info(f"Time taken to put policy on {self.device}: {end - start:.4f} seconds")
@@ -154,6 +252,7 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
     def SendObservations(self, request_iterator, context):  # noqa: N802
         """Receive observations from the robot client"""
         client_id = context.peer()
+        session = self.get_session(client_id)
         self.logger.debug(f"Receiving observations from {client_id}")
 
         receive_time = time.time()  # comparing timestamps so need time.time()
@@ -161,7 +260,7 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
         received_bytes = receive_bytes_in_chunks(
             request_iterator, None, self.shutdown_event, self.logger
         )  # blocking call while looping over request_iterator
-        timed_observation = pickle.loads(received_bytes)  # nosec
+        timed_observation = bytes_to_timed_observation(received_bytes)
         deserialize_time = time.perf_counter() - start_deserialize
 
         self.logger.debug(f"Received observation #{timed_observation.get_timestep()}")
@@ -170,7 +269,7 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
         obs_timestamp = timed_observation.get_timestamp()
 
         # Calculate FPS metrics
-        fps_metrics = self.fps_tracker.calculate_fps_metrics(obs_timestamp)
+        fps_metrics = session.fps_tracker.calculate_fps_metrics(obs_timestamp)
 
         self.logger.info(
             f"Received observation #{obs_timestep} | "
@@ -186,7 +285,8 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
         )
 
         if not self._enqueue_observation(
-            timed_observation  # wrapping a RawObservation
+            session,
+            timed_observation,  # wrapping a RawObservation
         ):
             self.logger.info(f"Observation #{obs_timestep} has been filtered out")
 
@@ -196,41 +296,12 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
         """Returns actions to the robot client. Actions are sent as a single
         chunk, containing multiple actions."""
         client_id = context.peer()
+        session = self.get_session(client_id)
         self.logger.debug(f"Client {client_id} connected for action streaming")
 
-        # Generate action based on the most recent observation and its timestep
         try:
             getactions_starts = time.perf_counter()
-            obs = self.observation_queue.get(timeout=self.config.obs_queue_timeout)
-            self.logger.info(
-                f"Running inference for observation #{obs.get_timestep()} (must_go: {obs.must_go})"
-            )
-
-            with self._predicted_timesteps_lock:
-                self._predicted_timesteps.add(obs.get_timestep())
-
-            start_time = time.perf_counter()
-            action_chunk = self._predict_action_chunk(obs)
-            inference_time = time.perf_counter() - start_time
-
-            start_time = time.perf_counter()
-            actions_bytes = pickle.dumps(action_chunk)  # nosec
-            serialize_time = time.perf_counter() - start_time
-
-            # Create and return the action chunk
-            actions = services_pb2.Actions(data=actions_bytes)
-
-            self.logger.info(
-                f"Action chunk #{obs.get_timestep()} generated | "
-                f"Total time: {(inference_time + serialize_time) * 1000:.2f}ms"
-            )
-
-            self.logger.debug(
-                f"Action chunk #{obs.get_timestep()} generated | "
-                f"Inference time: {inference_time:.2f}s |"
-                f"Serialize time: {serialize_time:.2f}s |"
-                f"Total time: {inference_time + serialize_time:.2f}s"
-            )
+            actions = self._generate_actions(session)
 
             time.sleep(
                 max(0, self.config.inference_latency - max(0, time.perf_counter() - getactions_starts))
@@ -242,20 +313,106 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
             return services_pb2.Empty()
 
         except Exception as e:
-            self.logger.error(f"Error in StreamActions: {e}")
+            self.logger.error(f"Error in GetActions: {e}")
 
             return services_pb2.Empty()
 
-    def _obs_sanity_checks(self, obs: TimedObservation, previous_obs: TimedObservation) -> bool:
+    def StreamActions(self, request, context):  # noqa: N802
+        """Streams actions to the robot client, pushing each chunk as soon as it is predicted.
+        Unlike GetActions, the client doesn't need to send a request per chunk.
+
+        A stream holds a gRPC worker thread until the client cancels it. At most `config.max_clients` streams are
+        served at the same time, so that the other workers remain available for the observations."""
+        client_id = context.peer()
+        with self._sessions_lock:
+            accepted = self._num_streams < self.config.max_clients
+            if accepted:
+                self._num_streams += 1
+        if not accepted:
+            context.abort(
+                grpc.StatusCode.RESOURCE_EXHAUSTED,
+                f"The server already streams actions to {self.config.max_clients} clients (max_clients).",
+            )
+
+        session = self.get_session(client_id)
+        self.logger.debug(f"Client {client_id} connected for action streaming")
+
+        last_inference_start = 0
+        try:
+            while self.running and context.is_active():
+                # Waiting for observations is not inactivity
+                session.last_active = time.perf_counter()
+                # Rate-limit inference to `inference_latency` without delaying the chunks already predicted
+                time.sleep(
+                    max(0, self.config.inference_latency - (time.perf_counter() - last_inference_start))
+                )
+
+                try:
+                    last_inference_start = time.perf_counter()
+                    actions = self._generate_actions(session)
+                except Empty:  # no observation added to queue in obs_queue_timeout
+                    continue
+                except Exception as e:
+                    self.logger.error(f"Error in StreamActions: {e}")
+                    continue
+
+                yield actions
+        finally:
+            # Also reached when the client cancels the stream
+            self.logger.debug(f"Stopped streaming actions to {client_id}")
+            with self._sessions_lock:
+                self._num_streams -= 1
+            self.evict_session(session)
+
+    def _generate_actions(self, session: ClientSession) -> services_pb2.Actions:
+        """Runs inference on the most recent observation of the client and returns the serialized action
+        chunk. Raises `Empty` if no observation is received within `obs_queue_timeout`."""
+        obs = session.observation_queue.get(timeout=self.config.obs_queue_timeout)
+        self.logger.info(f"Running inference for observation #{obs.get_timestep()} (must_go: {obs.must_go})")
+
+        with session.predicted_timesteps_lock:
+            session.predicted_timesteps.add(obs.get_timestep())
+        session.last_processed_obs = obs
+
+        start_time = time.perf_counter()
+        action_chunk = self._run_inference(obs)
+        inference_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        actions_bytes = timed_actions_to_bytes(action_chunk)
+        serialize_time = time.perf_counter() - start_time
+
+        self.logger.info(
+            f"Action chunk #{obs.get_timestep()} generated | "
+            f"Total time: {(inference_time + serialize_time) * 1000:.2f}ms"
+        )
+
+        self.logger.debug(
+            f"Action chunk #{obs.get_timestep()} generated | "
+            f"Inference time: {inference_time:.2f}s |"
+            f"Serialize time: {serialize_time:.2f}s |"
+            f"Total time: {inference_time + serialize_time:.2f}s"
+        )
+
+        return services_pb2.Actions(data=actions_bytes)
+
+    def _obs_sanity_checks(
+        self, session: ClientSession, obs: TimedObservation, previous_obs: TimedObservation
+    ) -> bool:
         """Check if the observation is valid to be processed by the policy"""
-        with self._predicted_timesteps_lock:
-            predicted_timesteps = self._predicted_timesteps
+        with session.predicted_timesteps_lock:
+            predicted_timesteps = session.predicted_timesteps
 
         if obs.get_timestep() in predicted_timesteps:
             self.logger.debug(f"Skipping observation #{obs.get_timestep()} - Timestep predicted already!")
             return False
 
-        elif observations_similar(obs, previous_obs, lerobot_features=self.lerobot_features):
+        elif observations_similar(
+            obs,
+            previous_obs,
+            lerobot_features=self.lerobot_features,
+            image_atol=self.config.image_similarity_atol,
+        ):
             self.logger.debug(
                 f"Skipping observation #{obs.get_timestep()} - Observation too similar to last obs predicted!"
             )
@@ -264,32 +421,76 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
         else:
             return True
 
-    def _enqueue_observation(self, obs: TimedObservation) -> bool:
+    def _enqueue_observation(self, session: ClientSession, obs: TimedObservation) -> bool:
         """Enqueue an observation if it must go through processing, otherwise skip it.
         Observations not in queue are never run through the policy network"""
 
         if (
             obs.must_go
-            or self.last_processed_obs is None
-            or self._obs_sanity_checks(obs, self.last_processed_obs)
+            or session.last_processed_obs is None
+            or self._obs_sanity_checks(session, obs, session.last_processed_obs)
         ):
-            last_obs = self.last_processed_obs.get_timestep() if self.last_processed_obs else "None"
+            last_obs = session.last_processed_obs.get_timestep() if session.last_processed_obs else "None"
             self.logger.debug(
                 f"Enqueuing observation. Must go: {obs.must_go} | Last processed obs: {last_obs}"
             )
 
             # If queue is full, get the old observation to make room
-            if self.observation_queue.full():
+            if session.observation_queue.full():
                 # pops from queue
-                _ = self.observation_queue.get_nowait()
+                _ = session.observation_queue.get_nowait()
                 self.logger.debug("Observation queue was full, removed oldest observation")
 
             # Now put the new observation (never blocks as queue is non-full here)
-            self.observation_queue.put(obs)
+            session.observation_queue.put(obs)
             return True
 
         return False
 
+    def _run_inference(self, obs: TimedObservation) -> list[TimedAction]:
+        """Predict the action chunk of an observation, batching it with the observations of other clients if
+        batching is enabled. Blocks until the action chunk is available."""
+        if self.config.max_batch_size == 1:
+            return self._predict_action_chunk(obs)
+
+        with self._batching_thread_lock:
+            if self._batching_thread is None or not self._batching_thread.is_alive():
+                self._batching_thread = threading.Thread(target=self._batching_loop, daemon=True)
+                self._batching_thread.start()
+
+        future = futures.Future()
+        self._inference_queue.put((obs, future))
+        return future.result()
+
+    def _batching_loop(self) -> None:
+        """Collects the observations waiting for inference into batches of at most `config.max_batch_size`,
+        waiting at most `config.max_batch_wait_s` after the first one, and runs them through the policy."""
+        while self.running:
+            try:
+                requests = [self._inference_queue.get(timeout=self.config.obs_queue_timeout)]
+            except Empty:
+                continue
+
+            deadline = time.perf_counter() + self.config.max_batch_wait_s
+            while len(requests) < self.config.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    requests.append(self._inference_queue.get(timeout=remaining))
+                except Empty:
+                    break
+
+            try:
+                action_chunks = self._predict_action_chunks([obs for obs, _ in requests])
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), action_chunk in zip(requests, action_chunks, strict=True):
+                future.set_result(action_chunk)
+
     def _time_action_chunk(self, t_0: float, action_chunk: list[torch.Tensor], i_0: int) -> list[TimedAction]:
         """Turn a chunk of actions into a list of TimedAction instances,
         with the first action corresponding to t_0 and the rest corresponding to
@@ -307,16 +508,44 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
         client and then convert them to float32 [0,1] images here, before running inference.
         """
         # RawObservation from robot.get_observation() - wrong keys, wrong dtype, wrong image shape
-        observation: Observation = raw_observation_to_observation(
-            observation_t.get_observation(),
-            self.lerobot_features,
-            self.policy_image_features,
-            self.device,
-        )
+        if self._preprocessor is None:
+            self._preprocessor = ObservationPreprocessor(
+                self.lerobot_features, self.policy_image_features, self.device
+            )
+        observation: Observation = self._preprocessor(observation_t.get_observation())
         # processed Observation - right keys, right dtype, right image shape
 
         return observation
 
+    def _batch_observations(self, observations: list[Observation]) -> list[tuple[list[int], Observation]]:
+        """Concatenates the observations along their batch dimension. Observations whose tensors have
+        different shapes (e.g. from robots with different cameras) are put in different batches.
+
+        Returns the batches, along with the indices of the observations they hold.
+        """
+        groups = {}
+        for i, observation in enumerate(observations):
+            signature = tuple(
+                (key, tuple(value.shape)) if isinstance(value, torch.Tensor) else key
+                for key, value in sorted(observation.items())
+            )
+            groups.setdefault(signature, []).append(i)
+
+        batches = []
+        for indices in groups.values():
+            if len(indices) == 1:
+                batches.append((indices, observations[indices[0]]))
+                continue
+
+            batch = {}
+            for key, value in observations[indices[0]].items():
+                values = [observations[i][key] for i in indices]
+                # VLAs present natural-language instructions in observations, which are batched as lists
+                batch[key] = torch.cat(values, dim=0) if isinstance(value, torch.Tensor) else values
+            batches.append((indices, batch))
+
+        return batches
+
     def _get_action_chunk(self, observation: dict[str, torch.Tensor]) -> torch.Tensor:
         """Get an action chunk from the policy. The chunk contains only"""
         chunk = self.policy.predict_action_chunk(observation)
@@ -327,46 +556,52 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
 
     def _predict_action_chunk(self, observation_t: TimedObservation) -> list[TimedAction]:
         """Predict an action chunk based on an observation"""
-        inference_starts = time.perf_counter()
+        return self._predict_action_chunks([observation_t])[0]
 
-        """1. Prepare observation"""
-        start_time = time.perf_counter()
-        observation = self._prepare_observation(observation_t)
-        preprocessing_time = time.perf_counter() - start_time
+    def _predict_action_chunks(self, observations_t: list[TimedObservation]) -> list[list[TimedAction]]:
+        """Predict the action chunks of several observations, running them through the policy as a batch"""
+        inference_starts = time.perf_counter()
+        timesteps = [observation_t.get_timestep() for observation_t in observations_t]
 
-        self.last_processed_obs: TimedObservation = observation_t
+        """1. Prepare observations"""
+        observations = [self._prepare_observation(observation_t) for observation_t in observations_t]
+        preprocessing_time = time.perf_counter()
 
-        """2. Get action chunk"""
-        start_time = time.perf_counter()
-        action_tensor = self._get_action_chunk(observation)
-        inference_time = time.perf_counter() - start_time
+        """2. Get action chunks"""
+        action_tensors = [None] * len(observations_t)
+        for indices, batch in self._batch_observations(observations):
+            chunk = self._get_action_chunk(batch)
+            for i, action_tensor in zip(indices, chunk, strict=True):
+                action_tensors[i] = action_tensor
+        inference_time = time.perf_counter()
 
         """3. Post-inference processing"""
-        start_time = time.perf_counter()
-        # Move to CPU before serializing
-        action_tensor = action_tensor.cpu().squeeze(0)
-
-        action_chunk = self._time_action_chunk(
-            observation_t.get_timestamp(), list(action_tensor), observation_t.get_timestep()
-        )
-        postprocessing_time = time.perf_counter() - start_time
-        inference_stops = time.perf_counter()
+        action_chunks = []
+        for observation_t, action_tensor in zip(observations_t, action_tensors, strict=True):
+            # Move to CPU before serializing
+            action_tensor = action_tensor.cpu()
+            action_chunks.append(
+                self._time_action_chunk(
+                    observation_t.get_timestamp(), list(action_tensor), observation_t.get_timestep()
+                )
+            )
+        postprocessing_time = time.perf_counter()
 
         self.logger.info(
-            f"Observation {observation_t.get_timestep()} |"
-            f"Inference time: {1000 * (inference_stops - inference_starts):.2f}ms"
+            f"Observations {timesteps} |"
+            f"Inference time: {1000 * (postprocessing_time - inference_starts):.2f}ms"
         )
 
         # full-process latency breakdown for debugging purposes
         self.logger.debug(
-            f"Observation {observation_t.get_timestep()} | "
+            f"Observations {timesteps} | "
             f"Preprocessing time: {1000 * (preprocessing_time - inference_starts):.2f}ms | "
             f"Inference time: {1000 * (inference_time - preprocessing_time):.2f}ms | "
             f"Postprocessing time: {1000 * (postprocessing_time - inference_time):.2f}ms | "
             f"Total time: {1000 * (postprocessing_time - inference_starts):.2f}ms"
         )
 
-        return action_chunk
+        return action_chunks
 
     def stop(self):
         """Stop the server"""
@@ -374,6 +609,21 @@ class PolicyServer(services_pb2_grpc.AsyncInferenceServicer):
         self.logger.info("Server stopping...")
 
 
+def make_grpc_server(policy_server: PolicyServer) -> grpc.Server:
+    """Creates the gRPC server running `policy_server`, bound to the host and port of its config.
+
+    Each client keeps an action stream open while it sends observations, so the worker pool is sized for
+    `config.max_clients` clients (see `PolicyServerConfig.num_rpc_workers`).
+    """
+    config = policy_server.config
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=config.num_rpc_workers, thread_name_prefix="policy_server")
+    )
+    services_pb2_grpc.add_AsyncInferenceServicer_to_server(policy_server, server)
+    server.add_insecure_port(f"{config.host}:{config.port}")
+    return server
+
+
 @draccus.wrap()
 def serve(cfg: PolicyServerConfig):
     """Start the PolicyServer with the given configuration.
@@ -387,9 +637,7 @@ def serve(cfg: PolicyServerConfig):
     policy_server = PolicyServer(cfg)
 
     # Setup and start gRPC server
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
-    services_pb2_grpc.add_AsyncInferenceServicer_to_server(policy_server, server)
-    server.add_insecure_port(f"{cfg.host}:{cfg.port}")
+    server = make_grpc_server(policy_server)
 
     policy_server.logger.info(f"PolicyServer started on {cfg.host}:{cfg.port}")
     server.start()
@@ -39,7 +39,6 @@ import time
 from collections.abc import Callable
 from dataclasses import asdict
 from pprint import pformat
-from queue import Queue
 from typing import Any
 
 import draccus
@@ -66,12 +65,14 @@ from lerobot.scripts.server.helpers import (
     RawObservation,
     RemotePolicyConfig,
     TimedAction,
+    TimedActionQueue,
     TimedObservation,
     get_logger,
     map_robot_keys_to_lerobot_features,
     validate_robot_cameras_for_policy,
     visualize_action_queue_size,
 )
+from lerobot.scripts.server.serialization import bytes_to_timed_actions, timed_observation_to_bytes
 from lerobot.transport import (
     services_pb2,  # type: ignore
     services_pb2_grpc,  # type: ignore
@@ -129,7 +130,7 @@ class RobotClient:
 
         self._chunk_size_threshold = config.chunk_size_threshold
 
-        self.action_queue = Queue()
+        self.action_queue = TimedActionQueue(temporal_ensemble_coeff=config.temporal_ensemble_coeff)
         self.action_queue_lock = threading.Lock()  # Protect queue operations
         self.action_queue_size = []
         self.start_barrier = threading.Barrier(2)  # 2 threads: action receiver, control loop
@@ -200,7 +201,9 @@ class RobotClient:
             raise ValueError("Input observation needs to be a TimedObservation!")
 
         start_time = time.perf_counter()
-        observation_bytes = pickle.dumps(obs)
+        observation_bytes = timed_observation_to_bytes(
+            obs, self.config.image_codecs, self.config.jpeg_quality
+        )
         serialize_time = time.perf_counter() - start_time
         self.logger.debug(f"Observation serialization time: {serialize_time:.6f}s")
 
@@ -224,7 +227,7 @@ class RobotClient:
     def _inspect_action_queue(self):
         with self.action_queue_lock:
             queue_size = self.action_queue.qsize()
-            timestamps = sorted([action.get_timestep() for action in self.action_queue.queue])
+            timestamps = self.action_queue.timesteps
         self.logger.debug(f"Queue size: {queue_size}, Queue contents: {timestamps}")
         return queue_size, timestamps
 
@@ -233,45 +236,31 @@ class RobotClient:
         incoming_actions: list[TimedAction],
         aggregate_fn: Callable[[torch.Tensor, torch.Tensor], torch.Tensor] | None = None,
     ):
-        """Finds the same timestep actions in the queue and aggregates them using the aggregate_fn"""
-        if aggregate_fn is None:
-            # default aggregate function: take the latest action
-            def aggregate_fn(x1, x2):
-                return x2
-
-        future_action_queue = Queue()
-        with self.action_queue_lock:
-            internal_queue = self.action_queue.queue
-
-        current_action_queue = {action.get_timestep(): action.get_action() for action in internal_queue}
-
-        for new_action in incoming_actions:
-            with self.latest_action_lock:
-                latest_action = self.latest_action
+        """Finds the same timestep actions in the queue and aggregates them using the aggregate_fn.
+        The incoming actions must have consecutive timesteps, as in the chunks sent by the policy server."""
+        if len(incoming_actions) == 0:
+            return
+
+        first_timestep = incoming_actions[0].get_timestep()
+        if incoming_actions[-1].get_timestep() - first_timestep != len(incoming_actions) - 1:
+            raise ValueError("Incoming actions must have consecutive timesteps")
+
+        actions = torch.stack([action.get_action() for action in incoming_actions])
+        timestamps = torch.tensor(
+            [action.get_timestamp() for action in incoming_actions], dtype=torch.float64
+        )
 
-            # New action is older than the latest action in the queue, skip it
-            if new_action.get_timestep() <= latest_action:
-                continue
-
-            # If the new action's timestep is not in the current action queue, add it directly
-            elif new_action.get_timestep() not in current_action_queue:
-                future_action_queue.put(new_action)
-                continue
-
-            # If the new action's timestep is in the current action queue, aggregate it
-            # TODO: There is probably a way to do this with broadcasting of the two action tensors
-            future_action_queue.put(
-                TimedAction(
-                    timestamp=new_action.get_timestamp(),
-                    timestep=new_action.get_timestep(),
-                    action=aggregate_fn(
-                        current_action_queue[new_action.get_timestep()], new_action.get_action()
-                    ),
-                )
-            )
+        with self.latest_action_lock:
+            latest_action = self.latest_action
 
         with self.action_queue_lock:
-            self.action_queue = future_action_queue
+            self.action_queue.merge(
+                first_timestep=first_timestep,
+                actions=actions,
+                timestamps=timestamps,
+                latest_action=latest_action,
+                aggregate_fn=aggregate_fn,
+            )
 
     def receive_actions(self, verbose: bool = False):
         """Receive actions from the policy server"""
@@ -281,79 +270,83 @@ class RobotClient:
 
         while self.running:
             try:
-                # Use StreamActions to get a stream of actions from the server
-                actions_chunk = self.stub.GetActions(services_pb2.Empty())
-                if len(actions_chunk.data) == 0:
-                    continue  # received `Empty` from server, wait for next call
-
-                receive_time = time.time()
-
-                # Deserialize bytes back into list[TimedAction]
-                deserialize_start = time.perf_counter()
-                timed_actions = pickle.loads(actions_chunk.data)  # nosec
-                deserialize_time = time.perf_counter() - deserialize_start
-
-                self.action_chunk_size = max(self.action_chunk_size, len(timed_actions))
-
-                # Calculate network latency if we have matching observations
-                if len(timed_actions) > 0 and verbose:
-                    with self.latest_action_lock:
-                        latest_action = self.latest_action
-
-                    self.logger.debug(f"Current latest action: {latest_action}")
-
-                    # Get queue state before changes
-                    old_size, old_timesteps = self._inspect_action_queue()
-                    if not old_timesteps:
-                        old_timesteps = [latest_action]  # queue was empty
-
-                    # Get queue state before changes
-                    old_size, old_timesteps = self._inspect_action_queue()
-                    if not old_timesteps:
-                        old_timesteps = [latest_action]  # queue was empty
-
-                    # Log incoming actions
-                    incoming_timesteps = [a.get_timestep() for a in timed_actions]
-
-                    first_action_timestep = timed_actions[0].get_timestep()
-                    server_to_client_latency = (receive_time - timed_actions[0].get_timestamp()) * 1000
-
-                    self.logger.info(
-                        f"Received action chunk for step #{first_action_timestep} | "
-                        f"Latest action: #{latest_action} | "
-                        f"Incoming actions: {incoming_timesteps[0]}:{incoming_timesteps[-1]} | "
-                        f"Network latency (server->client): {server_to_client_latency:.2f}ms | "
-                        f"Deserialization time: {deserialize_time * 1000:.2f}ms"
-                    )
-
-                # Update action queue
-                start_time = time.perf_counter()
-                self._aggregate_action_queues(timed_actions, self.config.aggregate_fn)
-                queue_update_time = time.perf_counter() - start_time
-
-                self.must_go.set()  # after receiving actions, next empty queue triggers must-go processing!
-
-                if verbose:
-                    # Get queue state after changes
-                    new_size, new_timesteps = self._inspect_action_queue()
-
-                    with self.latest_action_lock:
-                        latest_action = self.latest_action
-
-                    self.logger.info(
-                        f"Latest action: {latest_action} | "
-                        f"Old action steps: {old_timesteps[0]}:{old_timesteps[-1]} | "
-                        f"Incoming action steps: {incoming_timesteps[0]}:{incoming_timesteps[-1]} | "
-                        f"Updated action steps: {new_timesteps[0]}:{new_timesteps[-1]}"
-                    )
-                    self.logger.debug(
-                        f"Queue update complete ({queue_update_time:.6f}s) | "
-                        f"Before: {old_size} items | "
-                        f"After: {new_size} items | "
-                    )
+                # The server pushes action chunks on this stream as soon as they are predicted
+                for actions_chunk in self.stub.StreamActions(services_pb2.Empty()):
+                    self._receive_action_chunk(actions_chunk, verbose)
+                    if not self.running:
+                        break
 
             except grpc.RpcError as e:
-                self.logger.error(f"Error receiving actions: {e}")
+                if self.running:
+                    self.logger.error(f"Error receiving actions: {e}")
+
+    def _receive_action_chunk(self, actions_chunk: services_pb2.Actions, verbose: bool = False):
+        """Deserialize an action chunk received from the policy server and merge it into the action queue"""
+        receive_time = time.time()
+
+        # Deserialize bytes back into list[TimedAction]
+        deserialize_start = time.perf_counter()
+        timed_actions = bytes_to_timed_actions(actions_chunk.data)
+        deserialize_time = time.perf_counter() - deserialize_start
+
+        self.action_chunk_size = max(self.action_chunk_size, len(timed_actions))
+
+        # Calculate network latency if we have matching observations
+        if len(timed_actions) > 0 and verbose:
+            with self.latest_action_lock:
+                latest_action = self.latest_action
+
+            self.logger.debug(f"Current latest action: {latest_action}")
+
+            # Get queue state before changes
+            old_size, old_timesteps = self._inspect_action_queue()
+            if not old_timesteps:
+                old_timesteps = [latest_action]  # queue was empty
+
+            # Get queue state before changes
+            old_size, old_timesteps = self._inspect_action_queue()
+            if not old_timesteps:
+                old_timesteps = [latest_action]  # queue was empty
+
+            # Log incoming actions
+            incoming_timesteps = [a.get_timestep() for a in timed_actions]
+
+            first_action_timestep = timed_actions[0].get_timestep()
+            server_to_client_latency = (receive_time - timed_actions[0].get_timestamp()) * 1000
+
+            self.logger.info(
+                f"Received action chunk for step #{first_action_timestep} | "
+                f"Latest action: #{latest_action} | "
+                f"Incoming actions: {incoming_timesteps[0]}:{incoming_timesteps[-1]} | "
+                f"Network latency (server->client): {server_to_client_latency:.2f}ms | "
+                f"Deserialization time: {deserialize_time * 1000:.2f}ms"
+            )
+
+        # Update action queue
+        start_time = time.perf_counter()
+        self._aggregate_action_queues(timed_actions, self.config.aggregate_fn)
+        queue_update_time = time.perf_counter() - start_time
+
+        self.must_go.set()  # after receiving actions, next empty queue triggers must-go processing!
+
+        if verbose:
+            # Get queue state after changes
+            new_size, new_timesteps = self._inspect_action_queue()
+
+            with self.latest_action_lock:
+                latest_action = self.latest_action
+
+            self.logger.info(
+                f"Latest action: {latest_action} | "
+                f"Old action steps: {old_timesteps[0]}:{old_timesteps[-1]} | "
+                f"Incoming action steps: {incoming_timesteps[0]}:{incoming_timesteps[-1]} | "
+                f"Updated action steps: {new_timesteps[0]}:{new_timesteps[-1]}"
+            )
+            self.logger.debug(
+                f"Queue update complete ({queue_update_time:.6f}s) | "
+                f"Before: {old_size} items | "
+                f"After: {new_size} items | "
+            )
 
     def actions_available(self):
         """Check if there are actions available in the queue"""
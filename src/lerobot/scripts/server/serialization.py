@@ -0,0 +1,217 @@
+# Copyright 2025 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Wire format of the observations and actions exchanged between the RobotClient and the PolicyServer.
+
+Messages are laid out as:
+
+    MAGIC | header length (uint32) | JSON header | payload
+
+The JSON header holds the timing information and, for each entry, either its value (numbers, booleans,
+strings) or the location of its raw bytes in the payload along with their dtype and shape. Arrays and tensors
+are copied once into the message and read back as views on it, without going through pickle. Camera frames
+can optionally be compressed to JPEG or PNG on a per-key basis.
+"""
+
+import json
+import struct
+from typing import Any
+
+import cv2
+import numpy as np
+import torch
+
+from lerobot.scripts.server.helpers import RawObservation, TimedAction, TimedObservation
+
+OBSERVATION_MAGIC = b"LROB"
+ACTIONS_MAGIC = b"LRAC"
+HEADER_LENGTH_FORMAT = "<I"
+# Entries are aligned in the payload, so that they can be read as tensors of any dtype
+PAYLOAD_ALIGNMENT = 16
+
+IMAGE_CODECS = {"jpeg": ".jpg", "png": ".png"}
+
+
+def _pack(magic: bytes, header: dict, buffers: list[bytes | memoryview]) -> bytes:
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return b"".join([magic, struct.pack(HEADER_LENGTH_FORMAT, len(header_bytes)), header_bytes, *buffers])
+
+
+def _unpack(magic: bytes, data: bytes) -> tuple[dict, memoryview]:
+    if data[: len(magic)] != magic:
+        raise ValueError(
+            f"Invalid message: expected it to start with {magic}, got {bytes(data[: len(magic)])}"
+        )
+
+    offset = len(magic) + struct.calcsize(HEADER_LENGTH_FORMAT)
+    (header_length,) = struct.unpack_from(HEADER_LENGTH_FORMAT, data, len(magic))
+    header = json.loads(bytes(data[offset : offset + header_length]))
+    # A writable copy, so that tensors can be created as views on the payload
+    payload = memoryview(bytearray(data[offset + header_length :]))
+    return header, payload
+
+
+def _tensor_to_buffer(value: torch.Tensor) -> tuple[dict, memoryview]:
+    value = value.detach().cpu().contiguous()
+    spec = {"kind": "tensor", "dtype": str(value.dtype).removeprefix("torch."), "shape": list(value.shape)}
+    return spec, memoryview(value.view(-1).view(torch.uint8).numpy())
+
+
+def _array_to_buffer(value: np.ndarray) -> tuple[dict, memoryview]:
+    value = np.ascontiguousarray(value)
+    spec = {"kind": "ndarray", "dtype": value.dtype.str, "shape": list(value.shape)}
+    return spec, memoryview(value.reshape(-1).view(np.uint8))
+
+
+def _image_to_buffer(value: np.ndarray | torch.Tensor, codec: str, jpeg_quality: int) -> tuple[dict, bytes]:
+    if codec not in IMAGE_CODECS:
+        raise ValueError(f"Unsupported image codec '{codec}'. Supported codecs: {list(IMAGE_CODECS)}")
+
+    is_tensor = isinstance(value, torch.Tensor)
+    image = value.cpu().numpy() if is_tensor else value
+    if image.dtype != np.uint8 or image.ndim != 3 or image.shape[-1] not in (1, 3):
+        raise ValueError(f"Only (H, W, C) uint8 images can be compressed, got {image.dtype} {image.shape}")
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality] if codec == "jpeg" else []
+    # Camera frames are RGB while OpenCV expects BGR: channels are swapped back when decoding
+    success, encoded = cv2.imencode(IMAGE_CODECS[codec], image[..., ::-1], params)
+    if not success:
+        raise RuntimeError(f"Failed to encode image of shape {image.shape} to {codec}")
+
+    spec = {"kind": "image", "codec": codec, "channels": image.shape[-1], "is_tensor": is_tensor}
+    return spec, encoded.tobytes()
+
+
+def _buffer_to_value(spec: dict, buffer: memoryview) -> Any:
+    if spec["kind"] == "tensor":
+        dtype = getattr(torch, spec["dtype"])
+        if len(buffer) == 0:
+            return torch.empty(spec["shape"], dtype=dtype)
+        return torch.frombuffer(buffer, dtype=dtype).reshape(spec["shape"])
+
+    if spec["kind"] == "ndarray":
+        return np.frombuffer(buffer, dtype=np.dtype(spec["dtype"])).reshape(spec["shape"])
+
+    if spec["kind"] == "image":
+        flag = cv2.IMREAD_COLOR if spec["channels"] == 3 else cv2.IMREAD_GRAYSCALE
+        image = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), flag)
+        image = np.ascontiguousarray(image[..., ::-1]) if spec["channels"] == 3 else image[..., None]
+        return torch.from_numpy(image) if spec["is_tensor"] else image
+
+    raise ValueError(f"Unknown entry kind '{spec['kind']}'")
+
+
+def _encode_entries(
+    values: dict[str, Any], image_codecs: dict[str, str] | None = None, jpeg_quality: int = 90
+) -> tuple[dict, list[bytes | memoryview]]:
+    image_codecs = image_codecs or {}
+    entries = {}
+    buffers = []
+    offset = 0
+    for key, value in values.items():
+        if isinstance(value, (torch.Tensor, np.ndarray)) and key in image_codecs:
+            spec, buffer = _image_to_buffer(value, image_codecs[key], jpeg_quality)
+        elif isinstance(value, torch.Tensor):
+            spec, buffer = _tensor_to_buffer(value)
+        elif isinstance(value, np.ndarray):
+            spec, buffer = _array_to_buffer(value)
+        elif isinstance(value, (bool, int, float, str)) or value is None:
+            entries[key] = {"kind": "value", "value": value}
+            continue
+        elif isinstance(value, np.generic):
+            entries[key] = {"kind": "value", "value": value.item()}
+            continue
+        else:
+            raise TypeError(f"Cannot serialize '{key}' of type {type(value)}")
+
+        padding = -offset % PAYLOAD_ALIGNMENT
+        if padding > 0:
+            buffers.append(bytes(padding))
+            offset += padding
+
+        spec["offset"] = offset
+        spec["nbytes"] = len(buffer)
+        entries[key] = spec
+        buffers.append(buffer)
+        offset += len(buffer)
+
+    return entries, buffers
+
+
+def _decode_entries(entries: dict[str, dict], payload: memoryview) -> dict[str, Any]:
+    values = {}
+    for key, spec in entries.items():
+        if spec["kind"] == "value":
+            values[key] = spec["value"]
+        else:
+            values[key] = _buffer_to_value(spec, payload[spec["offset"] : spec["offset"] + spec["nbytes"]])
+    return values
+
+
+def timed_observation_to_bytes(
+    obs: TimedObservation, image_codecs: dict[str, str] | None = None, jpeg_quality: int = 90
+) -> bytes:
+    """Serialize a TimedObservation.
+
+    Args:
+        obs: The observation to serialize.
+        image_codecs: Maps the keys of camera frames to the codec used to compress them ("jpeg" or "png").
+            Frames of other keys are sent as raw bytes.
+        jpeg_quality: Quality of the JPEG compression, between 0 and 100.
+    """
+    entries, buffers = _encode_entries(obs.get_observation(), image_codecs, jpeg_quality)
+    header = {
+        "timestamp": obs.get_timestamp(),
+        "timestep": obs.get_timestep(),
+        "must_go": obs.must_go,
+        "entries": entries,
+    }
+    return _pack(OBSERVATION_MAGIC, header, buffers)
+
+
+def bytes_to_timed_observation(data: bytes) -> TimedObservation:
+    header, payload = _unpack(OBSERVATION_MAGIC, data)
+    observation: RawObservation = _decode_entries(header["entries"], payload)
+    return TimedObservation(
+        timestamp=header["timestamp"],
+        timestep=header["timestep"],
+        observation=observation,
+        must_go=header["must_go"],
+    )
+
+
+def timed_actions_to_bytes(timed_actions: list[TimedAction]) -> bytes:
+    """Serialize a chunk of actions as a single stacked tensor, along with their timestamps and timesteps."""
+    if len(timed_actions) == 0:
+        actions = torch.empty(0)
+    else:
+        actions = torch.stack([torch.as_tensor(action.get_action()) for action in timed_actions])
+
+    entries, buffers = _encode_entries({"actions": actions})
+    header = {
+        "timestamps": [action.get_timestamp() for action in timed_actions],
+        "timesteps": [action.get_timestep() for action in timed_actions],
+        "entries": entries,
+    }
+    return _pack(ACTIONS_MAGIC, header, buffers)
+
+
+def bytes_to_timed_actions(data: bytes) -> list[TimedAction]:
+    header, payload = _unpack(ACTIONS_MAGIC, data)
+    actions = _decode_entries(header["entries"], payload)["actions"]
+    return [
+        TimedAction(timestamp=timestamp, timestep=timestep, action=action)
+        for timestamp, timestep, action in zip(
+            header["timestamps"], header["timesteps"], actions, strict=True
+        )
+    ]
@@ -1,34 +1,123 @@
 from __future__ import annotations
 
-import queue
-import threading
-import time
+import collections
 import logging
+import threading
+
+# Feetech instruction packets are laid out as: 0xFF 0xFF | ID | LENGTH | INSTRUCTION | PARAMS... | CHECKSUM
+PACKET_HEADER = b"\xff\xff"
+INSTRUCTION_INDEX = 4
+INST_SYNC_READ = 0x82
+INST_SYNC_WRITE = 0x83
+SYNC_INSTRUCTIONS = (INST_SYNC_READ, INST_SYNC_WRITE)
+
+
+class ReceiveBuffer:
+    """Thread-safe byte FIFO filled by the MQTT network thread and drained by the serial reads.
+
+    Payloads are kept as a deque of chunks along with a read offset in the first one, so that reading
+    ``n`` bytes costs ``O(n)`` whatever the number of bytes buffered. Readers are woken up by a condition
+    variable as soon as enough bytes are available.
+    """
 
-import paho.mqtt.client as mq
+    def __init__(self):
+        self._chunks: collections.deque[bytes] = collections.deque()
+        self._offset = 0
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self._size
+
+    def put(self, data: bytes) -> None:
+        if not data:
+            return
+        with self._cond:
+            self._chunks.append(bytes(data))
+            self._size += len(data)
+            self._cond.notify_all()
+
+    def read(self, n: int, timeout: float | None) -> bytes:
+        """Read ``n`` bytes, waiting at most ``timeout`` seconds for them like ``pyserial.Serial.read``.
+
+        Returns fewer bytes if the timeout expires first.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._size >= n, timeout=timeout)
+            return self._take(n)
+
+    def clear(self) -> None:
+        with self._cond:
+            self._chunks.clear()
+            self._offset = 0
+            self._size = 0
+
+    def _take(self, n: int) -> bytes:
+        parts = []
+        while n > 0 and self._chunks:
+            chunk = self._chunks[0]
+            available = len(chunk) - self._offset
+            if available <= n:
+                parts.append(memoryview(chunk)[self._offset :])
+                self._chunks.popleft()
+                self._offset = 0
+                n -= available
+            else:
+                parts.append(memoryview(chunk)[self._offset : self._offset + n])
+                self._offset += n
+                n = 0
+
+        data = b"".join(parts)
+        self._size -= len(data)
+        return data
+
+
+def is_sync_packet(packet: bytes) -> bool:
+    """Whether ``packet`` is a sync-read or sync-write instruction, i.e. part of the control loop hot path."""
+    return (
+        len(packet) > INSTRUCTION_INDEX
+        and packet.startswith(PACKET_HEADER)
+        and packet[INSTRUCTION_INDEX] in SYNC_INSTRUCTIONS
+    )
 
 
 class MQTTSerial:
-    """A wrapper to make an MQTT topic pair look like a pyserial Serial object."""
+    """A wrapper to make an MQTT topic pair look like a pyserial Serial object.
+
+    The Feetech SDK writes each instruction packet with a single ``write`` call, so that every MQTT message
+    holds whole packets. Sync-read and sync-write instructions, sent at every step of the control loop, are
+    published with ``sync_qos`` (0 by default: a lost packet is superseded by the next step's one), while the
+    other instructions (e.g. EEPROM writes during calibration) are published with ``qos``.
+    """
 
-    def __init__(self, host: str, tx_topic: str, rx_topic: str, timeout: float = 0.1):
-        self._q = queue.Queue()
-        self._rx_buf = bytearray()  # buffer for partial packets
+    def __init__(
+        self, host: str, tx_topic: str, rx_topic: str, timeout: float = 0.1, qos: int = 1, sync_qos: int = 0
+    ):
+        import paho.mqtt.client as mq
+
+        self._rx_buf = ReceiveBuffer()
         self._cli = mq.Client()
+        # Messages published with QoS 1 by the bridge must not be downgraded by the subscription
+        subscribe_qos = 1
+
         def _on_connect(c, _u, _f, rc):
             if rc == 0:
                 logging.info(f"MQTTSerial connected to broker {host}")
-                c.subscribe(rx_topic)
+                c.subscribe(rx_topic, qos=subscribe_qos)
                 logging.info(f"Subscribed to {rx_topic}")
             else:
                 logging.error(f"MQTTSerial failed to connect, rc={rc}")
+
         self._cli.on_connect = _on_connect
-        # Push raw payload bytes into queue
-        self._cli.on_message = lambda _c, _u, msg: self._q.put(msg.payload)
+        # Push raw payload bytes into the receive buffer, waking up pending reads
+        self._cli.on_message = lambda _c, _u, msg: self._rx_buf.put(msg.payload)
         self._cli.connect(host)
         self._cli.loop_start()
         self._tx_topic = tx_topic
         self.timeout = timeout
+        self.qos = qos
+        self.sync_qos = sync_qos
 
     def write(self, data) -> int:  # type: ignore[override]
         """Publish *raw bytes* to the transmit topic.
@@ -37,55 +126,31 @@ class MQTTSerial:
         Normalise everything to ``bytes`` so that the paho-mqtt client accepts
         the payload without raising ``TypeError``.
         """
-        if isinstance(data, list):
-            data = bytes(data)
-        elif isinstance(data, bytearray):
+        if isinstance(data, (list, bytearray, memoryview)):
             data = bytes(data)
         # Safety: make sure we only send bytes hereafter.
         if not isinstance(data, (bytes, str)):
             raise TypeError(f"Unsupported payload type for MQTTSerial.write: {type(data)}")
-        # logging.info(f"MQTTSerial TX → {self._tx_topic}: {data.hex() if isinstance(data, bytes) else data}")
-        self._cli.publish(self._tx_topic, data, qos=1)
+        qos = self.sync_qos if isinstance(data, bytes) and is_sync_packet(data) else self.qos
+        self._cli.publish(self._tx_topic, data, qos=qos)
         return len(data)
 
     def read(self, n: int = 1) -> bytes:
-        """Read up to n bytes from the receive topic queue."""
-        buf = bytearray()
-        deadline = time.time() + self.timeout
-        while len(buf) < n and time.time() < deadline:
-            try:
-                # Read all available bytes from the queue up to n
-                chunk = self._q.get_nowait()
-                # Append incoming chunk to internal buffer first
-                self._rx_buf.extend(chunk)
-            except queue.Empty:
-                time.sleep(0.001)
-
-            # If we already have buffered data, use it first
-            while len(buf) < n and self._rx_buf:
-                buf.append(self._rx_buf.pop(0))
-
-            if len(buf) == 0:
-                continue
-
-        # If we collected more than requested, keep the remainder for next read
-        if len(buf) > n:
-            extra = buf[n:]
-            self._rx_buf.extend(extra)
-            buf = buf[:n]
-
-        # logging.info(f"MQTTSerial RX ← {self._tx_topic}: {bytes(buf).hex()}")
-        return bytes(buf)
+        """Read up to n bytes from the receive topic, waiting at most ``timeout`` seconds for them."""
+        return self._rx_buf.read(n, self.timeout)
 
     def flush(self):
         """No-op for MQTT."""
         pass
 
+    def reset_input_buffer(self):
+        """Discard the bytes received and not read yet."""
+        self._rx_buf.clear()
+
     @property
     def in_waiting(self) -> int:
-        """Return the number of bytes in the receive queue."""
-        # This is an approximation as one queue item may have multiple bytes
-        return self._q.qsize()
+        """Return the number of bytes received and not read yet."""
+        return len(self._rx_buf)
 
     def close(self):
         """Disconnect the MQTT client."""
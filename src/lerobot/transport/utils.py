@@ -19,6 +19,7 @@ import io
 import json
 import logging
 import pickle  # nosec B403: Safe usage for internal serialization only
+import uuid
 from multiprocessing import Event
 from queue import Queue
 from typing import Any
@@ -26,7 +27,7 @@ from typing import Any
 import torch
 
 from lerobot.transport import services_pb2
-from lerobot.utils.transition import Transition
+from lerobot.utils.transition import BatchTransition, Transition, stack_transitions, unstack_transitions
 
 CHUNK_SIZE = 2 * 1024 * 1024  # 2 MB
 MAX_MESSAGE_SIZE = 4 * 1024 * 1024  # 4 MB
@@ -122,6 +123,101 @@ def bytes_to_state_dict(buffer: bytes) -> dict[str, torch.Tensor]:
     return torch.load(buffer, weights_only=True)
 
 
+# Parameters messages of a `StateDictDeltaEncoder` start with one of these markers, so that snapshots can be
+# told apart from deltas without deserializing them
+PARAMETERS_SNAPSHOT_MARKER = b"LRPS"
+PARAMETERS_DELTA_MARKER = b"LRPD"
+
+
+def is_parameters_snapshot(buffer: bytes) -> bool:
+    """Whether `buffer` is a snapshot message of a `StateDictDeltaEncoder`, which must never be dropped in favor
+    of a more recent delta."""
+    return buffer[: len(PARAMETERS_SNAPSHOT_MARKER)] == PARAMETERS_SNAPSHOT_MARKER
+
+
+class StateDictDeltaEncoder:
+    """Serializes successive versions of the same state dicts, sending only the tensors that changed.
+
+    Every `snapshot_frequency` messages, a full snapshot of the state dicts is sent and becomes the new base.
+    The other messages only hold the tensors that differ from that base, along with its version. As each delta
+    is relative to the base rather than to the previous message, deltas can be dropped when only the most
+    recent parameters are forwarded, as long as the snapshot they depend on is not (see
+    `is_parameters_snapshot`).
+
+    Floating point tensors can be cast to a lower precision `dtype` (e.g. `torch.bfloat16`) to halve their
+    size. Tensors are compared after the cast, so tensors whose changes are below that precision are not sent.
+    """
+
+    def __init__(self, snapshot_frequency: int = 10, dtype: torch.dtype | None = None):
+        if snapshot_frequency < 1:
+            raise ValueError(f"snapshot_frequency must be at least 1, got {snapshot_frequency}.")
+        self.snapshot_frequency = snapshot_frequency
+        self.dtype = dtype
+        self._base = None
+        self._base_version = None
+        self._num_deltas = 0
+
+    def _cast(self, tensor: torch.Tensor) -> torch.Tensor:
+        tensor = tensor.detach().to("cpu")
+        if self.dtype is not None and tensor.is_floating_point():
+            tensor = tensor.to(self.dtype)
+        return tensor
+
+    def encode(self, state_dicts: dict[str, dict[str, torch.Tensor]]) -> bytes:
+        state_dicts = {
+            name: {key: self._cast(value) for key, value in state_dict.items()}
+            for name, state_dict in state_dicts.items()
+        }
+
+        is_snapshot = (
+            self._base is None
+            or self._num_deltas >= self.snapshot_frequency - 1
+            or state_dicts.keys() != self._base.keys()
+            or any(state_dicts[name].keys() != self._base[name].keys() for name in state_dicts)
+        )
+        if is_snapshot:
+            self._base = state_dicts
+            self._base_version = uuid.uuid4().hex
+            self._num_deltas = 0
+        else:
+            state_dicts = {
+                name: {
+                    key: value
+                    for key, value in state_dict.items()
+                    if not torch.equal(value, self._base[name][key])
+                }
+                for name, state_dict in state_dicts.items()
+            }
+            self._num_deltas += 1
+
+        marker = PARAMETERS_SNAPSHOT_MARKER if is_snapshot else PARAMETERS_DELTA_MARKER
+        return marker + state_to_bytes({"base_version": self._base_version, "state_dicts": state_dicts})
+
+
+class StateDictDeltaDecoder:
+    """Rebuilds the full state dicts from the messages of a `StateDictDeltaEncoder`."""
+
+    def __init__(self):
+        self._base = None
+        self._base_version = None
+
+    def decode(self, buffer: bytes) -> dict[str, dict[str, torch.Tensor]] | None:
+        """Returns the full state dicts, or None if the message is a delta against a base snapshot that
+        wasn't received (e.g. when connecting to a learner that is already running).
+        """
+        message = bytes_to_state_dict(buffer[len(PARAMETERS_SNAPSHOT_MARKER) :])
+        if is_parameters_snapshot(buffer):
+            self._base = message["state_dicts"]
+            self._base_version = message["base_version"]
+            return self._base
+
+        if message["base_version"] != self._base_version:
+            logging.warning("Received parameters relative to an unknown snapshot, waiting for the next one.")
+            return None
+
+        return {name: {**self._base[name], **message["state_dicts"].get(name, {})} for name in self._base}
+
+
 def python_object_to_bytes(python_object: Any) -> bytes:
     return pickle.dumps(python_object)
 
@@ -138,6 +234,9 @@ def bytes_to_transitions(buffer: bytes) -> list[Transition]:
     buffer = io.BytesIO(buffer)
     buffer.seek(0)
     transitions = torch.load(buffer, weights_only=True)
+    if isinstance(transitions, dict):
+        # Block of transitions serialized with `transition_batch_to_bytes`
+        transitions = unstack_transitions(transitions)
     return transitions
 
 
@@ -147,6 +246,26 @@ def transitions_to_bytes(transitions: list[Transition]) -> bytes:
     return buffer.getvalue()
 
 
+def transition_batch_to_bytes(batch: BatchTransition) -> bytes:
+    """Serializes a block of transitions made by `stack_transitions`. Unlike a list of transitions, the
+    payload is one contiguous tensor per key and a header whose size doesn't depend on the number of
+    transitions."""
+    buffer = io.BytesIO()
+    torch.save(batch, buffer)
+    return buffer.getvalue()
+
+
+def bytes_to_transition_batch(buffer: bytes) -> BatchTransition:
+    """Deserializes a block of transitions. Lists of transitions sent with `transitions_to_bytes` are stacked
+    into a block."""
+    buffer = io.BytesIO(buffer)
+    buffer.seek(0)
+    batch = torch.load(buffer, weights_only=True)
+    if isinstance(batch, list):
+        batch = stack_transitions(batch)
+    return batch
+
+
 def grpc_channel_options(
     max_receive_message_length: int = MAX_MESSAGE_SIZE,
     max_send_message_length: int = MAX_MESSAGE_SIZE,
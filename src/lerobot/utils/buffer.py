@@ -17,24 +17,13 @@
 import functools
 from collections.abc import Callable, Sequence
 from contextlib import suppress
-from typing import TypedDict
 
 import torch
 import torch.nn.functional as F  # noqa: N812
 from tqdm import tqdm
 
 from lerobot.datasets.lerobot_dataset import LeRobotDataset
-from lerobot.utils.transition import Transition
-
-
-class BatchTransition(TypedDict):
-    state: dict[str, torch.Tensor]
-    action: torch.Tensor
-    reward: torch.Tensor
-    next_state: dict[str, torch.Tensor]
-    done: torch.Tensor
-    truncated: torch.Tensor
-    complementary_info: dict[str, torch.Tensor | float | int] | None = None
+from lerobot.utils.transition import BatchTransition, Transition
 
 
 def random_crop_vectorized(images: torch.Tensor, output_size: tuple) -> torch.Tensor:
@@ -86,12 +75,15 @@ class ReplayBuffer:
         use_drq: bool = True,
         storage_device: str = "cpu",
         optimize_memory: bool = False,
+        shared_memory: bool = False,
     ):
         """
         Replay buffer for storing transitions.
         It will allocate tensors on the specified device, when the first transition is added.
         NOTE: If you encounter memory issues, you can try to use the `optimize_memory` flag to save memory or
         and use the `storage_device` flag to store the buffer on a different device.
+        NOTE: If sampling slows down training, use `get_iterator(num_workers=...)` to sample in background
+        processes. The storage is then moved to shared memory, see `share_memory`.
         Args:
             capacity (int): Maximum number of transitions to store in the buffer.
             device (str): The device where the tensors will be moved when sampling ("cuda:0" or "cpu").
@@ -103,6 +95,8 @@ class ReplayBuffer:
                 Using "cpu" can help save GPU memory.
             optimize_memory (bool): If True, optimizes memory by not storing duplicate next_states when
                 they can be derived from states. This is useful for large datasets where next_state[i] = state[i+1].
+            shared_memory (bool): If True, allocates the storage in shared memory, so that it can be read by
+                sampler processes without being copied. Only supported with a "cpu" storage device.
         """
         if capacity <= 0:
             raise ValueError("Capacity must be greater than 0.")
@@ -110,10 +104,11 @@ class ReplayBuffer:
         self.capacity = capacity
         self.device = device
         self.storage_device = storage_device
-        self.position = 0
-        self.size = 0
+        # Write position and number of stored transitions, kept in a tensor to be shared with sampler processes
+        self._counters = torch.zeros(2, dtype=torch.int64)
         self.initialized = False
         self.optimize_memory = optimize_memory
+        self.shared_memory = False
 
         # Track episode boundaries for memory optimization
         self.episode_ends = torch.zeros(capacity, dtype=torch.bool, device=storage_device)
@@ -128,6 +123,68 @@ class ReplayBuffer:
             self.image_augmentation_function = torch.compile(base_function)
         self.use_drq = use_drq
 
+        if shared_memory:
+            self.share_memory()
+
+    @property
+    def position(self) -> int:
+        return int(self._counters[0])
+
+    @position.setter
+    def position(self, value: int):
+        self._counters[0] = value
+
+    @property
+    def size(self) -> int:
+        return int(self._counters[1])
+
+    @size.setter
+    def size(self, value: int):
+        self._counters[1] = value
+
+    def _advance(self, num_transitions: int) -> None:
+        """Moves the write position past `num_transitions` newly written transitions, in place."""
+        position = (self.position + num_transitions) % self.capacity
+        size = min(self.size + num_transitions, self.capacity)
+        # The size is written first, so that a sampler never sees the new position before the slots it
+        # leaves behind count as filled
+        self._counters[1] = size
+        self._counters[0] = position
+
+    def __getstate__(self) -> dict:
+        # The image augmentation (possibly compiled) can't be pickled. It is only applied in the main process,
+        # the sampler processes only gather the transitions.
+        state = self.__dict__.copy()
+        state["image_augmentation_function"] = None
+        return state
+
+    def _storage_tensors(self) -> list[torch.Tensor]:
+        tensors = [*self.states.values(), self.actions, self.rewards, self.dones, self.truncateds]
+        if not self.optimize_memory:
+            tensors.extend(self.next_states.values())
+        tensors.extend(self.complementary_info.values())
+        return tensors
+
+    def share_memory(self) -> "ReplayBuffer":
+        """
+        Moves the storage and the write position to shared memory, in place. Processes receiving this buffer
+        (e.g. through a `torch.multiprocessing` queue or as a DataLoader dataset) then read the transitions
+        added afterwards without any copy. Storage allocated later, with the first transition, is directly
+        allocated in shared memory.
+        """
+        if torch.device(self.storage_device).type != "cpu":
+            raise ValueError(
+                f"Shared memory requires a 'cpu' storage device, but the storage device is {self.storage_device}."
+            )
+
+        self.shared_memory = True
+        self._counters.share_memory_()
+        self.episode_ends.share_memory_()
+        if self.initialized:
+            for tensor in self._storage_tensors():
+                tensor.share_memory_()
+        return self
+
     def _initialize_storage(
         self,
         state: dict[str, torch.Tensor],
@@ -183,6 +240,10 @@ class ReplayBuffer:
 
         self.initialized = True
 
+        if self.shared_memory:
+            for tensor in self._storage_tensors():
+                tensor.share_memory_()
+
     def __len__(self):
         return self.size
 
@@ -201,18 +262,20 @@ class ReplayBuffer:
         if not self.initialized:
             self._initialize_storage(state=state, action=action, complementary_info=complementary_info)
 
+        position = self.position
+
         # Store the transition in pre-allocated tensors
         for key in self.states:
-            self.states[key][self.position].copy_(state[key].squeeze(dim=0))
+            self.states[key][position].copy_(state[key].squeeze(dim=0))
 
             if not self.optimize_memory:
                 # Only store next_states if not optimizing memory
-                self.next_states[key][self.position].copy_(next_state[key].squeeze(dim=0))
+                self.next_states[key][position].copy_(next_state[key].squeeze(dim=0))
 
-        self.actions[self.position].copy_(action.squeeze(dim=0))
-        self.rewards[self.position] = reward
-        self.dones[self.position] = done
-        self.truncateds[self.position] = truncated
+        self.actions[position].copy_(action.squeeze(dim=0))
+        self.rewards[position] = reward
+        self.dones[position] = done
+        self.truncateds[position] = truncated
 
         # Handle complementary_info if provided and storage is initialized
         if complementary_info is not None and self.has_complementary_info:
@@ -221,42 +284,139 @@ class ReplayBuffer:
                 if key in complementary_info:
                     value = complementary_info[key]
                     if isinstance(value, torch.Tensor):
-                        self.complementary_info[key][self.position].copy_(value.squeeze(dim=0))
+                        self.complementary_info[key][position].copy_(value.squeeze(dim=0))
                     elif isinstance(value, (int, float)):
-                        self.complementary_info[key][self.position] = value
+                        self.complementary_info[key][position] = value
 
-        self.position = (self.position + 1) % self.capacity
-        self.size = min(self.size + 1, self.capacity)
+        # The counters are updated once the transition is written, so that sampler processes reading them
+        # never sample a slot that is not filled yet
+        self._advance(1)
+
+    def add_batch(
+        self,
+        state: dict[str, torch.Tensor],
+        action: torch.Tensor,
+        reward: torch.Tensor,
+        next_state: dict[str, torch.Tensor],
+        done: torch.Tensor,
+        truncated: torch.Tensor,
+        complementary_info: dict[str, torch.Tensor] | None = None,
+    ):
+        """
+        Saves a block of transitions, stacked along the first dimension (see `stack_transitions`). Each key
+        is written with a single slice copy (two when the block wraps around the end of the buffer).
+        """
+        num_transitions = action.shape[0]
+        if num_transitions == 0:
+            return
+
+        # Initialize storage from the first transition of the block
+        if not self.initialized:
+            self._initialize_storage(
+                state={key: val[:1] for key, val in state.items()},
+                action=action[:1],
+                complementary_info=(
+                    {key: val[:1] for key, val in complementary_info.items()}
+                    if complementary_info is not None
+                    else None
+                ),
+            )
+
+        # Only the last `capacity` transitions would remain in the buffer
+        start = max(0, num_transitions - self.capacity)
+        num_written = num_transitions - start
+        position = (self.position + start) % self.capacity
+        # Number of transitions written before wrapping around the end of the buffer
+        num_before_wrap = min(num_written, self.capacity - position)
+
+        def write(storage: torch.Tensor, values: torch.Tensor):
+            values = values[start:]
+            storage[position : position + num_before_wrap].copy_(values[:num_before_wrap])
+            if num_before_wrap < num_written:
+                storage[: num_written - num_before_wrap].copy_(values[num_before_wrap:])
+
+        for key in self.states:
+            write(self.states[key], state[key])
+            if not self.optimize_memory:
+                # Only store next_states if not optimizing memory
+                write(self.next_states[key], next_state[key])
+
+        write(self.actions, action)
+        write(self.rewards, reward)
+        write(self.dones, done)
+        write(self.truncateds, truncated)
+
+        if complementary_info is not None and self.has_complementary_info:
+            for key in self.complementary_info_keys:
+                if key in complementary_info:
+                    write(self.complementary_info[key], complementary_info[key])
+
+        # The counters are updated once the transitions are written, see `add`
+        self._advance(num_transitions)
 
     def sample(self, batch_size: int) -> BatchTransition:
         """Sample a random batch of transitions and collate them into batched tensors."""
         if not self.initialized:
             raise RuntimeError("Cannot sample from an empty buffer. Add transitions first.")
 
-        batch_size = min(batch_size, self.size)
-        high = max(0, self.size - 1) if self.optimize_memory and self.size < self.capacity else self.size
+        return self._process_batch(self._sample_from_storage(batch_size))
+
+    def _sample_from_storage(self, batch_size: int) -> BatchTransition:
+        """Gathers a random batch of transitions, on the storage device."""
+        # Read the size once, it may be updated concurrently by the process adding transitions
+        size = self.size
+        batch_size = min(batch_size, size)
+        high = max(0, size - 1) if self.optimize_memory and size < self.capacity else size
 
         # Random indices for sampling - create on the same device as storage
         idx = torch.randint(low=0, high=high, size=(batch_size,), device=self.storage_device)
 
-        # Identify image keys that need augmentation
-        image_keys = [k for k in self.states if k.startswith("observation.image")] if self.use_drq else []
-
         # Create batched state and next_state
         batch_state = {}
         batch_next_state = {}
 
-        # First pass: load all state tensors to target device
         for key in self.states:
-            batch_state[key] = self.states[key][idx].to(self.device)
+            batch_state[key] = self.states[key][idx]
 
             if not self.optimize_memory:
                 # Standard approach - load next_states directly
-                batch_next_state[key] = self.next_states[key][idx].to(self.device)
+                batch_next_state[key] = self.next_states[key][idx]
             else:
                 # Memory-optimized approach - get next_state from the next index
                 next_idx = (idx + 1) % self.capacity
-                batch_next_state[key] = self.states[key][next_idx].to(self.device)
+                batch_next_state[key] = self.states[key][next_idx]
+
+        # Sample complementary_info if available
+        batch_complementary_info = None
+        if self.has_complementary_info:
+            batch_complementary_info = {}
+            for key in self.complementary_info_keys:
+                batch_complementary_info[key] = self.complementary_info[key][idx]
+
+        return BatchTransition(
+            state=batch_state,
+            action=self.actions[idx],
+            reward=self.rewards[idx],
+            next_state=batch_next_state,
+            done=self.dones[idx],
+            truncated=self.truncateds[idx],
+            complementary_info=batch_complementary_info,
+        )
+
+    def _process_batch(self, batch: BatchTransition, non_blocking: bool = False) -> BatchTransition:
+        """Moves a batch gathered from the storage to the sampling device, and applies image augmentation."""
+        batch_size = batch["action"].shape[0]
+
+        # Identify image keys that need augmentation
+        image_keys = [k for k in self.states if k.startswith("observation.image")] if self.use_drq else []
+
+        # First pass: load all state tensors to target device
+        batch_state = {
+            key: val.to(self.device, non_blocking=non_blocking) for key, val in batch["state"].items()
+        }
+        batch_next_state = {
+            key: val.to(self.device, non_blocking=non_blocking) for key, val in batch["next_state"].items()
+        }
 
         # Apply image augmentation in a batched way if needed
         if self.use_drq and image_keys:
@@ -280,17 +440,17 @@ class ReplayBuffer:
                 batch_next_state[key] = augmented_images[(i * 2 + 1) * batch_size : (i + 1) * 2 * batch_size]
 
         # Sample other tensors
-        batch_actions = self.actions[idx].to(self.device)
-        batch_rewards = self.rewards[idx].to(self.device)
-        batch_dones = self.dones[idx].to(self.device).float()
-        batch_truncateds = self.truncateds[idx].to(self.device).float()
+        batch_actions = batch["action"].to(self.device, non_blocking=non_blocking)
+        batch_rewards = batch["reward"].to(self.device, non_blocking=non_blocking)
+        batch_dones = batch["done"].to(self.device, non_blocking=non_blocking).float()
+        batch_truncateds = batch["truncated"].to(self.device, non_blocking=non_blocking).float()
 
-        # Sample complementary_info if available
         batch_complementary_info = None
-        if self.has_complementary_info:
-            batch_complementary_info = {}
-            for key in self.complementary_info_keys:
-                batch_complementary_info[key] = self.complementary_info[key][idx].to(self.device)
+        if batch["complementary_info"] is not None:
+            batch_complementary_info = {
+                key: val.to(self.device, non_blocking=non_blocking)
+                for key, val in batch["complementary_info"].items()
+            }
 
         return BatchTransition(
             state=batch_state,
@@ -307,6 +467,7 @@ class ReplayBuffer:
         batch_size: int,
         async_prefetch: bool = True,
         queue_size: int = 2,
+        num_workers: int = 0,
     ):
         """
         Creates an infinite iterator that yields batches of transitions.
@@ -316,12 +477,19 @@ class ReplayBuffer:
             batch_size (int): Size of batches to sample
             async_prefetch (bool): Whether to use asynchronous prefetching with threads (default: True)
             queue_size (int): Number of batches to prefetch (default: 2)
+            num_workers (int): Number of sampler processes. If > 0, batches are gathered from the storage in
+                shared memory by these processes and pinned before being moved to `device`, instead of being
+                sampled by a thread of this process (default: 0)
 
         Yields:
             BatchTransition: Batched transitions
         """
         while True:  # Create an infinite loop
-            if async_prefetch:
+            if num_workers > 0:
+                iterator = self._get_multiprocess_iterator(
+                    batch_size=batch_size, queue_size=queue_size, num_workers=num_workers
+                )
+            elif async_prefetch:
                 # Get the standard iterator
                 iterator = self._get_async_iterator(queue_size=queue_size, batch_size=batch_size)
             else:
@@ -385,6 +553,38 @@ class ReplayBuffer:
             # Give the producer thread a bit of time to finish.
             producer_thread.join(timeout=1.0)
 
+    def _get_multiprocess_iterator(self, batch_size: int, queue_size: int = 2, num_workers: int = 1):
+        """
+        Create an iterator that yields batches gathered by `num_workers` sampler processes.
+
+        The storage is moved to shared memory, so that the sampler processes read the transitions added by this
+        process while they are running. The batches are pinned in a background thread of this process (as done
+        by the DataLoader), so that the copy to `device` is asynchronous. The image augmentation is applied on
+        `device`, in this process.
+
+        Args:
+            batch_size (int): Size of batches to sample.
+            queue_size (int): Number of batches prefetched by each sampler process.
+            num_workers (int): Number of sampler processes.
+
+        Yields:
+            BatchTransition: A batch sampled from the replay buffer.
+        """
+        if not self.initialized:
+            raise RuntimeError("Cannot sample from an empty buffer. Add transitions first.")
+
+        self.share_memory()
+        pin_memory = torch.device(self.device).type == "cuda"
+        dataloader = torch.utils.data.DataLoader(
+            _ReplayBufferSampler(self, batch_size),
+            batch_size=None,
+            num_workers=num_workers,
+            prefetch_factor=queue_size,
+            pin_memory=pin_memory,
+        )
+        for batch in dataloader:
+            yield self._process_batch(batch, non_blocking=pin_memory)
+
     def _get_naive_iterator(self, batch_size: int, queue_size: int = 2):
         """
         Creates a simple non-threaded iterator that yields batches.
@@ -743,6 +943,18 @@ class ReplayBuffer:
         return transitions
 
 
+class _ReplayBufferSampler(torch.utils.data.IterableDataset):
+    """Infinite stream of batches gathered from the storage of a replay buffer, for the sampler processes."""
+
+    def __init__(self, replay_buffer: ReplayBuffer, batch_size: int):
+        self.replay_buffer = replay_buffer
+        self.batch_size = batch_size
+
+    def __iter__(self):
+        while True:
+            yield self.replay_buffer._sample_from_storage(self.batch_size)
+
+
 # Utility function to guess shapes/dtypes from a tensor
 def guess_feature_info(t, name: str):
     """
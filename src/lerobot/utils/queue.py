@@ -15,6 +15,7 @@
 # limitations under the License.
 
 import platform
+from collections.abc import Callable
 from contextlib import suppress
 from queue import Empty
 from typing import Any
@@ -50,3 +51,41 @@ def get_last_item_from_queue(queue: Queue, block=True, timeout: float = 0.1) ->
             item = queue.get_nowait()
 
     return item
+
+
+def get_last_items_from_queue(
+    queue: Queue, keep: Callable[[Any], bool], block=True, timeout: float = 0.1
+) -> list[Any]:
+    """Drain the queue like `get_last_item_from_queue`, without dropping the most recent item matching `keep`.
+
+    This is needed when the most recent item depends on an older one, e.g. a parameters delta on the snapshot it
+    was computed against. Returns the most recent item matching `keep` if it is not the most recent item,
+    followed by the most recent item.
+    """
+    items = []
+
+    def add(item):
+        nonlocal items
+        # Only the most recent kept item is needed along with the most recent item
+        items = [items[0], item] if items and keep(items[0]) and not keep(item) else [item]
+
+    if block:
+        try:
+            add(queue.get(timeout=timeout))
+        except Empty:
+            return []
+
+    if platform.system() == "Darwin":
+        # On Mac, avoid using `qsize` due to unreliable implementation.
+        try:
+            while True:
+                add(queue.get_nowait())
+        except Empty:
+            pass
+        return items
+
+    while queue.qsize() > 0:
+        with suppress(Empty):
+            add(queue.get_nowait())
+
+    return items
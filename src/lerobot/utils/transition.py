@@ -29,6 +29,102 @@ class Transition(TypedDict):
     complementary_info: dict[str, torch.Tensor | float | int] | None = None
 
 
+class BatchTransition(TypedDict):
+    state: dict[str, torch.Tensor]
+    action: torch.Tensor
+    reward: torch.Tensor
+    next_state: dict[str, torch.Tensor]
+    done: torch.Tensor
+    truncated: torch.Tensor
+    complementary_info: dict[str, torch.Tensor | float | int] | None = None
+
+
+def _stack_values(values: list) -> torch.Tensor:
+    # Like `ReplayBuffer.add`, drop the batch dimension of single transitions
+    return torch.stack([torch.as_tensor(value).squeeze(0) for value in values])
+
+
+def stack_transitions(transitions: list[Transition]) -> BatchTransition:
+    """
+    Collates a list of transitions into a single block, with one tensor per key and the transitions along the
+    first dimension. Values of `complementary_info` are only kept if they are numbers or tensors and present in
+    all the transitions, since the replay buffer can't store the others.
+    """
+    if len(transitions) == 0:
+        raise ValueError("Cannot stack an empty list of transitions.")
+
+    complementary_info = None
+    if transitions[0].get("complementary_info") is not None:
+        keys = [
+            key
+            for key, value in transitions[0]["complementary_info"].items()
+            if isinstance(value, (torch.Tensor, int, float, bool))
+            and all(key in (t.get("complementary_info") or {}) for t in transitions)
+        ]
+        complementary_info = {
+            key: _stack_values([t["complementary_info"][key] for t in transitions]) for key in keys
+        }
+
+    return BatchTransition(
+        state={key: _stack_values([t["state"][key] for t in transitions]) for key in transitions[0]["state"]},
+        action=_stack_values([t["action"] for t in transitions]),
+        reward=_stack_values([t["reward"] for t in transitions]).float(),
+        next_state={
+            key: _stack_values([t["next_state"][key] for t in transitions])
+            for key in transitions[0]["next_state"]
+        },
+        done=_stack_values([t["done"] for t in transitions]).bool(),
+        truncated=_stack_values([t.get("truncated", False) for t in transitions]).bool(),
+        complementary_info=complementary_info,
+    )
+
+
+def unstack_transitions(batch: BatchTransition) -> list[Transition]:
+    """Splits a block of transitions made by `stack_transitions` into a list of transitions."""
+    transitions = []
+    for i in range(batch["action"].shape[0]):
+        complementary_info = None
+        if batch.get("complementary_info") is not None:
+            complementary_info = {key: val[i] for key, val in batch["complementary_info"].items()}
+        transitions.append(
+            Transition(
+                state={key: val[i] for key, val in batch["state"].items()},
+                action=batch["action"][i],
+                reward=batch["reward"][i],
+                next_state={key: val[i] for key, val in batch["next_state"].items()},
+                done=batch["done"][i],
+                truncated=batch["truncated"][i],
+                complementary_info=complementary_info,
+            )
+        )
+    return transitions
+
+
+def index_transitions(batch: BatchTransition, index: torch.Tensor) -> BatchTransition:
+    """Selects the transitions at `index` (indices or boolean mask) in a block of transitions."""
+    complementary_info = None
+    if batch.get("complementary_info") is not None:
+        complementary_info = {key: val[index] for key, val in batch["complementary_info"].items()}
+    return BatchTransition(
+        state={key: val[index] for key, val in batch["state"].items()},
+        action=batch["action"][index],
+        reward=batch["reward"][index],
+        next_state={key: val[index] for key, val in batch["next_state"].items()},
+        done=batch["done"][index],
+        truncated=batch["truncated"][index],
+        complementary_info=complementary_info,
+    )
+
+
+def find_nan_transitions(batch: BatchTransition) -> torch.Tensor:
+    """Boolean mask of the transitions of a block with NaN values in their state, action or next state."""
+    nan_mask = torch.zeros(batch["action"].shape[0], dtype=torch.bool, device=batch["action"].device)
+    for tensor in [*batch["state"].values(), batch["action"], *batch["next_state"].values()]:
+        if tensor.is_floating_point():
+            nan_mask |= torch.isnan(tensor.reshape(tensor.shape[0], -1)).any(dim=1)
+    return nan_mask
+
+
 def move_transition_to_device(transition: Transition, device: str = "cpu") -> Transition:
     device = torch.device(device)
     non_blocking = device.type == "cuda"
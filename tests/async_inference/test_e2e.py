@@ -30,7 +30,6 @@ end-to-end using real (but lightweight) protocol messages.
 from __future__ import annotations
 
 import threading
-from concurrent import futures
 
 import pytest
 import torch
@@ -46,17 +45,12 @@ pytest.importorskip("grpc")
 def test_async_inference_e2e(monkeypatch):
     """Tests the full asynchronous inference pipeline."""
     # Import grpc-dependent modules inside the test function
-    import grpc
-
     from lerobot.robots.utils import make_robot_from_config
     from lerobot.scripts.server.configs import PolicyServerConfig, RobotClientConfig
     from lerobot.scripts.server.helpers import map_robot_keys_to_lerobot_features
-    from lerobot.scripts.server.policy_server import PolicyServer
+    from lerobot.scripts.server.policy_server import PolicyServer, make_grpc_server
     from lerobot.scripts.server.robot_client import RobotClient
-    from lerobot.transport import (
-        services_pb2,  # type: ignore
-        services_pb2_grpc,  # type: ignore
-    )
+    from lerobot.transport import services_pb2  # type: ignore
     from tests.mocks.mock_robot import MockRobotConfig
 
     # Create a stub policy similar to test_policy_server.py
@@ -117,13 +111,9 @@ def test_async_inference_e2e(monkeypatch):
 
     monkeypatch.setattr(PolicyServer, "SendPolicyInstructions", _fake_send_policy_instructions, raising=True)
 
-    # Build gRPC server running a PolicyServer
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="policy_server"))
-    services_pb2_grpc.add_AsyncInferenceServicer_to_server(policy_server, server)
-
-    # Use the host/port specified in the fixture's config
+    # Build gRPC server running a PolicyServer, on the host/port specified in the fixture's config
+    server = make_grpc_server(policy_server)
     server_address = f"{policy_server.config.host}:{policy_server.config.port}"
-    server.add_insecure_port(server_address)
     server.start()
 
     # ------------------------------------------------------------------
@@ -165,7 +155,9 @@ def test_async_inference_e2e(monkeypatch):
     server.wait_for_termination(timeout=5)
 
     assert action_chunks_received["count"] > 0, "Client did not receive any action chunks"
-    assert len(policy_server._predicted_timesteps) > 0, "Server did not record any predicted timesteps"
+    assert any(len(session.predicted_timesteps) > 0 for session in policy_server.sessions.values()), (
+        "Server did not record any predicted timesteps"
+    )
 
     # ------------------------------------------------------------------
     # 4. Stop the system
@@ -17,12 +17,15 @@ import pickle
 import time
 
 import numpy as np
+import pytest
 import torch
 
 from lerobot.configs.types import FeatureType, PolicyFeature
 from lerobot.scripts.server.helpers import (
     FPSTracker,
+    ObservationPreprocessor,
     TimedAction,
+    TimedActionQueue,
     TimedObservation,
     observations_similar,
     prepare_image,
@@ -202,6 +205,39 @@ def test_observations_similar_true():
     assert not observations_similar(obs1, obs3, lerobot_features, atol=2.0)
 
 
+def test_observations_similar_images():
+    """With image_atol set, a change in the scene makes observations different even if the state is not."""
+    lerobot_features = {
+        "observation.state": {
+            "dtype": "float32",
+            "shape": [4],
+            "names": ["shoulder", "elbow", "wrist", "gripper"],
+        }
+    }
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(96, 128, 3), dtype=np.uint8)
+    # Sensor noise is averaged out by the thumbnails
+    noisy_frame = np.clip(frame.astype(int) + rng.integers(-8, 9, size=frame.shape), 0, 255).astype(np.uint8)
+    moved_frame = frame.copy()
+    moved_frame[:48, :64] = 255
+
+    obs1 = _make_obs(torch.zeros(4))
+    obs1.observation["laptop"] = frame
+    obs2 = _make_obs(torch.zeros(4))
+    obs2.observation["laptop"] = noisy_frame
+    obs3 = _make_obs(torch.zeros(4))
+    obs3.observation["laptop"] = moved_frame
+
+    assert observations_similar(obs1, obs3, lerobot_features, atol=2.0)
+    assert observations_similar(obs1, obs2, lerobot_features, atol=2.0, image_atol=0.02)
+    assert not observations_similar(obs1, obs3, lerobot_features, atol=2.0, image_atol=0.02)
+
+    # Thumbnails are computed once per observation
+    thumbnails = obs1.get_thumbnails()
+    assert thumbnails["laptop"].shape == (16, 16)
+    assert obs1.get_thumbnails() is thumbnails
+
+
 # ---------------------------------------------------------------------
 # raw_observation_to_observation and helpers
 # ---------------------------------------------------------------------
@@ -421,6 +457,38 @@ def test_raw_observation_to_observation_deterministic():
             assert obs1[key] == obs2[key]
 
 
+@pytest.mark.parametrize(
+    "device",
+    ["cpu", pytest.param("cuda", marks=pytest.mark.skipif(not torch.cuda.is_available(), reason="no GPU"))],
+)
+@pytest.mark.parametrize("pin_memory", [True, False])
+def test_observation_preprocessor_matches_per_image_processing(device, pin_memory):
+    """Cameras resized as a batch match the images resized one at a time, across reused buffers."""
+    lerobot_features = _create_mock_lerobot_features()
+    policy_image_features = _create_mock_policy_image_features()
+    lerobot_features["observation.images.top"] = dict(lerobot_features["observation.images.laptop"])
+    policy_image_features["observation.images.top"] = policy_image_features["observation.images.laptop"]
+    preprocessor = ObservationPreprocessor(lerobot_features, policy_image_features, device, pin_memory)
+
+    for _ in range(2):
+        robot_obs = _create_mock_robot_observation()
+        robot_obs["top"] = np.random.randint(0, 256, size=robot_obs["laptop"].shape, dtype=np.uint8)
+
+        observation = preprocessor(robot_obs)
+        expected = prepare_raw_observation(robot_obs, lerobot_features, policy_image_features)
+
+        torch.testing.assert_close(observation["observation.state"].cpu(), expected["observation.state"])
+        for key in ["observation.images.laptop", "observation.images.phone", "observation.images.top"]:
+            image = observation[key]
+            assert image.shape == (1, *policy_image_features[key].shape)
+            assert image.dtype == torch.float32
+            assert image.is_contiguous()
+            # Images resized as uint8 are rounded to the nearest integer
+            torch.testing.assert_close(
+                image.cpu(), prepare_image(expected[key]).unsqueeze(0), atol=1 / 255, rtol=0
+            )
+
+
 def test_image_processing_pipeline_preserves_content():
     """Test that the image processing pipeline preserves recognizable patterns."""
     # Create an image with a specific pattern
@@ -457,3 +525,60 @@ def test_image_processing_pipeline_preserves_content():
     corner_val = processed_img[:, 5, 5].mean()  # Corner
 
     assert center_val > corner_val, "Image processing should preserve recognizable patterns"
+
+
+# ---------------------------------------------------------------------
+# TimedActionQueue
+# ---------------------------------------------------------------------
+
+
+def _merge_chunk(
+    queue: TimedActionQueue, first_timestep: int, values: list[float], latest_action: int, **kwargs
+):
+    actions = torch.tensor(values, dtype=torch.float32)[:, None].repeat(1, 2)
+    timestamps = torch.arange(len(values), dtype=torch.float64) + first_timestep
+    queue.merge(first_timestep, actions, timestamps, latest_action=latest_action, **kwargs)
+
+
+def test_timed_action_queue_put_and_get_wraps_around():
+    queue = TimedActionQueue()
+    for t in range(3):
+        queue.put(TimedAction(timestamp=float(t), timestep=t, action=torch.full((2,), float(t))))
+
+    assert queue.get_nowait().get_timestep() == 0
+    # The buffer is full: the next action wraps around to the freed slot
+    queue.put(TimedAction(timestamp=3.0, timestep=3, action=torch.full((2,), 3.0)))
+    queue.put(TimedAction(timestamp=4.0, timestep=4, action=torch.full((2,), 4.0)))
+
+    assert queue.timesteps == [1, 2, 3, 4]
+    timed_actions = [queue.get_nowait() for _ in range(4)]
+    assert [ta.get_timestep() for ta in timed_actions] == [1, 2, 3, 4]
+    assert [ta.get_action()[0].item() for ta in timed_actions] == [1.0, 2.0, 3.0, 4.0]
+    assert queue.empty()
+
+    queue.put(TimedAction(timestamp=0.0, timestep=10, action=torch.zeros(2)))
+    with pytest.raises(ValueError):
+        queue.put(TimedAction(timestamp=0.0, timestep=12, action=torch.zeros(2)))
+
+
+def test_timed_action_queue_merge():
+    queue = TimedActionQueue()
+    _merge_chunk(queue, 0, [10, 10, 10, 10], latest_action=-1)
+    queue.get_nowait()
+
+    # Timesteps 2..3 overlap with the queue, 0 was already performed and 1 is discarded
+    _merge_chunk(queue, 0, [0, 0, 20, 20, 20], latest_action=1, aggregate_fn=lambda old, new: (old + new) / 2)
+
+    assert queue.timesteps == [2, 3, 4]
+    assert [ta.get_action()[0].item() for ta in queue.timed_actions()] == [15.0, 15.0, 20.0]
+
+
+def test_timed_action_queue_temporal_ensembling():
+    coeff = 0.5
+    queue = TimedActionQueue(temporal_ensemble_coeff=coeff)
+    for value in [1.0, 2.0, 4.0]:
+        _merge_chunk(queue, 0, [value], latest_action=-1)
+
+    weights = np.exp(-coeff * np.arange(3))
+    expected = (weights * [1.0, 2.0, 4.0]).sum() / weights.sum()
+    assert math.isclose(queue.get_nowait().get_action()[0].item(), expected, rel_tol=1e-5)
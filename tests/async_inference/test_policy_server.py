@@ -18,6 +18,7 @@ Monkey-patch the `policy` attribute with a stub so that no real model inference
 from __future__ import annotations
 
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 import torch
@@ -49,6 +50,10 @@ class MockPolicy:
 
     def __init__(self):
         self.config = self._Config()
+        self.num_resets = 0
+
+    def reset(self):
+        self.num_resets += 1
 
     def to(self, *args, **kwargs):
         # The server calls `policy.to(device)`. This stub ignores it.
@@ -141,51 +146,58 @@ def test_time_action_chunk(policy_server):
 
 def test_maybe_enqueue_observation_must_go(policy_server):
     """An observation with `must_go=True` is always enqueued."""
+    session = policy_server.get_session("client")
     obs = _make_obs(torch.zeros(6), must_go=True)
-    assert policy_server._enqueue_observation(obs) is True
-    assert policy_server.observation_queue.qsize() == 1
-    assert policy_server.observation_queue.get_nowait() is obs
+    assert policy_server._enqueue_observation(session, obs) is True
+    assert session.observation_queue.qsize() == 1
+    assert session.observation_queue.get_nowait() is obs
 
 
 def test_maybe_enqueue_observation_dissimilar(policy_server):
     """A dissimilar observation (not `must_go`) is enqueued."""
+    session = policy_server.get_session("client")
     # Set a last predicted observation.
-    policy_server.last_processed_obs = _make_obs(torch.zeros(6))
+    session.last_processed_obs = _make_obs(torch.zeros(6))
     # Create a new, dissimilar observation.
     new_obs = _make_obs(torch.ones(6) * 5)  # High norm difference
 
-    assert policy_server._enqueue_observation(new_obs) is True
-    assert policy_server.observation_queue.qsize() == 1
+    assert policy_server._enqueue_observation(session, new_obs) is True
+    assert session.observation_queue.qsize() == 1
 
 
 def test_maybe_enqueue_observation_is_skipped(policy_server):
     """A similar observation (not `must_go`) is skipped."""
+    session = policy_server.get_session("client")
     # Set a last predicted observation.
-    policy_server.last_processed_obs = _make_obs(torch.zeros(6))
+    session.last_processed_obs = _make_obs(torch.zeros(6))
     # Create a new, very similar observation.
     new_obs = _make_obs(torch.zeros(6) + 1e-4)
 
-    assert policy_server._enqueue_observation(new_obs) is False
-    assert policy_server.observation_queue.empty() is True
+    assert policy_server._enqueue_observation(session, new_obs) is False
+    assert session.observation_queue.empty() is True
 
 
 def test_obs_sanity_checks(policy_server):
     """Unit-test the private `_obs_sanity_checks` helper."""
+    session = policy_server.get_session("client")
     prev = _make_obs(torch.zeros(6), timestep=0)
 
     # Case 1 – timestep already predicted
-    policy_server._predicted_timesteps.add(1)
+    session.predicted_timesteps.add(1)
     obs_same_ts = _make_obs(torch.ones(6), timestep=1)
-    assert policy_server._obs_sanity_checks(obs_same_ts, prev) is False
+    assert policy_server._obs_sanity_checks(session, obs_same_ts, prev) is False
 
     # Case 2 – observation too similar
-    policy_server._predicted_timesteps.clear()
+    session.predicted_timesteps.clear()
     obs_similar = _make_obs(torch.zeros(6) + 1e-4, timestep=2)
-    assert policy_server._obs_sanity_checks(obs_similar, prev) is False
+    assert policy_server._obs_sanity_checks(session, obs_similar, prev) is False
 
     # Case 3 – genuinely new & dissimilar observation passes
     obs_ok = _make_obs(torch.ones(6) * 5, timestep=3)
-    assert policy_server._obs_sanity_checks(obs_ok, prev) is True
+    assert policy_server._obs_sanity_checks(session, obs_ok, prev) is True
+
+    # Sessions of other clients are independent
+    assert policy_server._obs_sanity_checks(policy_server.get_session("other"), obs_same_ts, prev) is True
 
 
 def test_predict_action_chunk(monkeypatch, policy_server):
@@ -213,3 +225,151 @@ def test_predict_action_chunk(monkeypatch, policy_server):
     for i, ta in enumerate(timed_actions):
         expected_ts = obs.get_timestamp() + i * policy_server.config.environment_dt
         assert abs(ta.get_timestamp() - expected_ts) < 1e-6
+
+
+def test_batched_inference_across_clients(policy_server):
+    """Observations submitted concurrently by several clients are run as a single batch."""
+    policy_server.config.max_batch_size = 3
+    policy_server.config.max_batch_wait_s = 1.0
+
+    batch_sizes = []
+    get_action_chunk = policy_server._get_action_chunk
+
+    def _counting_get_action_chunk(observation):
+        batch_sizes.append(len(observation["observation.state"]))
+        # Actions are the state of the observation they are predicted from
+        return get_action_chunk(observation) + observation["observation.state"][:, None, :]
+
+    policy_server._get_action_chunk = _counting_get_action_chunk
+
+    observations = [_make_obs(torch.full((6,), float(i)), timestep=i) for i in range(3)]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        action_chunks = list(executor.map(policy_server._run_inference, observations))
+    policy_server.stop()
+
+    assert batch_sizes == [3]
+    for i, action_chunk in enumerate(action_chunks):
+        assert len(action_chunk) == policy_server.actions_per_chunk
+        assert action_chunk[0].get_timestep() == i
+        assert torch.all(action_chunk[0].get_action() == i)
+
+
+class _MockContext:
+    """Minimal stand-in for a gRPC servicer context."""
+
+    def __init__(self, peer: str):
+        self._peer = peer
+        self.active = True
+
+    def peer(self) -> str:
+        return self._peer
+
+    def is_active(self) -> bool:
+        return self.active
+
+    def abort(self, code, details: str):
+        # Like gRPC, aborting ends the request with an exception
+        raise RuntimeError(f"{code}: {details}")
+
+
+def test_stream_actions(policy_server):
+    """`StreamActions` pushes one action chunk per processed observation, without a request per chunk."""
+    from lerobot.scripts.server.serialization import bytes_to_timed_actions
+
+    policy_server.config.inference_latency = 0
+    policy_server.config.obs_queue_timeout = 0.05
+    context = _MockContext("client")
+    session = policy_server.get_session(context.peer())
+    stream = policy_server.StreamActions(None, context)
+
+    for timestep in (3, 4):
+        obs = _make_obs(torch.ones(6) * timestep, timestep=timestep, must_go=True)
+        assert policy_server._enqueue_observation(session, obs)
+
+        timed_actions = bytes_to_timed_actions(next(stream).data)
+        assert len(timed_actions) == policy_server.actions_per_chunk
+        assert timed_actions[0].get_timestep() == timestep
+
+    assert session.predicted_timesteps == {3, 4}
+
+    # The stream ends once the client goes away, evicting its session
+    context.active = False
+    with pytest.raises(StopIteration):
+        next(stream)
+    assert context.peer() not in policy_server.sessions
+
+
+@pytest.mark.timeout(10)  # force cross-platform watchdog
+def test_action_streams_leave_workers_for_observations(policy_server):
+    """Clients beyond `max_clients` can't open action streams, so that the streams of the other clients never
+    take all the workers of the gRPC server and observations are still received."""
+    import socket
+
+    import grpc
+
+    from lerobot.scripts.server.policy_server import make_grpc_server
+    from lerobot.scripts.server.serialization import bytes_to_timed_actions, timed_observation_to_bytes
+    from lerobot.transport import services_pb2, services_pb2_grpc
+    from lerobot.transport.utils import send_bytes_in_chunks
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("localhost", 0))
+        policy_server.config.port = s.getsockname()[1]
+    policy_server.config.max_clients = 1
+    policy_server.config.inference_latency = 0
+    policy_server.config.obs_queue_timeout = 0.05
+    server = make_grpc_server(policy_server)
+    server.start()
+
+    address = f"localhost:{policy_server.config.port}"
+    channels = [grpc.insecure_channel(address) for _ in range(policy_server.config.num_rpc_workers + 1)]
+    stubs = [services_pb2_grpc.AsyncInferenceStub(channel) for channel in channels]
+    try:
+        stream = stubs[0].StreamActions(services_pb2.Empty())
+        while policy_server._num_streams == 0:
+            time.sleep(0.01)
+
+        # More streams than the server has workers
+        for stub in stubs[1:]:
+            with pytest.raises(grpc.RpcError) as exc_info:
+                next(stub.StreamActions(services_pb2.Empty()))
+            assert exc_info.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+
+        obs = _make_obs(torch.ones(6), timestep=5, must_go=True)
+        stubs[0].SendObservations(
+            send_bytes_in_chunks(timed_observation_to_bytes(obs), services_pb2.Observation), timeout=2
+        )
+        timed_actions = bytes_to_timed_actions(next(stream).data)
+        assert timed_actions[0].get_timestep() == 5
+
+        stream.cancel()
+    finally:
+        for channel in channels:
+            channel.close()
+        server.stop(grace=None)
+
+
+def test_stateful_policy_serves_one_client(policy_server):
+    """A policy keeping state between calls is reset for each client, and never shared between clients."""
+    policy_server.policy_type = "diffusion"
+    first_client, second_client = _MockContext("first"), _MockContext("second")
+
+    policy_server.Ready(None, first_client)
+    assert policy_server.policy.num_resets == 1
+    with pytest.raises(RuntimeError, match="one client at a time"):
+        policy_server.Ready(None, second_client)
+
+    policy_server.evict_session(policy_server.get_session(first_client.peer()))
+    policy_server.Ready(None, second_client)
+    assert policy_server.policy.num_resets == 2
+    assert list(policy_server.sessions) == [second_client.peer()]
+
+
+def test_idle_sessions_evicted(policy_server):
+    """The sessions of clients that stopped sending requests are evicted."""
+    policy_server.config.session_timeout_s = 0.05
+    policy_server.get_session("gone")
+    time.sleep(0.1)
+    policy_server.get_session("active")
+
+    assert list(policy_server.sessions) == ["active"]
@@ -20,11 +20,12 @@ no real hardware is accessed. Only the queue-update mechanism is verified.
 from __future__ import annotations
 
 import time
-from queue import Queue
 
 import pytest
 import torch
 
+from lerobot.scripts.server.helpers import TimedActionQueue
+
 # Skip entire module if grpc is not available
 pytest.importorskip("grpc")
 
@@ -102,7 +103,7 @@ def test_update_action_queue_discards_stale(robot_client):
     robot_client._aggregate_action_queues(incoming)
 
     # Extract timesteps from queue
-    resulting_timesteps = [a.get_timestep() for a in robot_client.action_queue.queue]
+    resulting_timesteps = [a.get_timestep() for a in robot_client.action_queue.timed_actions()]
 
     assert resulting_timesteps == [5, 6, 7]
 
@@ -153,7 +154,7 @@ def test_aggregate_action_queues_combines_actions_in_overlap(
 
     queue_overlap_actions = []
     queue_non_overlap_actions = []
-    for a in robot_client.action_queue.queue:
+    for a in robot_client.action_queue.timed_actions():
         if a.get_timestep() in overlap_timesteps:
             queue_overlap_actions.append(a)
         elif a.get_timestep() in nonoverlap_timesteps:
@@ -188,7 +189,7 @@ def test_ready_to_send_observation(robot_client, chunk_size: int, queue_len: int
     robot_client.action_chunk_size = chunk_size
 
     # Clear any existing actions then fill with `queue_len` dummy entries ----
-    robot_client.action_queue = Queue()
+    robot_client.action_queue = TimedActionQueue()
 
     dummy_actions = _make_actions(start_ts=time.time(), start_t=0, count=queue_len)
     for act in dummy_actions:
@@ -226,7 +227,7 @@ def test_ready_to_send_observation_with_varying_threshold(robot_client, g_thresh
     robot_client._chunk_size_threshold = g_threshold
 
     # Fill queue with dummy actions
-    robot_client.action_queue = Queue()
+    robot_client.action_queue = TimedActionQueue()
     dummy_actions = _make_actions(start_ts=time.time(), start_t=0, count=queue_len)
     for act in dummy_actions:
         robot_client.action_queue.put(act)
@@ -0,0 +1,101 @@
+# Copyright 2025 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+
+from lerobot.scripts.server.helpers import TimedAction, TimedObservation
+from lerobot.scripts.server.serialization import (
+    bytes_to_timed_actions,
+    bytes_to_timed_observation,
+    timed_actions_to_bytes,
+    timed_observation_to_bytes,
+)
+
+
+def _make_observation() -> TimedObservation:
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    image[:, :32] = [255, 0, 0]
+    return TimedObservation(
+        timestamp=123.456,
+        timestep=7,
+        must_go=True,
+        observation={
+            "shoulder": 1.5,
+            "gripper": np.float32(0.25),
+            "task": "pick the cube",
+            "laptop": image,
+            "phone": image.copy(),
+            "depth": torch.rand(8, 8, dtype=torch.float64),
+        },
+    )
+
+
+def test_timed_observation_round_trip():
+    obs = _make_observation()
+
+    obs_out = bytes_to_timed_observation(timed_observation_to_bytes(obs))
+
+    assert obs_out.get_timestamp() == obs.get_timestamp()
+    assert obs_out.get_timestep() == obs.get_timestep()
+    assert obs_out.must_go
+    raw = obs_out.get_observation()
+    assert raw["shoulder"] == 1.5
+    assert raw["gripper"] == 0.25
+    assert raw["task"] == "pick the cube"
+    np.testing.assert_array_equal(raw["laptop"], obs.get_observation()["laptop"])
+    assert raw["depth"].dtype == torch.float64
+    torch.testing.assert_close(raw["depth"], obs.get_observation()["depth"])
+
+
+def test_timed_observation_image_codecs():
+    obs = _make_observation()
+
+    raw_bytes = timed_observation_to_bytes(obs)
+    compressed_bytes = timed_observation_to_bytes(obs, image_codecs={"laptop": "jpeg", "phone": "png"})
+    assert len(compressed_bytes) < len(raw_bytes)
+
+    raw = bytes_to_timed_observation(compressed_bytes).get_observation()
+    expected = obs.get_observation()["laptop"]
+    assert raw["laptop"].shape == expected.shape
+    # JPEG is lossy, but channels must not be swapped
+    assert np.abs(raw["laptop"].astype(int) - expected).mean() < 4
+    assert np.abs(raw["laptop"][0, 0].astype(int) - [255, 0, 0]).max() < 8
+    # PNG is lossless
+    np.testing.assert_array_equal(raw["phone"], expected)
+
+    with pytest.raises(ValueError):
+        timed_observation_to_bytes(obs, image_codecs={"depth": "jpeg"})
+
+
+def test_timed_actions_round_trip():
+    timed_actions = [
+        TimedAction(timestamp=10.0 + i * 0.1, timestep=100 + i, action=torch.randn(6)) for i in range(5)
+    ]
+
+    actions_out = bytes_to_timed_actions(timed_actions_to_bytes(timed_actions))
+
+    assert len(actions_out) == len(timed_actions)
+    for action_in, action_out in zip(timed_actions, actions_out, strict=True):
+        assert action_out.get_timestamp() == action_in.get_timestamp()
+        assert action_out.get_timestep() == action_in.get_timestep()
+        torch.testing.assert_close(action_out.get_action(), action_in.get_action())
+
+    assert bytes_to_timed_actions(timed_actions_to_bytes([])) == []
+
+
+def test_invalid_message():
+    with pytest.raises(ValueError):
+        bytes_to_timed_observation(timed_actions_to_bytes([]))
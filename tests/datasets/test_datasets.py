@@ -19,6 +19,7 @@ import re
 from copy import deepcopy
 from itertools import chain
 from pathlib import Path
+from unittest.mock import patch
 
 import numpy as np
 import pytest
@@ -182,6 +183,55 @@ def test_add_frame(tmp_path, empty_lerobot_dataset_factory):
     assert dataset[0]["state"].ndim == 0
 
 
+def test_save_episode_defers_concatenation(tmp_path, empty_lerobot_dataset_factory):
+    features = {"state": {"dtype": "float32", "shape": (2,), "names": None}}
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    for ep_idx in range(3):
+        for _ in range(ep_idx + 2):
+            dataset.add_frame({"state": torch.randn(2)}, task="Dummy task")
+        dataset.save_episode()
+
+    assert len(dataset._pending_episode_datasets) == 3
+    assert len(dataset) == 2 + 3 + 4
+    assert len(list((dataset.root / "data").rglob("*.parquet"))) == 3
+
+    assert len(dataset.hf_dataset) == 2 + 3 + 4
+    assert len(dataset._pending_episode_datasets) == 0
+    assert dataset[2]["episode_index"] == 1
+    assert dataset[2]["frame_index"] == 0
+    assert dataset[len(dataset) - 1]["index"] == len(dataset) - 1
+
+
+def test_streaming_encoding(tmp_path, empty_lerobot_dataset_factory):
+    features = {
+        "image": {"dtype": "video", "shape": DUMMY_CHW, "names": ["channels", "height", "width"]},
+        "state": {"dtype": "float32", "shape": (2,), "names": None},
+    }
+    dataset = empty_lerobot_dataset_factory(
+        root=tmp_path / "test", features=features, streaming_encoding=True
+    )
+    try:
+        for _ in range(3):
+            frame = {"image": np.random.rand(*DUMMY_CHW), "state": torch.randn(2)}
+            dataset.add_frame(frame, task="Dummy task")
+        dataset.clear_episode_buffer()
+
+        for _ in range(5):
+            frame = {"image": np.random.randint(0, 256, DUMMY_HWC, dtype=np.uint8), "state": torch.randn(2)}
+            dataset.add_frame(frame, task="Dummy task")
+        dataset.save_episode()
+    finally:
+        dataset.stop_streaming_encoder()
+
+    video_path = dataset.root / dataset.meta.get_video_file_path(0, "image")
+    assert video_path.is_file()
+    assert list(video_path.parent.iterdir()) == [video_path]
+    assert not (dataset.root / "images").exists()
+    assert dataset.meta.info["features"]["image"]["info"]["video.height"] == DUMMY_CHW[1]
+    assert dataset.meta.episodes_stats[0]["image"]["mean"].shape == (3, 1, 1)
+    assert dataset.meta.episodes_stats[0]["image"]["count"] == 5
+
+
 def test_add_frame_state_1d(tmp_path, empty_lerobot_dataset_factory):
     features = {"state": {"dtype": "float32", "shape": (2,), "names": None}}
     dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
@@ -571,3 +621,116 @@ def test_dataset_feature_with_forward_slash_raises_error():
             fps=30,
             features={"a/b": {"dtype": "float32", "shape": 2, "names": None}},
         )
+
+
+def test_getitems_groups_video_decoding(tmp_path, lerobot_dataset_factory):
+    """`__getitems__` should return the same items as `__getitem__` while decoding each video file once."""
+    dataset = lerobot_dataset_factory(root=tmp_path / "test", total_episodes=3, total_frames=150)
+    video_keys = dataset.meta.video_keys
+    assert len(video_keys) > 0
+    dataset.delta_indices = {video_keys[0]: [-1, 0]}
+    dataset.video_backend = "torchcodec"
+
+    decoded_paths = []
+
+    def mock_decode_video_frames(video_path, timestamps, tolerance_s, backend=None, **kwargs):
+        decoded_paths.append(video_path)
+        return torch.tensor(timestamps, dtype=torch.float32)[:, None, None, None].expand(-1, 3, 4, 4)
+
+    indices = [0, 10, 60, 11, 120, 61]
+    with patch("lerobot.datasets.lerobot_dataset.decode_video_frames", side_effect=mock_decode_video_frames):
+        expected_items = [dataset[idx] for idx in indices]
+        assert len(decoded_paths) == len(indices) * len(video_keys)
+
+        decoded_paths.clear()
+        items = dataset.__getitems__(indices)
+        num_episodes_in_batch = len({item["episode_index"].item() for item in items})
+        assert len(decoded_paths) == num_episodes_in_batch * len(video_keys)
+
+    for item, expected_item in zip(items, expected_items, strict=True):
+        assert item.keys() == expected_item.keys()
+        for key in video_keys:
+            torch.testing.assert_close(item[key], expected_item[key])
+        assert item["task"] == expected_item["task"]
+
+
+def test_query_indices_and_hf_dataset(tmp_path, lerobot_dataset_factory):
+    dataset = lerobot_dataset_factory(root=tmp_path / "test", total_episodes=3, total_frames=150)
+    keys = ["action", "state", "timestamp", "frame_index"]
+    dataset.delta_indices = {key: np.arange(-3, 5) for key in keys}
+
+    ep_start = dataset.episode_data_index["from"][1].item()
+    ep_end = dataset.episode_data_index["to"][1].item()
+    for idx in [ep_start, ep_start + 10, ep_end - 1]:
+        query_indices, padding = dataset._get_query_indices(idx, ep_idx=1)
+        query_result = dataset._query_hf_dataset(query_indices)
+
+        for key in keys:
+            expected_indices = [max(ep_start, min(ep_end - 1, idx + delta)) for delta in range(-3, 5)]
+            expected_padding = [not ep_start <= idx + delta < ep_end for delta in range(-3, 5)]
+            expected = torch.stack(dataset.hf_dataset.select(expected_indices)[key])
+
+            assert query_indices[key].tolist() == expected_indices
+            assert padding[f"{key}_is_pad"].tolist() == expected_padding
+            assert query_result[key].dtype == expected.dtype
+            torch.testing.assert_close(query_result[key], expected)
+
+
+def test_getitems_splits_sequential_video_decoding(tmp_path, lerobot_dataset_factory):
+    """With decoders that decode every frame between the first and the last requested timestamps,
+    `__getitems__` should not decode the frames between distant samples of the same episode."""
+    dataset = lerobot_dataset_factory(root=tmp_path / "test", total_episodes=3, total_frames=150)
+    video_keys = dataset.meta.video_keys
+    dataset.delta_indices = {video_keys[0]: [-1, 0]}
+    dataset.video_backend = "pyav"
+
+    num_decoded_frames = 0
+
+    def mock_decode_video_frames(video_path, timestamps, tolerance_s, backend=None, **kwargs):
+        nonlocal num_decoded_frames
+        num_decoded_frames += round((max(timestamps) - min(timestamps)) * dataset.fps) + 1
+        return torch.tensor(timestamps, dtype=torch.float32)[:, None, None, None].expand(-1, 3, 4, 4)
+
+    # Samples at both ends of the first episode
+    indices = [1, 2, 48, 49]
+    with patch("lerobot.datasets.lerobot_dataset.decode_video_frames", side_effect=mock_decode_video_frames):
+        expected_items = [dataset[idx] for idx in indices]
+        num_decoded_frames = 0
+        items = dataset.__getitems__(indices)
+
+    # Frames 0 to 2 and 47 to 49 of the first camera, frames 1, 2, 48 and 49 of the second, instead of
+    # (almost) the 50 frames of the episode for each camera
+    assert len(video_keys) == 2
+    assert num_decoded_frames == 6 + 4
+    for item, expected_item in zip(items, expected_items, strict=True):
+        for key in video_keys:
+            torch.testing.assert_close(item[key], expected_item[key])
+
+
+def test_save_episode_batch_encodes_videos_with_num_workers(tmp_path, empty_lerobot_dataset_factory):
+    """Batches of episodes are encoded with `video_encoding_num_workers` parallel workers."""
+    features = {"image": {"dtype": "video", "shape": (64, 96, 3), "names": ["height", "width", "channels"]}}
+    dataset = empty_lerobot_dataset_factory(root=tmp_path / "test", features=features)
+    dataset.batch_encoding_size = 2
+    dataset.video_encoding_num_workers = 3
+
+    with patch.object(dataset, "batch_encode_videos") as mock_batch_encode_videos:
+        for _ in range(2):
+            for _ in range(2):
+                dataset.add_frame({"image": np.zeros((64, 96, 3), dtype=np.uint8)}, task="Dummy task")
+            dataset.save_episode()
+
+    mock_batch_encode_videos.assert_called_once_with(0, 2, num_workers=3)
+
+
+def test_gather_columns_without_query_table(tmp_path, lerobot_dataset_factory, monkeypatch):
+    dataset = lerobot_dataset_factory(root=tmp_path / "test", total_episodes=3, total_frames=150)
+    query_indices = {"action": [0, 5, 5, 149], "state": [20, 3]}
+    expected = dataset._gather_columns(query_indices)
+
+    monkeypatch.setattr("lerobot.datasets.lerobot_dataset.query_table", None)
+    result = dataset._gather_columns(query_indices)
+
+    for key in query_indices:
+        assert result[key].dtype == expected[key].dtype
+        torch.testing.assert_close(result[key], expected[key])
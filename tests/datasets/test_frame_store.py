@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import pickle
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import torch
+
+from lerobot.datasets.frame_store import LOCK_FILENAME, MANIFEST_FILENAME, MEMMAP_DIR, MemmapFrameStore
+
+
+def mock_decode_video_frames(video_path, timestamps, tolerance_s, backend=None, **kwargs):
+    return torch.zeros((len(timestamps), 3, 4, 4))
+
+
+def test_memmap_store_matches_hf_dataset(tmp_path, lerobot_dataset_factory):
+    dataset = lerobot_dataset_factory(root=tmp_path / "test", use_memmap_store=True)
+    assert dataset.frame_store is not None
+    assert len(dataset.frame_store) == len(dataset.hf_dataset)
+    dataset.delta_indices = {"action": np.arange(-2, 3)}
+
+    with patch("lerobot.datasets.lerobot_dataset.decode_video_frames", side_effect=mock_decode_video_frames):
+        for idx in [0, 1, len(dataset) // 2, len(dataset) - 1]:
+            item = dataset[idx]
+            expected_row = dataset.hf_dataset[idx]
+            for key in set(dataset.frame_store.keys) - set(dataset.delta_indices):
+                assert item[key].dtype == expected_row[key].dtype
+                torch.testing.assert_close(item[key], expected_row[key])
+
+            query_indices, _ = dataset._get_query_indices(idx, item["episode_index"].item())
+            expected_action = torch.stack(dataset.hf_dataset.select(query_indices["action"])["action"])
+            torch.testing.assert_close(item["action"], expected_action)
+
+
+def test_memmap_store_rebuilt_only_when_data_changes(tmp_path, lerobot_dataset_factory):
+    dataset = lerobot_dataset_factory(root=tmp_path / "test", use_memmap_store=True)
+    root_dir = dataset.root / MEMMAP_DIR
+    store_dir = dataset.frame_store.store_dir
+    data_files = sorted((dataset.root / "data").rglob("*.parquet"))
+
+    built_mtime = (store_dir / MANIFEST_FILENAME).stat().st_mtime_ns
+    store = MemmapFrameStore.load_or_build(root_dir, dataset.hf_dataset, dataset.features, data_files)
+    assert store.store_dir == store_dir
+    assert (store_dir / MANIFEST_FILENAME).stat().st_mtime_ns == built_mtime
+
+    stat = data_files[0].stat()
+    os.utime(data_files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    store = MemmapFrameStore.load_or_build(root_dir, dataset.hf_dataset, dataset.features, data_files)
+    assert store.store_dir != store_dir
+    assert (store.store_dir / MANIFEST_FILENAME).is_file()
+    # The memmaps of the previous version of the data files are removed
+    assert not store_dir.exists()
+
+
+def test_memmap_store_interrupted_build(tmp_path, lerobot_dataset_factory):
+    dataset = lerobot_dataset_factory(root=tmp_path / "test")
+    root_dir = dataset.root / MEMMAP_DIR
+    data_files = sorted((dataset.root / "data").rglob("*.parquet"))
+
+    with (
+        patch("lerobot.datasets.frame_store.arrow_column_to_numpy", side_effect=KeyboardInterrupt),
+        pytest.raises(KeyboardInterrupt),
+    ):
+        MemmapFrameStore.load_or_build(root_dir, dataset.hf_dataset, dataset.features, data_files)
+    # Nothing but the lock file is left behind
+    assert [path.name for path in root_dir.iterdir()] == [LOCK_FILENAME]
+
+    store = MemmapFrameStore.load_or_build(root_dir, dataset.hf_dataset, dataset.features, data_files)
+    assert len(store) == len(dataset.hf_dataset)
+
+
+def test_memmap_store_pickles_without_data(tmp_path, lerobot_dataset_factory):
+    dataset = lerobot_dataset_factory(root=tmp_path / "test", use_memmap_store=True)
+    store = dataset.frame_store
+    store.get_row(0)
+
+    unpickled = pickle.loads(pickle.dumps(store))
+
+    assert unpickled._memmaps is None
+    for key, value in store.get_row(3).items():
+        torch.testing.assert_close(unpickled.get_row(3)[key], value)
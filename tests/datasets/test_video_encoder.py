@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from lerobot.datasets.video_encoder import (
+    AsyncVideoEncoder,
+    StreamingVideoEncoder,
+    encode_and_cleanup,
+    encode_videos_in_parallel,
+    get_num_threads_per_job,
+    get_partial_video_path,
+)
+
+
+def write_frames(imgs_dir, num_frames=4):
+    imgs_dir.mkdir(parents=True)
+    for i in range(num_frames):
+        img = np.full((32, 32, 3), i * 40, dtype=np.uint8)
+        Image.fromarray(img).save(imgs_dir / f"frame_{i:06d}.png")
+
+
+def test_encode_and_cleanup_interrupted(tmp_path):
+    imgs_dir = tmp_path / "images"
+    video_path = tmp_path / "videos" / "episode_000000.mp4"
+    write_frames(imgs_dir)
+
+    with (
+        patch("lerobot.datasets.video_encoder.encode_video_frames", side_effect=KeyboardInterrupt),
+        pytest.raises(KeyboardInterrupt),
+    ):
+        encode_and_cleanup(imgs_dir, video_path, fps=30)
+
+    # Frames are kept so that the episode can be encoded again
+    assert not video_path.exists()
+    assert len(list(imgs_dir.glob("*.png"))) == 4
+
+
+def test_encode_and_cleanup(tmp_path):
+    imgs_dir = tmp_path / "images"
+    video_path = tmp_path / "videos" / "episode_000000.mp4"
+    write_frames(imgs_dir)
+
+    def mock_encode(imgs_dir, video_path, fps, **kwargs):
+        video_path.parent.mkdir(parents=True, exist_ok=True)
+        video_path.write_bytes(b"video")
+
+    with patch("lerobot.datasets.video_encoder.encode_video_frames", side_effect=mock_encode):
+        encode_and_cleanup(imgs_dir, video_path, fps=30)
+
+    assert video_path.read_bytes() == b"video"
+    assert not get_partial_video_path(video_path).exists()
+    assert not imgs_dir.exists()
+
+
+def test_async_video_encoder(tmp_path):
+    encoder = AsyncVideoEncoder(num_workers=2, max_pending_jobs=2)
+    video_paths = []
+    try:
+        for ep_idx in range(3):
+            imgs_dir = tmp_path / "images" / f"episode_{ep_idx:06d}"
+            video_path = tmp_path / "videos" / f"episode_{ep_idx:06d}.mp4"
+            write_frames(imgs_dir)
+            encoder.encode(imgs_dir, video_path, fps=30)
+            video_paths.append(video_path)
+            assert encoder.num_pending_jobs <= 2
+        encoder.wait_until_done()
+    finally:
+        encoder.stop()
+
+    assert encoder.num_pending_jobs == 0
+    assert all(video_path.is_file() for video_path in video_paths)
+    assert not (tmp_path / "images").exists() or not any((tmp_path / "images").iterdir())
+
+
+def test_async_video_encoder_raises_errors(tmp_path):
+    encoder = AsyncVideoEncoder(num_workers=1)
+    try:
+        encoder.encode(tmp_path / "missing_images", tmp_path / "video.mp4", fps=30)
+        with pytest.raises(FileNotFoundError):
+            encoder.wait_until_done()
+    finally:
+        encoder.stop()
+
+    with pytest.raises(RuntimeError):
+        encoder.encode(tmp_path / "missing_images", tmp_path / "video.mp4", fps=30)
+
+
+def test_encode_videos_in_parallel(tmp_path):
+    jobs = []
+    for ep_idx in range(2):
+        for cam in ["laptop", "phone"]:
+            imgs_dir = tmp_path / "images" / cam / f"episode_{ep_idx:06d}"
+            write_frames(imgs_dir, num_frames=ep_idx + 2)
+            jobs.append((imgs_dir, tmp_path / "videos" / cam / f"episode_{ep_idx:06d}.mp4"))
+
+    encode_videos_in_parallel(jobs, fps=30, num_workers=2, num_threads_per_job=1)
+
+    for imgs_dir, video_path in jobs:
+        assert video_path.is_file()
+        assert not imgs_dir.exists()
+
+
+def test_get_num_threads_per_job():
+    assert get_num_threads_per_job(1) >= 1
+    assert get_num_threads_per_job(10_000) == 1
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        AsyncVideoEncoder(num_workers=0)
+    with pytest.raises(ValueError):
+        AsyncVideoEncoder(max_pending_jobs=0)
+    with pytest.raises(ValueError):
+        encode_videos_in_parallel([], fps=30, num_workers=0)
+
+
+def test_streaming_video_encoder(tmp_path):
+    encoder = StreamingVideoEncoder(fps=30, max_stats_samples=4)
+    video_path = tmp_path / "videos" / "episode_000000.mp4"
+    try:
+        encoder.add_frame("cam", tmp_path / "videos" / "aborted.mp4", np.zeros((32, 32, 3), dtype=np.uint8))
+        encoder.abort_episode()
+
+        for i in range(10):
+            encoder.add_frame("cam", video_path, np.full((3, 32, 32), i / 10, dtype=np.float32))
+        samples = encoder.finish_episode()
+    finally:
+        encoder.stop()
+
+    assert video_path.is_file()
+    assert sorted(p.name for p in video_path.parent.iterdir()) == [video_path.name]
+    # Frames 0, 4 and 8 are kept once the stride reaches 4
+    assert samples["cam"].shape == (3, 3, 32, 32)
+    assert samples["cam"].dtype == np.uint8
+    assert samples["cam"][1, 0, 0, 0] == int(0.4 * 255)
+
+
+def test_streaming_video_encoder_errors(tmp_path):
+    encoder = StreamingVideoEncoder(fps=30, vcodec="unknown")
+    try:
+        encoder.add_frame("cam", tmp_path / "video.mp4", np.zeros((32, 32, 3), dtype=np.uint8))
+        with pytest.raises(ValueError):
+            encoder.finish_episode()
+    finally:
+        encoder.stop()
+    assert not (tmp_path / "video.mp4").exists()
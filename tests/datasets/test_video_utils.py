@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+# Copyright 2024 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pickle
+from unittest.mock import MagicMock, patch
+
+import pytest
+import torch
+
+from lerobot.datasets.video_utils import DecodedFrameBuffer, VideoDecoderCache, open_video_stream
+
+
+class MockContainer:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class MockReader:
+    def __init__(self):
+        self.container = MockContainer()
+
+
+def test_decoder_cache_reuses_open_decoders():
+    cache = VideoDecoderCache(max_size=2)
+    calls = []
+
+    def open_fn():
+        calls.append(1)
+        return MockReader()
+
+    first = cache.get("a.mp4", "pyav", open_fn)
+    second = cache.get("a.mp4", "pyav", open_fn)
+
+    assert first is second
+    assert len(calls) == 1
+    assert len(cache) == 1
+
+
+def test_decoder_cache_evicts_least_recently_used():
+    cache = VideoDecoderCache(max_size=2)
+    reader_a = cache.get("a.mp4", "pyav", MockReader)
+    cache.get("b.mp4", "pyav", MockReader)
+    cache.get("a.mp4", "pyav", MockReader)
+    cache.get("c.mp4", "pyav", MockReader)
+
+    assert ("a.mp4", "pyav") in cache
+    assert ("b.mp4", "pyav") not in cache
+    assert ("c.mp4", "pyav") in cache
+    assert not reader_a.container.closed
+
+
+def test_decoder_cache_closes_on_evict_and_clear():
+    cache = VideoDecoderCache(max_size=4)
+    reader_a = cache.get("a.mp4", "pyav", MockReader)
+    reader_b = cache.get("b.mp4", "pyav", MockReader)
+
+    cache.evict("a.mp4", "pyav")
+    assert reader_a.container.closed
+    assert not reader_b.container.closed
+
+    cache.clear()
+    assert reader_b.container.closed
+    assert len(cache) == 0
+
+
+def test_decoder_cache_disabled():
+    cache = VideoDecoderCache(max_size=0)
+    first = cache.get("a.mp4", "pyav", MockReader)
+    second = cache.get("a.mp4", "pyav", MockReader)
+
+    assert first is not second
+    assert len(cache) == 0
+
+
+def test_decoder_cache_pickles_empty():
+    cache = VideoDecoderCache(max_size=3)
+    cache.get("a.mp4", "pyav", MockReader)
+
+    unpickled = pickle.loads(pickle.dumps(cache))
+
+    assert unpickled.max_size == 3
+    assert len(unpickled) == 0
+
+
+def test_decoder_cache_negative_size():
+    with pytest.raises(ValueError):
+        VideoDecoderCache(max_size=-1)
+
+
+def test_frame_buffer_hits_and_misses():
+    buffer = DecodedFrameBuffer(capacity=4)
+    frames = [torch.full((3, 2, 2), i, dtype=torch.uint8) for i in range(6)]
+    timestamps = [i / 10 for i in range(6)]
+
+    assert buffer.lookup("a.mp4", [0.0], tolerance_s=1e-4) is None
+    buffer.add("a.mp4", timestamps, frames)
+
+    # Only the last `capacity` frames are kept
+    assert buffer.lookup("a.mp4", [0.1], tolerance_s=1e-4) is None
+    buffered = buffer.lookup("a.mp4", [0.3, 0.5], tolerance_s=1e-4)
+    torch.testing.assert_close(buffered, torch.stack([frames[3], frames[5]]))
+
+    assert buffer.hits == 1
+    assert buffer.misses == 2
+    assert buffer.hit_rate == pytest.approx(1 / 3)
+
+    buffer.reset_counters()
+    assert buffer.hits == 0 and buffer.misses == 0
+
+
+def test_frame_buffer_max_streams():
+    buffer = DecodedFrameBuffer(capacity=2, max_streams=1)
+    frame = [torch.zeros((3, 2, 2), dtype=torch.uint8)]
+    buffer.add("a.mp4", [0.0], frame)
+    buffer.add("b.mp4", [0.0], frame)
+
+    assert buffer.lookup("a.mp4", [0.0], tolerance_s=1e-4) is None
+    assert buffer.lookup("b.mp4", [0.0], tolerance_s=1e-4) is not None
+
+
+def test_frame_buffer_pickles_empty():
+    buffer = DecodedFrameBuffer(capacity=2)
+    buffer.add("a.mp4", [0.0], [torch.zeros((3, 2, 2), dtype=torch.uint8)])
+
+    unpickled = pickle.loads(pickle.dumps(buffer))
+
+    assert unpickled.capacity == 2
+    assert unpickled.lookup("a.mp4", [0.0], tolerance_s=1e-4) is None
+
+
+@pytest.mark.parametrize(
+    "vcodec, fast_decode, num_threads, expected_options",
+    [
+        # SVT-AV1 only takes a level of parallelism, clamped to the lowest one for a limited budget
+        ("libsvtav1", 0, 2, {"svtav1-params": "lp=1"}),
+        ("libsvtav1", 1, 2, {"svtav1-params": "fast-decode=1:lp=1"}),
+        ("libsvtav1", 0, 8, {}),
+        ("h264", 0, 2, {"threads": "2"}),
+    ],
+)
+def test_open_video_stream_num_threads(vcodec, fast_decode, num_threads, expected_options):
+    with (
+        patch("lerobot.datasets.video_utils.av.open") as mock_open,
+        patch("lerobot.datasets.video_utils.get_num_available_cores", return_value=8),
+    ):
+        container = MagicMock()
+        mock_open.return_value = container
+        open_video_stream(
+            "video.mp4",
+            30,
+            64,
+            48,
+            vcodec=vcodec,
+            g=None,
+            crf=None,
+            fast_decode=fast_decode,
+            num_threads=num_threads,
+        )
+
+    assert container.add_stream.call_args.kwargs["options"] == expected_options
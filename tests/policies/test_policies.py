@@ -16,6 +16,7 @@
 import inspect
 from copy import deepcopy
 from pathlib import Path
+from unittest.mock import patch
 
 import einops
 import pytest
@@ -33,6 +34,7 @@ from lerobot.envs.factory import make_env, make_env_config
 from lerobot.envs.utils import preprocess_observation
 from lerobot.optim.factory import make_optimizer_and_scheduler
 from lerobot.policies.act.modeling_act import ACTTemporalEnsembler
+from lerobot.policies.diffusion.modeling_diffusion import DiffusionModel, DiffusionSampler
 from lerobot.policies.factory import (
     get_policy_class,
     make_policy,
@@ -40,6 +42,13 @@ from lerobot.policies.factory import (
 )
 from lerobot.policies.normalize import Normalize, Unnormalize
 from lerobot.policies.pretrained import PreTrainedPolicy
+from lerobot.policies.utils import (
+    DenoisingStepProfile,
+    TokenizedPromptCache,
+    extend_kv_cache,
+    fill_prefix_kv_cache,
+    sample_flow_adaptive,
+)
 from lerobot.utils.random_utils import seeded_context
 from tests.artifacts.policies.save_policy_to_safetensors import get_policy_stats
 from tests.utils import DEVICE, require_cpu, require_env, require_x86_64_kernel
@@ -441,6 +450,213 @@ def test_backward_compatibility(ds_repo_id: str, policy_name: str, policy_kwargs
         torch.testing.assert_close(actions[key], saved_actions[key], rtol=rtol, atol=atol)
 
 
+def test_diffusion_image_features_cache(dummy_dataset_metadata):
+    """Caching image features gives the same actions, while encoding each frame once per rollout."""
+    features = dataset_to_policy_features(dummy_dataset_metadata.features)
+    output_features = {key: ft for key, ft in features.items() if ft.type is FeatureType.ACTION}
+    input_features = {key: ft for key, ft in features.items() if key not in output_features}
+    stats = {
+        key: {
+            "mean": torch.zeros(shape),
+            "std": torch.ones(shape),
+            "min": -torch.ones(shape),
+            "max": torch.ones(shape),
+        }
+        for key, shape in [
+            ("observation.state", (6,)),
+            ("action", (6,)),
+            ("observation.images.laptop", (3, 1, 1)),
+        ]
+    }
+    policies = {}
+    for cache_image_features in [False, True]:
+        policy_cfg = make_policy_config(
+            "diffusion",
+            input_features=input_features,
+            output_features=output_features,
+            n_obs_steps=2,
+            n_action_steps=1,
+            num_inference_steps=2,
+            cache_image_features=cache_image_features,
+            device="cpu",
+        )
+        with seeded_context(0):
+            policies[cache_image_features] = get_policy_class("diffusion")(policy_cfg, stats).eval()
+
+    num_encoded = {}
+    for cache_image_features, policy in policies.items():
+        num_encoded[cache_image_features] = 0
+
+        def count_frames(_module, args, _output, cache_image_features=cache_image_features):
+            num_encoded[cache_image_features] += args[0].shape[0]
+
+        policy.diffusion.rgb_encoder.register_forward_hook(count_frames)
+
+    with seeded_context(1):
+        observations = [
+            {
+                "observation.state": torch.randn(1, 6),
+                "observation.images.laptop": torch.rand(1, 3, 84, 84),
+            }
+            for _ in range(4)
+        ]
+
+    actions = {}
+    for cache_image_features, policy in policies.items():
+        with seeded_context(2):
+            actions[cache_image_features] = [policy.select_action(dict(obs)) for obs in observations]
+
+    torch.testing.assert_close(actions[True], actions[False])
+    # A replan at every step encodes n_obs_steps frames without the cache, and only the new one with it
+    assert num_encoded[False] == 2 * len(observations)
+    assert num_encoded[True] == len(observations)
+
+
+@pytest.mark.parametrize("noise_scheduler_type", ["DDPM", "DDIM"])
+@pytest.mark.parametrize("prediction_type", ["epsilon", "sample"])
+def test_diffusion_sampler(dummy_dataset_metadata, noise_scheduler_type, prediction_type):
+    """Check that the denoising loop with precomputed coefficients matches the noise scheduler steps."""
+    features = dataset_to_policy_features(dummy_dataset_metadata.features)
+    output_features = {key: ft for key, ft in features.items() if ft.type is FeatureType.ACTION}
+    input_features = {key: ft for key, ft in features.items() if key not in output_features}
+    policy_cfg = make_policy_config(
+        "diffusion",
+        input_features=input_features,
+        output_features=output_features,
+        down_dims=(32, 64),
+        noise_scheduler_type=noise_scheduler_type,
+        prediction_type=prediction_type,
+        num_inference_steps=10,
+        device="cpu",
+    )
+    with seeded_context(0):
+        model = DiffusionModel(policy_cfg).eval()
+        batch = {
+            "observation.state": torch.randn(2, policy_cfg.n_obs_steps, 6),
+            "observation.images": torch.rand(2, policy_cfg.n_obs_steps, 1, 3, 84, 84),
+        }
+    noise = torch.randn(policy_cfg.num_inference_steps, 2, policy_cfg.horizon, 6)
+
+    # The scheduler draws the noise of each DDPM step with `randn_tensor`
+    noise_iter = iter(noise)
+    with (
+        seeded_context(1),
+        patch("diffusers.schedulers.scheduling_ddpm.randn_tensor", lambda *_, **__: next(noise_iter)),
+    ):
+        expected = model.generate_actions(batch)
+
+    model.sampler = DiffusionSampler(model.noise_scheduler, model.num_inference_steps, compile=False)
+    with seeded_context(1):
+        prior = torch.randn(2, policy_cfg.horizon, 6)
+    with patch.object(torch, "randn", side_effect=[prior, noise]):
+        actions = model.generate_actions(batch)
+
+    torch.testing.assert_close(actions, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_tokenized_prompt_cache():
+    class CountingTokenizer:
+        def __init__(self):
+            self.num_calls = 0
+
+        def __call__(self, tasks, padding, padding_side, max_length, return_tensors):
+            self.num_calls += 1
+            input_ids = torch.tensor([[len(task)] + [0] * (max_length - 1) for task in tasks])
+            return {"input_ids": input_ids, "attention_mask": (input_ids != 0).long()}
+
+    tokenizer = CountingTokenizer()
+    cache = TokenizedPromptCache(max_size=2)
+
+    tokens, masks = cache.get(tokenizer, ["pick\n"], "cpu", padding="max_length", max_length=4)
+    assert masks.dtype == torch.bool
+    assert cache.get(tokenizer, ["pick\n"], "cpu", padding="max_length", max_length=4)[0] is tokens
+    assert tokenizer.num_calls == 1
+
+    # Tokenizer settings are part of the key
+    cache.get(tokenizer, ["pick\n"], "cpu", padding="max_length", max_length=8)
+    assert tokenizer.num_calls == 2
+
+    # The least recently used prompt is evicted
+    cache.get(tokenizer, ["place\n"], "cpu", padding="max_length", max_length=4)
+    assert len(cache) == 2
+    cache.get(tokenizer, ["pick\n"], "cpu", padding="max_length", max_length=4)
+    assert tokenizer.num_calls == 4
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_static_kv_cache():
+    """Keys and values extending the prefix cache match their concatenation, without reallocating buffers."""
+    past_key_values = {}
+    buffers_ptr = None
+    for _ in range(2):
+        prefix_keys, prefix_values = torch.randn(2, 5, 1, 4), torch.randn(2, 5, 1, 4)
+        fill_prefix_kv_cache(past_key_values, 0, prefix_keys, prefix_values)
+        for _ in range(3):
+            suffix_keys, suffix_values = torch.randn(2, 3, 1, 4), torch.randn(2, 3, 1, 4)
+            keys, values = extend_kv_cache(past_key_values, 0, suffix_keys, suffix_values)
+
+            torch.testing.assert_close(keys, torch.cat([prefix_keys, suffix_keys], dim=1))
+            torch.testing.assert_close(values, torch.cat([prefix_values, suffix_values], dim=1))
+            if buffers_ptr is None:
+                buffers_ptr = (keys.data_ptr(), values.data_ptr())
+            assert (keys.data_ptr(), values.data_ptr()) == buffers_ptr
+
+
+def test_sample_flow_adaptive(monkeypatch):
+    """Flow matching steps are reduced to fit the latency budget, or stopped once the velocity is constant."""
+    clock = [0.0]
+    monkeypatch.setattr("lerobot.policies.utils.time.perf_counter", lambda: clock[0])
+    target = torch.randn(2, 4, 3)
+    noise = torch.randn(2, 4, 3)
+    times = []
+
+    def denoise_fn(x_t, timestep):
+        # Velocity of the straight path from the target to the noise, taking 10ms per step
+        clock[0] += 0.01
+        times.append(timestep[0].item())
+        return noise - target
+
+    profile = DenoisingStepProfile()
+    x_0, num_steps = sample_flow_adaptive(
+        denoise_fn, noise.clone(), num_steps=10, profile=profile, start_time=0
+    )
+    assert num_steps == 10
+    assert times == pytest.approx([1 - i / 10 for i in range(10)])
+    torch.testing.assert_close(x_0, target)
+    assert len(profile) == 0
+
+    # 2ms are already spent on the prefix: the first call measures the step cost, the following ones plan for it
+    for expected_num_steps in [3, 3]:
+        clock[0] = 0.002
+        x_0, num_steps = sample_flow_adaptive(
+            denoise_fn, noise.clone(), num_steps=10, profile=profile, start_time=0, latency_budget=0.035
+        )
+        assert num_steps == expected_num_steps
+        torch.testing.assert_close(x_0, target)
+    assert profile.get(noise.device, 2) == pytest.approx(0.01)
+
+    x_0, num_steps = sample_flow_adaptive(
+        denoise_fn,
+        noise.clone(),
+        num_steps=10,
+        profile=profile,
+        start_time=0,
+        latency_budget=0.035,
+        min_num_steps=5,
+    )
+    assert num_steps == 5
+
+    times.clear()
+    x_0, num_steps = sample_flow_adaptive(
+        denoise_fn, noise.clone(), num_steps=10, profile=profile, start_time=0, early_stop_threshold=1e-4
+    )
+    assert num_steps == 2
+    assert times == pytest.approx([1.0, 0.9])
+    torch.testing.assert_close(x_0, target)
+
+
 def test_act_temporal_ensembler():
     """Check that the online method in ACTTemporalEnsembler matches a simple offline calculation."""
     temporal_ensemble_coeff = 0.01
@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
 from concurrent import futures
 from unittest.mock import patch
 
@@ -120,10 +121,13 @@ def test_push_transitions_to_transport_queue():
         )
         transitions.append(transition)
 
-    transitions_queue = Queue()
+    transitions_queue = Queue(maxsize=1)
 
     # Test pushing transitions
-    push_transitions_to_transport_queue(transitions, transitions_queue)
+    assert push_transitions_to_transport_queue(transitions, transitions_queue)
+    time.sleep(0.1)
+    # The queue is full: the transitions are not pushed, and the call doesn't block
+    assert not push_transitions_to_transport_queue(transitions, transitions_queue)
 
     # Verify the data can be retrieved
     serialized_data = transitions_queue.get()
@@ -134,6 +138,32 @@ def test_push_transitions_to_transport_queue():
         assert_transitions_equal(deserialized_transition, transitions[i])
 
 
+@require_package("grpc")
+def test_should_push_transitions():
+    from lerobot.policies.sac.configuration_sac import ActorLearnerConfig
+    from lerobot.scripts.rl.actor import should_push_transitions
+
+    now = time.perf_counter()
+    queue = Queue(maxsize=1)
+
+    cfg = ActorLearnerConfig()
+    assert not should_push_transitions(100, now - 100, queue, cfg)
+
+    cfg = ActorLearnerConfig(transitions_flush_steps=10)
+    assert not should_push_transitions(9, now, queue, cfg)
+    assert should_push_transitions(10, now, queue, cfg)
+
+    cfg = ActorLearnerConfig(transitions_flush_interval_s=0.5)
+    assert not should_push_transitions(1, time.perf_counter(), queue, cfg)
+    assert should_push_transitions(1, now - 1, queue, cfg)
+    assert not should_push_transitions(0, now - 1, queue, cfg)
+
+    # Backpressure: nothing is pushed while the queue is full
+    queue.put(b"transitions")
+    time.sleep(0.1)
+    assert not should_push_transitions(1, now - 1, queue, cfg)
+
+
 @require_package("grpc")
 @pytest.mark.timeout(3)  # force cross-platform watchdog
 def test_transitions_stream():
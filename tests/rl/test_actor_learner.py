@@ -295,3 +295,18 @@ def test_end_to_end_parameters_flow(cfg, data_size):
     assert received_params.keys() == input_params.keys()
     for key in input_params:
         assert torch.allclose(received_params[key], input_params[key])
+
+
+@require_package("grpc")
+def test_check_nan_in_transition():
+    from lerobot.scripts.rl.learner import check_nan_in_transition
+
+    observations = {"observation.image": torch.rand(4, 3, 8, 8), "observation.state": torch.rand(4, 10)}
+    next_state = {key: value.clone() for key, value in observations.items()}
+    actions = torch.rand(4, 5)
+    assert not check_nan_in_transition(observations, actions, next_state)
+
+    next_state["observation.state"][2, 3] = float("nan")
+    assert check_nan_in_transition(observations, actions, next_state)
+    with pytest.raises(ValueError, match=r"next_state\[observation.state\]"):
+        check_nan_in_transition(observations, actions, next_state, raise_error=True)
@@ -0,0 +1,51 @@
+# Copyright 2025 The HuggingFace Inc. team. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+from lerobot.serial.mqtt_serial import ReceiveBuffer, is_sync_packet
+
+
+def test_receive_buffer_reads_across_payloads():
+    buffer = ReceiveBuffer()
+    buffer.put(b"\xff\xff\x01")
+    buffer.put(b"\x02\x00\xfc\xff")
+    assert len(buffer) == 7
+
+    assert buffer.read(2, timeout=0) == b"\xff\xff"
+    assert buffer.read(3, timeout=0) == b"\x01\x02\x00"
+    assert len(buffer) == 2
+    # Not enough bytes: returns what is available once the timeout expires
+    assert buffer.read(4, timeout=0.01) == b"\xfc\xff"
+    assert len(buffer) == 0
+
+
+def test_receive_buffer_wakes_up_reader():
+    buffer = ReceiveBuffer()
+    threading.Timer(0.05, buffer.put, args=(b"\x01\x02",)).start()
+
+    start = time.perf_counter()
+    data = buffer.read(2, timeout=5)
+
+    assert data == b"\x01\x02"
+    assert time.perf_counter() - start < 1
+
+
+def test_is_sync_packet():
+    sync_read = bytes([0xFF, 0xFF, 0xFE, 0x07, 0x82, 0x38, 0x02, 0x01, 0x02, 0x3B])
+    write = bytes([0xFF, 0xFF, 0x01, 0x04, 0x03, 0x28, 0x01, 0xCE])
+    assert is_sync_packet(sync_read)
+    assert not is_sync_packet(write)
+    assert not is_sync_packet(b"\xff")
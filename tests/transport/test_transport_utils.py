@@ -406,6 +406,76 @@ def test_state_to_bytes_various_dtypes_cuda():
             assert torch.allclose(state_dict[key], reconstructed[key])
 
 
+@require_package("grpc")
+def test_state_dict_delta_encoding():
+    from lerobot.transport.utils import (
+        StateDictDeltaDecoder,
+        StateDictDeltaEncoder,
+        bytes_to_state_dict,
+        is_parameters_snapshot,
+    )
+
+    state_dicts = {
+        "policy": {
+            "encoder": torch.randn(64, 64),
+            "head": torch.randn(4, 64),
+            "steps": torch.tensor(0),
+        }
+    }
+    encoder = StateDictDeltaEncoder(snapshot_frequency=3, dtype=torch.bfloat16)
+    decoder = StateDictDeltaDecoder()
+
+    snapshot = encoder.encode(state_dicts)
+    assert is_parameters_snapshot(snapshot)
+
+    state_dicts["policy"]["head"] = state_dicts["policy"]["head"] + 1
+    delta = encoder.encode(state_dicts)
+    assert not is_parameters_snapshot(delta)
+    message = bytes_to_state_dict(delta[4:])
+    assert list(message["state_dicts"]["policy"]) == ["head"]
+    assert len(delta) < len(snapshot)
+
+    # A delta against a snapshot that wasn't received is ignored
+    assert decoder.decode(delta) is None
+
+    decoder.decode(snapshot)
+    decoded = decoder.decode(delta)
+    assert decoded["policy"]["encoder"].dtype == torch.bfloat16
+    assert decoded["policy"]["steps"].dtype == torch.int64
+    for key, value in state_dicts["policy"].items():
+        torch.testing.assert_close(decoded["policy"][key].to(value.dtype), value, atol=0.05, rtol=0.01)
+
+    # One message out of three is a snapshot
+    assert not is_parameters_snapshot(encoder.encode(state_dicts))
+    assert is_parameters_snapshot(encoder.encode(state_dicts))
+
+
+@require_package("grpc")
+def test_state_dict_delta_snapshot_not_dropped():
+    """Draining the parameters queue down to the most recent message keeps the snapshot it depends on."""
+    from lerobot.transport.utils import StateDictDeltaDecoder, StateDictDeltaEncoder, is_parameters_snapshot
+    from lerobot.utils.queue import get_last_items_from_queue
+
+    state_dicts = {"policy": {"encoder": torch.randn(8, 8), "head": torch.randn(4, 8)}}
+    encoder = StateDictDeltaEncoder(snapshot_frequency=10)
+    decoder = StateDictDeltaDecoder()
+    queue = Queue()
+
+    queue.put(encoder.encode(state_dicts))
+    for _ in range(3):
+        state_dicts["policy"]["head"] = state_dicts["policy"]["head"] + 1
+        queue.put(encoder.encode(state_dicts))
+
+    # Only the snapshot and the most recent delta are left after draining the queue
+    buffers = get_last_items_from_queue(queue, keep=is_parameters_snapshot, block=False)
+    assert [is_parameters_snapshot(buffer) for buffer in buffers] == [True, False]
+
+    for buffer in buffers:
+        decoded = decoder.decode(buffer)
+    for key, value in state_dicts["policy"].items():
+        torch.testing.assert_close(decoded["policy"][key], value)
+
+
 @require_package("grpc")
 def test_python_object_to_bytes_none():
     from lerobot.transport.utils import bytes_to_python_object, python_object_to_bytes
@@ -550,6 +620,53 @@ def test_transitions_to_bytes_multiple_transitions():
         assert_transitions_equal(original, reconstructed_item)
 
 
+@require_package("grpc")
+def test_transition_batch_to_bytes():
+    from lerobot.transport.utils import (
+        bytes_to_transition_batch,
+        bytes_to_transitions,
+        transition_batch_to_bytes,
+        transitions_to_bytes,
+    )
+    from lerobot.utils.transition import stack_transitions
+
+    transitions = [
+        Transition(
+            state={"image": torch.randn(1, 3, 8, 8), "state": torch.randn(1, 10)},
+            action=torch.randn(1, 3),
+            reward=float(i),
+            done=i == 3,
+            truncated=False,
+            next_state={"image": torch.randn(1, 3, 8, 8), "state": torch.randn(1, 10)},
+            complementary_info={"is_intervention": i % 2 == 0, "name": "ignored"},
+        )
+        for i in range(4)
+    ]
+    batch = stack_transitions(transitions)
+
+    assert batch["state"]["image"].shape == (4, 3, 8, 8)
+    assert batch["action"].shape == (4, 3)
+    assert batch["reward"].dtype == torch.float32
+    assert batch["done"].tolist() == [False, False, False, True]
+    assert set(batch["complementary_info"]) == {"is_intervention"}
+
+    reconstructed = bytes_to_transition_batch(transition_batch_to_bytes(batch))
+    assert_observation_equal(reconstructed["state"], batch["state"])
+    assert torch.equal(reconstructed["action"], batch["action"])
+    assert torch.equal(
+        reconstructed["complementary_info"]["is_intervention"], torch.tensor([1, 0, 1, 0]).bool()
+    )
+
+    # Both formats can be read by both functions
+    unstacked = bytes_to_transitions(transition_batch_to_bytes(batch))
+    assert len(unstacked) == 4
+    for original, transition in zip(transitions, unstacked, strict=True):
+        assert torch.allclose(original["state"]["state"].squeeze(0), transition["state"]["state"])
+        assert torch.allclose(original["action"].squeeze(0), transition["action"])
+    stacked = bytes_to_transition_batch(transitions_to_bytes(transitions))
+    assert torch.equal(stacked["action"], batch["action"])
+
+
 @require_package("grpc")
 def test_receive_bytes_in_chunks_unknown_state():
     from lerobot.transport.utils import receive_bytes_in_chunks
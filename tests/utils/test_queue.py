@@ -20,7 +20,7 @@ from queue import Queue
 
 from torch.multiprocessing import Queue as TorchMPQueue
 
-from lerobot.utils.queue import get_last_item_from_queue
+from lerobot.utils.queue import get_last_item_from_queue, get_last_items_from_queue
 
 
 def test_get_last_item_single_item():
@@ -164,3 +164,20 @@ def test_get_last_item_blocking_waits_for_item():
 
     assert result == ["item2"]
     assert queue.empty()
+
+
+def test_get_last_items_keeps_most_recent_kept_item():
+    """Test that the most recent item matching `keep` is returned before the most recent item."""
+    queue = Queue()
+    for item in ["delta_0", "snapshot_1", "delta_1", "delta_2"]:
+        queue.put(item)
+
+    result = get_last_items_from_queue(queue, keep=lambda item: item.startswith("snapshot"), block=False)
+
+    assert result == ["snapshot_1", "delta_2"]
+    assert queue.empty()
+
+    for item in ["delta_3", "snapshot_2"]:
+        queue.put(item)
+    assert get_last_items_from_queue(queue, keep=lambda item: item.startswith("snapshot")) == ["snapshot_2"]
+    assert get_last_items_from_queue(queue, keep=lambda item: item.startswith("snapshot"), timeout=0.01) == []
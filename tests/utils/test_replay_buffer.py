@@ -22,6 +22,7 @@ import torch
 
 from lerobot.datasets.lerobot_dataset import LeRobotDataset
 from lerobot.utils.buffer import BatchTransition, ReplayBuffer, random_crop_vectorized
+from lerobot.utils.transition import Transition, stack_transitions
 from tests.fixtures.constants import DUMMY_REPO_ID
 
 
@@ -235,6 +236,46 @@ def test_add_over_capacity():
     assert replay_buffer.truncateds[0], "Truncated should be True for the first transition."
 
 
+@pytest.mark.parametrize("optimize_memory", [False, True])
+@pytest.mark.parametrize("block_sizes", [[3], [2, 5], [4, 3, 12]])
+def test_add_batch_matches_add(optimize_memory, block_sizes):
+    buffer = create_empty_replay_buffer(optimize_memory=optimize_memory)
+    batch_buffer = create_empty_replay_buffer(optimize_memory=optimize_memory)
+
+    for block_size in block_sizes:
+        transitions = [
+            Transition(
+                state=create_dummy_state(),
+                action=create_dummy_action(),
+                reward=float(i),
+                next_state=create_dummy_state(),
+                done=i == block_size - 1,
+                truncated=False,
+                complementary_info={"is_intervention": i % 2 == 0},
+            )
+            for i in range(block_size)
+        ]
+        for transition in transitions:
+            buffer.add(**transition)
+        batch_buffer.add_batch(**stack_transitions(transitions))
+
+    assert batch_buffer.position == buffer.position
+    assert len(batch_buffer) == len(buffer)
+    # Only the first `len(buffer)` slots are filled
+    filled = slice(0, len(buffer))
+    for key in state_dims():
+        assert torch.equal(batch_buffer.states[key][filled], buffer.states[key][filled])
+        assert torch.equal(batch_buffer.next_states[key][filled], buffer.next_states[key][filled])
+    assert torch.equal(batch_buffer.actions[filled], buffer.actions[filled])
+    assert torch.equal(batch_buffer.rewards[filled], buffer.rewards[filled])
+    assert torch.equal(batch_buffer.dones[filled], buffer.dones[filled])
+    assert torch.equal(batch_buffer.truncateds[filled], buffer.truncateds[filled])
+    assert torch.equal(
+        batch_buffer.complementary_info["is_intervention"][filled],
+        buffer.complementary_info["is_intervention"][filled],
+    )
+
+
 def test_sample_from_empty_buffer(replay_buffer):
     with pytest.raises(RuntimeError, match="Cannot sample from an empty buffer"):
         replay_buffer.sample(1)
@@ -680,3 +721,51 @@ def test_async_iterator_multiple_iterations():
 
     # Ensure iterator can be disposed without blocking
     del iterator
+
+
+def test_multiprocess_iterator_shapes():
+    buffer = _populate_buffer_for_async_test()
+    batch_size = 2
+    iterator = buffer.get_iterator(batch_size=batch_size, queue_size=1, num_workers=2)
+
+    for _ in range(3):
+        batch = next(iterator)
+        assert batch["state"]["observation.image"].shape == (batch_size, 3, 128, 128)
+        assert batch["next_state"]["observation.state"].shape == (batch_size, 11)
+        assert batch["action"].shape == (batch_size,)
+        assert batch["done"].dtype == torch.float32
+
+    assert buffer.shared_memory
+    assert buffer.actions.is_shared()
+    del iterator
+
+
+def test_multiprocess_iterator_sees_new_transitions():
+    buffer = ReplayBuffer(capacity=4, device="cpu", state_keys=["observation.state"], shared_memory=True)
+    state = {"observation.state": torch.zeros(2)}
+    buffer.add(state=state, action=torch.zeros(1), reward=0.0, next_state=state, done=False, truncated=False)
+    assert buffer.actions.is_shared()
+
+    iterator = buffer.get_iterator(batch_size=4, queue_size=1, num_workers=1)
+    assert torch.all(next(iterator)["action"] == 0)
+
+    for _ in range(4):
+        buffer.add(
+            state=state, action=torch.ones(1), reward=1.0, next_state=state, done=False, truncated=False
+        )
+    assert len(buffer) == 4
+
+    # The batches prefetched before the transitions were added are consumed first
+    for _ in range(10):
+        batch = next(iterator)
+        if torch.all(batch["action"] == 1):
+            break
+    assert torch.all(batch["action"] == 1)
+    del iterator
+
+
+def test_shared_memory_requires_cpu_storage():
+    buffer = create_empty_replay_buffer()
+    buffer.storage_device = "meta"
+    with pytest.raises(ValueError):
+        buffer.share_memory()